@@ -0,0 +1,66 @@
+"""Compares the time to parse large Navigation (`down=-1`) and Collection responses with
+`Response.json()` (bytes decoded to `str`, then parsed by `json`) and with the decoders of
+`dts_validator.decoding` (parsing the bytes directly, with each backend installed).
+
+Usage: python benchmarks/bench_decoding.py [--units N] [--members N] [--runs N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dts_validator.decoding import BACKENDS, JSONDecoder  # noqa: E402
+from bench_validation import load_example, make_navigation  # noqa: E402
+
+def make_response(json_data):
+    response = requests.models.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/ld+json'
+    response._content = json.dumps(json_data, ensure_ascii=False).encode('utf-8')
+    return response
+
+def make_collection(members):
+    collection = load_example('collection/collection_docs_response_root.json')
+    member = collection['member'][0]
+    collection['member'] = [dict(member, **{'@id': f'{member["@id"]}-{index}', 'title': f'Collection n° {index}'}) for index in range(members)]
+    return collection
+
+def measure(function, response, runs):
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        function(response)
+    return (time.perf_counter() - start_time) / runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--units', type=int, default=20000, help='Number of citable units in the Navigation response')
+    parser.add_argument('--members', type=int, default=5000, help='Number of members in the Collection response')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    decoders = {}
+    for backend in BACKENDS:
+        try:
+            decoders[backend] = JSONDecoder(backend)
+        except ImportError:
+            print(f'{backend}: not installed')
+    cases = [
+        (f'navigation ({args.units} units)', make_response(make_navigation(args.units))),
+        (f'collection ({args.members} members)', make_response(make_collection(args.members))),
+    ]
+    for name, response in cases:
+        expected = response.json()
+        baseline = measure(lambda response: response.json(), response, args.runs)
+        line = f'{name:32} {len(response.content) / 1e6:6.2f} MB  Response.json() {baseline * 1000:8.2f} ms'
+        for backend, decoder in decoders.items():
+            assert decoder.decode_response(response) == expected
+            elapsed = measure(decoder.decode_response, response, args.runs)
+            line += f'  {backend} {elapsed * 1000:8.2f} ms ({baseline / elapsed:4.1f}x)'
+        print(line)
+
+if __name__ == '__main__':
+    main()
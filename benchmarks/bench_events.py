@@ -0,0 +1,57 @@
+"""Measures the overhead of logging on the hot paths: an eagerly formatted f-string passed to a
+disabled logger (as before the event log), and the events of `dts_validator.events` when no
+sink wants them, when they are sampled, and when they are all written to a JSONL file.
+
+Usage: python benchmarks/bench_events.py [--events N]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dts_validator.events import EventLog, JSONLEventSink, LoggingEventSink  # noqa: E402
+
+LOGGER = logging.getLogger()
+URI = 'https://example.org/api/dts/navigation/?resource=urn:cts:latinLit:phi1103.phi001&down=1'
+
+def measure(function, count):
+    start_time = time.perf_counter()
+    for _ in range(count):
+        function()
+    return (time.perf_counter() - start_time) / count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=200000, help='Number of events per measure')
+    args = parser.parse_args()
+    LOGGER.setLevel(logging.WARNING)
+
+    # as configured by the command line: events are logged at the level of the root logger
+    events = EventLog()
+    events.add_sink(LoggingEventSink(level=LOGGER.getEffectiveLevel()))
+    sampled = EventLog()
+    sampled.add_sink(LoggingEventSink(level=LOGGER.getEffectiveLevel()))
+    sampled.configure('request', sample_rate=0.01)
+    with tempfile.TemporaryDirectory() as directory:
+        recorded = EventLog()
+        recorded.add_sink(JSONLEventSink(os.path.join(directory, 'events.jsonl'), level=logging.INFO))
+        sampled.add_sink(JSONLEventSink(os.path.join(directory, 'sampled.jsonl'), level=logging.INFO))
+        cases = [
+            ('no logging', lambda: None),
+            ('f-string, logger disabled', lambda: LOGGER.info(f'URI of request to Navigation endpoint: {URI}')),
+            ('event, no sink enabled', lambda: events.emit('request', message='URI of request to {endpoint} endpoint: {uri}', endpoint='Navigation', uri=URI)),
+            ('event, guarded by enabled_for', lambda: events.enabled_for(logging.INFO) and events.emit('request', message='URI of request to {endpoint} endpoint: {uri}', endpoint='Navigation', uri=URI)),
+            ('event, sampled 1% to JSONL', lambda: sampled.emit('request', message='URI of request to {endpoint} endpoint: {uri}', endpoint='Navigation', uri=URI)),
+            ('event, all to JSONL', lambda: recorded.emit('request', message='URI of request to {endpoint} endpoint: {uri}', endpoint='Navigation', uri=URI)),
+        ]
+        for name, function in cases:
+            print(f'{name:32} {measure(function, args.events) * 1e9:8.0f} ns/event')
+        recorded.close()
+        sampled.close()
+
+if __name__ == '__main__':
+    main()
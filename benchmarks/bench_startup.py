@@ -0,0 +1,39 @@
+"""Compares the time needed to validate one response file with the standalone engine
+(`dts-validator validate-file`) and with the pytest suite (`dts-validator <test module>`).
+
+Usage: python benchmarks/bench_startup.py [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    'engine (validate-file)': [sys.executable, '-m', 'dts_validator.cli', 'validate-file', '-q', 'tests/data/entry/entry_docs_response.json'],
+    'pytest (test_entry_endpoint.py)': [sys.executable, '-m', 'dts_validator.cli', '-q', '-p', 'no:logging', 'tests/test_entry_endpoint.py'],
+    'import dts_validator.engine': [sys.executable, '-c', 'import dts_validator.engine'],
+}
+
+def time_command(command, runs):
+    timings = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        subprocess.run(command, cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start_time)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    for name, command in COMMANDS.items():
+        timings = time_command(command, args.runs)
+        print(f'{name:35} median {statistics.median(timings):.3f}s  min {min(timings):.3f}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Compares the content codings (and, optionally, the HTTP/2 transport) of the client when
+fetching large Navigation responses (`down=-1`) from a local server: wall-clock time, and
+bytes received on the wire and once decompressed.
+
+The local server speaks HTTP/1.1 only; to include HTTP/2, pass the URL of a response served
+over HTTPS by an HTTP/2 server with `--http2-url` (this requires `httpx[http2]`).
+
+Usage: python benchmarks/bench_transport.py [--units N] [--requests N] [--workers N] [--http2-url URL]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dts_validator.transport import TransferStats, get_accept_encoding, make_session  # noqa: E402
+
+def make_navigation(units):
+    members = []
+    for book in range(1, units // 20 + 2):
+        members.append({'identifier': str(book), '@type': 'CitableUnit', 'level': 1, 'parent': None, 'citeType': 'book'})
+        for line in range(1, 20):
+            members.append({
+                'identifier': f'{book}.{line}', '@type': 'CitableUnit', 'level': 2, 'parent': str(book),
+                'citeType': 'line', 'dublinCore': {'title': f'Book {book}, line {line}'},
+            })
+    return {'@id': 'https://example.org/api/dts/navigation/?resource=r&down=-1', '@type': 'Navigation', 'member': members[:units]}
+
+def encode(body, accept_encoding):
+    """Returns the body in the first coding of `accept_encoding` supported by the server."""
+    for coding in [coding.strip() for coding in accept_encoding.split(',')]:
+        if coding == 'zstd':
+            try:
+                import zstandard
+                return 'zstd', zstandard.ZstdCompressor().compress(body)
+            except ImportError:
+                continue
+        if coding == 'br':
+            try:
+                import brotli
+                return 'br', brotli.compress(body, quality=5)
+            except ImportError:
+                continue
+        if coding == 'gzip':
+            return 'gzip', gzip.compress(body, compresslevel=6)
+        if coding == 'deflate':
+            return 'deflate', zlib.compress(body)
+    return None, body
+
+def start_server(body):
+    encoded = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            accept_encoding = self.headers.get('Accept-Encoding', 'identity')
+            if accept_encoding not in encoded:
+                encoded[accept_encoding] = encode(body, accept_encoding)
+            coding, data = encoded[accept_encoding]
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/ld+json')
+            self.send_header('Content-Length', str(len(data)))
+            if coding:
+                self.send_header('Content-Encoding', coding)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/navigation/'
+
+def run(name, session, url, requests, workers):
+    stats = TransferStats()
+
+    def fetch(_):
+        response = session.get(url, timeout=60)
+        response.json()
+        stats.record(response)
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(fetch, range(requests)))
+    duration = time.perf_counter() - start_time
+    info = stats.info()
+    print(
+        f'{name:28} {duration:7.3f}s  wire {info.wire_bytes / info.requests / 1024:9.1f} KiB/response  '
+        f'decoded {info.body_bytes / info.requests / 1024:9.1f} KiB/response  {info.encodings} {info.http_versions}'
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--units', type=int, default=20000, help='Number of citable units in the Navigation response')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--http2-url', default=None, help='URL of a response served over HTTP/2')
+    args = parser.parse_args()
+
+    body = json.dumps(make_navigation(args.units)).encode('utf-8')
+    server, url = start_server(body)
+    print(f'Navigation response of {len(body) / 1024:.1f} KiB; the client accepts: {get_accept_encoding()}')
+    codings = ['identity', 'deflate', 'gzip'] + [coding for coding in ('br', 'zstd') if coding in get_accept_encoding()]
+    for coding in codings:
+        session = make_session()
+        session.headers['Accept-Encoding'] = coding
+        run(f'HTTP/1.1 {coding}', session, url, args.requests, args.workers)
+    run('HTTP/1.1 (negotiated)', make_session(), url, args.requests, args.workers)
+    server.shutdown()
+
+    if args.http2_url:
+        run('HTTP/1.1 (remote)', make_session(), args.http2_url, args.requests, args.workers)
+        run('HTTP/2 (remote)', make_session(http2=True), args.http2_url, args.requests, args.workers)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Compares the throughput of `jsonschema` and of the generated validators (see
+`dts_validator.codegen`) on large Navigation responses (`down=-1`), and on the Collection
+and Entry responses of `tests/data`.
+
+Usage: python benchmarks/bench_validation.py [--units N] [--runs N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jsonschema.exceptions import best_match  # noqa: E402
+from dts_validator._generated_validators import VALIDATORS  # noqa: E402
+from dts_validator.codegen import get_schema_hash  # noqa: E402
+from dts_validator.validation import get_validator, load_schema  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'data')
+
+def make_navigation(units):
+    with open(os.path.join(DATA_DIR, 'navigation', 'navigation_docs_response_down_one.json')) as json_file:
+        navigation = json.load(json_file)
+    members = []
+    for book in range(1, units // 20 + 2):
+        members.append({'identifier': str(book), '@type': 'CitableUnit', 'level': 1, 'parent': None, 'citeType': 'book'})
+        for line in range(1, 20):
+            members.append({
+                'identifier': f'{book}.{line}', '@type': 'CitableUnit', 'level': 2, 'parent': str(book),
+                'citeType': 'line', 'dublinCore': {'title': f'Book {book}, line {line}'},
+            })
+    navigation['member'] = members[:units]
+    return navigation
+
+def load_example(path):
+    with open(os.path.join(DATA_DIR, path)) as json_file:
+        return json.load(json_file)
+
+def measure(function, json_data, runs):
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        function(json_data)
+    return (time.perf_counter() - start_time) / runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--units', type=int, default=20000, help='Number of citable units in the Navigation response')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    cases = [
+        (f'navigation ({args.units} units)', 'navigation', make_navigation(args.units), args.runs),
+        ('collection (docs example)', 'collection', load_example('collection/collection_docs_response_root.json'), args.runs * 1000),
+        ('entry (docs example)', 'entry', load_example('entry/entry_docs_response.json'), args.runs * 1000),
+    ]
+    for name, endpoint, json_data, runs in cases:
+        json_schema = load_schema(endpoint)
+        validator = get_validator(json_schema)
+        fast_validator = VALIDATORS[get_schema_hash(json_schema)]
+        assert fast_validator(json_data) and best_match(validator.iter_errors(json_data)) is None
+        generic = measure(lambda data: best_match(validator.iter_errors(data)), json_data, runs)
+        generated = measure(fast_validator, json_data, runs)
+        print(f'{name:32} jsonschema {generic * 1000:9.3f} ms  generated {generated * 1000:9.3f} ms  ({generic / generated:5.1f}x)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,436 @@
+# Generated by `python -m dts_validator.codegen` from the schemas in `schemas/`: do not edit.
+import re
+
+_MISSING = object()
+
+_CONSTANT_0 = re.compile('^CitableUnit$')
+_CONSTANT_1 = re.compile('^(Collection|Resource)$')
+_CONSTANT_2 = frozenset(['1-alpha', 'unstable'])
+_CONSTANT_3 = re.compile('^Navigation$')
+_CONSTANT_4 = re.compile('^(Resource)$')
+
+def validate_citable_unit(instance):
+    if not (isinstance(instance, dict)):
+        return False
+    if 'identifier' not in instance:
+        return False
+    if '@type' not in instance:
+        return False
+    if 'level' not in instance:
+        return False
+    if 'parent' not in instance:
+        return False
+    v1 = instance.get('identifier', _MISSING)
+    if v1 is not _MISSING:
+        if not (isinstance(v1, str)):
+            return False
+    v2 = instance.get('@type', _MISSING)
+    if v2 is not _MISSING:
+        if not (isinstance(v2, str)):
+            return False
+        if not _CONSTANT_0.search(v2):
+            return False
+    v3 = instance.get('level', _MISSING)
+    if v3 is not _MISSING:
+        if not ((isinstance(v3, (int, float)) and not isinstance(v3, bool))):
+            return False
+    v4 = instance.get('parent', _MISSING)
+    if v4 is not _MISSING:
+        if not (isinstance(v4, str) or v4 is None):
+            return False
+    v5 = instance.get('citeType', _MISSING)
+    if v5 is not _MISSING:
+        if not (isinstance(v5, str)):
+            return False
+    v6 = instance.get('dublinCore', _MISSING)
+    if v6 is not _MISSING:
+        if not (isinstance(v6, dict)):
+            return False
+    v7 = instance.get('extensions', _MISSING)
+    if v7 is not _MISSING:
+        if not (isinstance(v7, dict)):
+            return False
+    return True
+
+def validate_collection_response(instance):
+    if not (isinstance(instance, dict)):
+        return False
+    if 'title' not in instance:
+        return False
+    if '@id' not in instance:
+        return False
+    if '@type' not in instance:
+        return False
+    if 'totalChildren' not in instance:
+        return False
+    if 'totalParents' not in instance:
+        return False
+    v8 = instance.get('title', _MISSING)
+    if v8 is not _MISSING:
+        if not (isinstance(v8, str)):
+            return False
+    v9 = instance.get('@id', _MISSING)
+    if v9 is not _MISSING:
+        if not (isinstance(v9, str)):
+            return False
+    v10 = instance.get('@type', _MISSING)
+    if v10 is not _MISSING:
+        if not (isinstance(v10, str)):
+            return False
+        if not _CONSTANT_1.search(v10):
+            return False
+    v11 = instance.get('dtsVersion', _MISSING)
+    if v11 is not _MISSING:
+        if not (isinstance(v11, str)):
+            return False
+    v12 = instance.get('totalChildren', _MISSING)
+    if v12 is not _MISSING:
+        if not ((isinstance(v12, (int, float)) and not isinstance(v12, bool))):
+            return False
+    v13 = instance.get('totalParents', _MISSING)
+    if v13 is not _MISSING:
+        if not ((isinstance(v13, (int, float)) and not isinstance(v13, bool))):
+            return False
+    v14 = instance.get('description', _MISSING)
+    if v14 is not _MISSING:
+        if not (isinstance(v14, str)):
+            return False
+    v15 = instance.get('member', _MISSING)
+    if v15 is not _MISSING:
+        if not (isinstance(v15, list)):
+            return False
+        for v16 in v15:
+            if not validate_collection_response(v16):
+                return False
+    v17 = instance.get('dublinCore', _MISSING)
+    if v17 is not _MISSING:
+        if not (isinstance(v17, dict)):
+            return False
+    v18 = instance.get('extensions', _MISSING)
+    if v18 is not _MISSING:
+        if not (isinstance(v18, dict)):
+            return False
+    v19 = instance.get('document', _MISSING)
+    if v19 is not _MISSING:
+        if not (isinstance(v19, str)):
+            return False
+    v20 = instance.get('navigation', _MISSING)
+    if v20 is not _MISSING:
+        if not (isinstance(v20, str)):
+            return False
+    v21 = instance.get('collection', _MISSING)
+    if v21 is not _MISSING:
+        if not (isinstance(v21, str)):
+            return False
+    v22 = instance.get('download', _MISSING)
+    if v22 is not _MISSING:
+        if not (_validate_collection_response_23(v22) or _validate_collection_response_24(v22)):
+            return False
+    v25 = instance.get('citationTrees', _MISSING)
+    if v25 is not _MISSING:
+        if not (isinstance(v25, list)):
+            return False
+        for v26 in v25:
+            if not (isinstance(v26, dict)):
+                return False
+            if '@type' not in v26:
+                return False
+            v27 = v26.get('identifier', _MISSING)
+            if v27 is not _MISSING:
+                if not (isinstance(v27, str)):
+                    return False
+            v28 = v26.get('@type', _MISSING)
+            if v28 is not _MISSING:
+                if not (isinstance(v28, str)):
+                    return False
+            v29 = v26.get('citeStructure', _MISSING)
+            if v29 is not _MISSING:
+                if not (isinstance(v29, list)):
+                    return False
+                for v30 in v29:
+                    if not (isinstance(v30, dict)):
+                        return False
+                    v31 = v30.get('citeType', _MISSING)
+                    if v31 is not _MISSING:
+                        if not (isinstance(v31, str)):
+                            return False
+                    v32 = v30.get('citeStructure', _MISSING)
+                    if v32 is not _MISSING:
+                        if not _validate_resource_33(v32):
+                            return False
+            v34 = v26.get('description', _MISSING)
+            if v34 is not _MISSING:
+                if not (isinstance(v34, str)):
+                    return False
+    return True
+
+def _validate_collection_response_23(instance):
+    if not (isinstance(instance, str)):
+        return False
+    return True
+
+def _validate_collection_response_24(instance):
+    if not (isinstance(instance, list)):
+        return False
+    for v35 in instance:
+        if not (isinstance(v35, str)):
+            return False
+    return True
+
+def _validate_resource_33(instance):
+    if not (isinstance(instance, list)):
+        return False
+    for v36 in instance:
+        if not (isinstance(v36, dict)):
+            return False
+        v37 = v36.get('citeType', _MISSING)
+        if v37 is not _MISSING:
+            if not (isinstance(v37, str)):
+                return False
+        v38 = v36.get('citeStructure', _MISSING)
+        if v38 is not _MISSING:
+            if not _validate_resource_33(v38):
+                return False
+    return True
+
+def validate_entry_response(instance):
+    if not (isinstance(instance, dict)):
+        return False
+    if '@context' not in instance:
+        return False
+    if '@id' not in instance:
+        return False
+    if '@type' not in instance:
+        return False
+    if 'dtsVersion' not in instance:
+        return False
+    if 'collection' not in instance:
+        return False
+    if 'document' not in instance:
+        return False
+    if 'navigation' not in instance:
+        return False
+    v39 = instance.get('@context', _MISSING)
+    if v39 is not _MISSING:
+        if not (isinstance(v39, str)):
+            return False
+    v40 = instance.get('@id', _MISSING)
+    if v40 is not _MISSING:
+        if not (isinstance(v40, str)):
+            return False
+    v41 = instance.get('@type', _MISSING)
+    if v41 is not _MISSING:
+        if not (isinstance(v41, str)):
+            return False
+    v42 = instance.get('dtsVersion', _MISSING)
+    if v42 is not _MISSING:
+        if not (isinstance(v42, str)):
+            return False
+        if not (isinstance(v42, str) and v42 in _CONSTANT_2):
+            return False
+    v43 = instance.get('collection', _MISSING)
+    if v43 is not _MISSING:
+        if not (isinstance(v43, str)):
+            return False
+    v44 = instance.get('document', _MISSING)
+    if v44 is not _MISSING:
+        if not (isinstance(v44, str)):
+            return False
+    v45 = instance.get('navigation', _MISSING)
+    if v45 is not _MISSING:
+        if not (isinstance(v45, str)):
+            return False
+    return True
+
+def validate_navigation_response(instance):
+    if not (isinstance(instance, dict)):
+        return False
+    if '@id' not in instance:
+        return False
+    if '@type' not in instance:
+        return False
+    if 'dtsVersion' not in instance:
+        return False
+    if 'resource' not in instance:
+        return False
+    v46 = instance.get('@id', _MISSING)
+    if v46 is not _MISSING:
+        if not (isinstance(v46, str)):
+            return False
+    v47 = instance.get('@type', _MISSING)
+    if v47 is not _MISSING:
+        if not (isinstance(v47, str)):
+            return False
+        if not _CONSTANT_3.search(v47):
+            return False
+    v48 = instance.get('dtsVersion', _MISSING)
+    if v48 is not _MISSING:
+        if not (isinstance(v48, str)):
+            return False
+    v49 = instance.get('resource', _MISSING)
+    if v49 is not _MISSING:
+        if not (isinstance(v49, dict)):
+            return False
+        if '@id' not in v49:
+            return False
+        if '@type' not in v49:
+            return False
+        if 'citationTrees' not in v49:
+            return False
+        if 'navigation' not in v49:
+            return False
+        if 'document' not in v49:
+            return False
+        v50 = v49.get('@id', _MISSING)
+        if v50 is not _MISSING:
+            if not (isinstance(v50, str)):
+                return False
+        v51 = v49.get('@type', _MISSING)
+        if v51 is not _MISSING:
+            if not (isinstance(v51, str)):
+                return False
+            if not _CONSTANT_4.search(v51):
+                return False
+        v52 = v49.get('collection', _MISSING)
+        if v52 is not _MISSING:
+            if not (isinstance(v52, str)):
+                return False
+        v53 = v49.get('document', _MISSING)
+        if v53 is not _MISSING:
+            if not (isinstance(v53, str)):
+                return False
+        v54 = v49.get('navigation', _MISSING)
+        if v54 is not _MISSING:
+            if not (isinstance(v54, str)):
+                return False
+        v55 = v49.get('citationTrees', _MISSING)
+        if v55 is not _MISSING:
+            if not (isinstance(v55, list)):
+                return False
+            for v56 in v55:
+                if not (isinstance(v56, dict)):
+                    return False
+                if '@type' not in v56:
+                    return False
+                v57 = v56.get('identifier', _MISSING)
+                if v57 is not _MISSING:
+                    if not (isinstance(v57, str)):
+                        return False
+                v58 = v56.get('@type', _MISSING)
+                if v58 is not _MISSING:
+                    if not (isinstance(v58, str)):
+                        return False
+                v59 = v56.get('citeStructure', _MISSING)
+                if v59 is not _MISSING:
+                    if not _validate_resource_33(v59):
+                        return False
+                v60 = v56.get('description', _MISSING)
+                if v60 is not _MISSING:
+                    if not (isinstance(v60, str)):
+                        return False
+        v61 = v49.get('mediaTypes', _MISSING)
+        if v61 is not _MISSING:
+            if not (isinstance(v61, list)):
+                return False
+            for v62 in v61:
+                if not (isinstance(v62, str)):
+                    return False
+    v63 = instance.get('ref', _MISSING)
+    if v63 is not _MISSING:
+        if not validate_citable_unit(v63):
+            return False
+    v64 = instance.get('start', _MISSING)
+    if v64 is not _MISSING:
+        if not validate_citable_unit(v64):
+            return False
+    v65 = instance.get('end', _MISSING)
+    if v65 is not _MISSING:
+        if not validate_citable_unit(v65):
+            return False
+    v66 = instance.get('member', _MISSING)
+    if v66 is not _MISSING:
+        if not (isinstance(v66, list) or v66 is None):
+            return False
+        if isinstance(v66, list):
+            for v67 in v66:
+                if not validate_citable_unit(v67):
+                    return False
+    return True
+
+def validate_resource(instance):
+    if not (isinstance(instance, dict)):
+        return False
+    if '@id' not in instance:
+        return False
+    if '@type' not in instance:
+        return False
+    if 'citationTrees' not in instance:
+        return False
+    if 'navigation' not in instance:
+        return False
+    if 'document' not in instance:
+        return False
+    v68 = instance.get('@id', _MISSING)
+    if v68 is not _MISSING:
+        if not (isinstance(v68, str)):
+            return False
+    v69 = instance.get('@type', _MISSING)
+    if v69 is not _MISSING:
+        if not (isinstance(v69, str)):
+            return False
+        if not _CONSTANT_4.search(v69):
+            return False
+    v70 = instance.get('collection', _MISSING)
+    if v70 is not _MISSING:
+        if not (isinstance(v70, str)):
+            return False
+    v71 = instance.get('document', _MISSING)
+    if v71 is not _MISSING:
+        if not (isinstance(v71, str)):
+            return False
+    v72 = instance.get('navigation', _MISSING)
+    if v72 is not _MISSING:
+        if not (isinstance(v72, str)):
+            return False
+    v73 = instance.get('citationTrees', _MISSING)
+    if v73 is not _MISSING:
+        if not (isinstance(v73, list)):
+            return False
+        for v74 in v73:
+            if not (isinstance(v74, dict)):
+                return False
+            if '@type' not in v74:
+                return False
+            v75 = v74.get('identifier', _MISSING)
+            if v75 is not _MISSING:
+                if not (isinstance(v75, str)):
+                    return False
+            v76 = v74.get('@type', _MISSING)
+            if v76 is not _MISSING:
+                if not (isinstance(v76, str)):
+                    return False
+            v77 = v74.get('citeStructure', _MISSING)
+            if v77 is not _MISSING:
+                if not _validate_resource_33(v77):
+                    return False
+            v78 = v74.get('description', _MISSING)
+            if v78 is not _MISSING:
+                if not (isinstance(v78, str)):
+                    return False
+    v79 = instance.get('mediaTypes', _MISSING)
+    if v79 is not _MISSING:
+        if not (isinstance(v79, list)):
+            return False
+        for v80 in v79:
+            if not (isinstance(v80, str)):
+                return False
+    return True
+
+# the generated validator of each schema, by hash of the schema (see `validation.get_validation_error`)
+VALIDATORS = {
+    'd4439ea1d906cc1d5ebb163ec313dc30adc7e8f2': validate_citable_unit,  # citable_unit.schema.json
+    '5daf6230f07c9ba537fe64e2050409f3f09c27af': validate_collection_response,  # collection_response.schema.json
+    '0c841dc41b9565fdaac2d3407e376bca271408b1': validate_entry_response,  # entry_response.schema.json
+    'f15974af621dd78ca855b9c704aa792738785242': validate_navigation_response,  # navigation_response.schema.json
+    'acb9c053bbefec9fa466e3fa8c871c1d3a1397ad': validate_resource,  # resource.schema.json
+}
@@ -0,0 +1,190 @@
+import html
+import logging
+import random
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+LOGGER = logging.getLogger()
+
+# the group new signatures are counted in, once an aggregator holds `max_groups` groups
+OVERFLOW_SIGNATURE = ('*', '*', 'other failures')
+
+MAX_EXEMPLAR_MESSAGE_LENGTH = 500
+
+# maximum number of message patterns counted by a `RepeatedRecordFilter`
+MAX_FILTERED_PATTERNS = 10000
+
+_INDEX_PATTERN = re.compile(r'/\d+(?=/|$)')
+_URI_PATTERN = re.compile(r'\b(?:[a-z][a-z0-9+.-]*://|urn:)[^\s\'"`<>]+', re.IGNORECASE)
+_NUMBER_PATTERN = re.compile(r'\d+')
+
+class Signature(NamedTuple):
+    """What the failures of a systematic bug have in common: the endpoint (or test module)
+    they come from, the schema keyword (or type of error) that failed, and where (a JSON
+    pointer with the array indices replaced by `*`, or the normalized error message)."""
+    group: str
+    keyword: str
+    pattern: str
+
+    def __str__(self) -> str:
+        return f'{self.group} {self.keyword} {self.pattern}'
+
+def pointer_pattern(pointer: str) -> str:
+    """Returns the pattern of a JSON pointer, e.g. `/member/*/citeType` for `/member/12/citeType`."""
+    return _INDEX_PATTERN.sub('/*', pointer)
+
+def message_pattern(message: Optional[str]) -> str:
+    """Returns the pattern of an error message: its main line (for a pytest traceback, the
+    first `E` line), with URIs (including `urn:` identifiers) and numbers replaced by placeholders."""
+    lines = (message or '').splitlines()
+    main_line = next((line[1:].strip() for line in lines if line.startswith('E ')), lines[0] if lines else '')
+    main_line = _NUMBER_PATTERN.sub('#', _URI_PATTERN.sub('<uri>', main_line))
+    return main_line[:200]
+
+def failure_signature(result: Dict) -> Signature:
+    """Returns the signature of a failed result. Results of schema validations record the
+    keyword (`keyword`) and the JSON pointer (`pointer`) of their error; other failures are
+    told apart by their message."""
+    group = result.get('group') or ''
+    keyword = result.get('keyword')
+    if keyword is not None and result.get('pointer') is not None:
+        return Signature(group, keyword, pointer_pattern(result['pointer']))
+    return Signature(group, keyword or result['outcome'], message_pattern(result.get('message')))
+
+class FailureGroup(object):
+    """The failures sharing a signature: their count, and a uniform sample of `max_exemplars`
+    of them (reservoir sampling, so that the storage does not depend on the count)."""
+
+    __slots__ = ('signature', 'count', 'exemplars')
+
+    def __init__(self, signature: Signature) -> None:
+        self.signature = signature
+        self.count = 0
+        self.exemplars: List[Dict] = []
+
+    def add(self, result: Dict, max_exemplars: int, rng: random.Random) -> None:
+        self.count += 1
+        if len(self.exemplars) < max_exemplars:
+            self.exemplars.append(make_exemplar(result))
+        else:
+            index = rng.randrange(self.count)
+            if index < max_exemplars:
+                self.exemplars[index] = make_exemplar(result)
+
+    def to_dict(self) -> Dict:
+        return {'signature': list(self.signature), 'count': self.count, 'exemplars': self.exemplars}
+
+def make_exemplar(result: Dict) -> Dict:
+    message = result.get('message') or ''
+    if len(message) > MAX_EXEMPLAR_MESSAGE_LENGTH:
+        message = message[:MAX_EXEMPLAR_MESSAGE_LENGTH] + ' [...]'
+    return {'name': result['name'], 'message': message}
+
+class FailureAggregator(object):
+    """Thread-safe aggregation of failed results by signature (see `failure_signature`), with
+    bounded storage: at most `max_exemplars` results are kept per group, and at most
+    `max_groups` groups (further signatures are counted together).
+    """
+
+    def __init__(self, max_exemplars: int = 3, max_groups: int = 1000, seed: int = 0) -> None:
+        """
+        :param max_exemplars: Number of sample failures kept per group, defaults to 3
+        :type max_exemplars: int, optional
+        :param max_groups: Maximum number of groups, defaults to 1000
+        :type max_groups: int, optional
+        :param seed: Seed of the sampling of exemplars, defaults to 0
+        :type seed: int, optional
+        """
+        self.max_exemplars = max_exemplars
+        self.max_groups = max_groups
+        self.failures = 0
+        self._groups: Dict[Signature, FailureGroup] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def add(self, result: Dict) -> Optional[FailureGroup]:
+        """Adds a result (ignored unless it failed), and returns its group."""
+        if result['outcome'] not in ('failed', 'error'):
+            return None
+        signature = failure_signature(result)
+        with self._lock:
+            self.failures += 1
+            group = self._groups.get(signature)
+            if group is None:
+                if len(self._groups) >= self.max_groups:
+                    signature = Signature(*OVERFLOW_SIGNATURE)
+                group = self._groups.setdefault(signature, FailureGroup(signature))
+            group.add(result, self.max_exemplars, self._rng)
+            return group
+
+    def groups(self) -> List[FailureGroup]:
+        """Returns the groups, the largest first."""
+        with self._lock:
+            return sorted(self._groups.values(), key=lambda group: (-group.count, tuple(group.signature)))
+
+    def format_summary(self, max_groups: int = 20) -> str:
+        """Returns a plain-text summary of the (largest) groups."""
+        groups = self.groups()
+        lines = [f'{self.failures} failures in {len(groups)} groups:']
+        for group in groups[:max_groups]:
+            lines.append(f'{group.count:8} x {group.signature} (e.g. {group.exemplars[0]["name"]})')
+        if len(groups) > max_groups:
+            lines.append(f'         ... and {len(groups) - max_groups} more groups')
+        return '\n'.join(lines)
+
+    def to_html(self) -> str:
+        """Returns an HTML table of the groups, with their exemplars."""
+        rows = []
+        for group in self.groups():
+            exemplars = ''.join(
+                f'<details><summary>{html.escape(exemplar["name"])}</summary>{html.escape(exemplar["message"])}</details>'
+                for exemplar in group.exemplars
+            )
+            group_name, keyword, pattern = (html.escape(part) for part in group.signature)
+            rows.append(f'<tr><td>{group.count}</td><td>{group_name}</td><td>{keyword}</td><td class="message">{pattern}</td><td class="message">{exemplars}</td></tr>\n')
+        return (
+            '<table><tr><th>Count</th><th>Group</th><th>Keyword</th><th>Where</th><th>Exemplars</th></tr>\n'
+            + ''.join(rows) + '</table>'
+        )
+
+def aggregate_failures(results: Iterable[Dict], **options) -> FailureAggregator:
+    aggregator = FailureAggregator(**options)
+    for result in results:
+        aggregator.add(result)
+    return aggregator
+
+class RepeatedRecordFilter(logging.Filter):
+    """Lets through the first `max_repeats` log records with the same message pattern (see
+    `message_pattern`), and drops the following ones, so that a systematic failure does not
+    flood the logs; every `report_every` dropped records, one record tells how many were dropped.
+
+    The pattern of a record logged with arguments is that of its format string, so that the
+    identifiers passed as arguments (whatever their form) do not tell its repeats apart. The
+    filter applies to the records of the logger it is attached to (not to those of its children)."""
+
+    def __init__(self, max_repeats: int = 10, report_every: int = 1000) -> None:
+        super().__init__()
+        self.max_repeats = max_repeats
+        self.report_every = report_every
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+        pattern = message_pattern(str(record.msg) if record.args else record.getMessage())
+        with self._lock:
+            if pattern not in self.counts and len(self.counts) >= MAX_FILTERED_PATTERNS:
+                # keep the memory bounded: forget the patterns seen so far
+                self.counts.clear()
+            self.counts[pattern] += 1
+            count = self.counts[pattern]
+        if count <= self.max_repeats:
+            return True
+        suppressed = count - self.max_repeats
+        if suppressed % self.report_every == 0:
+            record.msg, record.args = f'{record.getMessage()} [{suppressed} similar messages suppressed]', ()
+            return True
+        return False
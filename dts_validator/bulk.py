@@ -0,0 +1,132 @@
+import logging
+import os
+import tarfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .decoding import loads
+from .engine import check_json_response
+from .reporting import make_result
+
+LOGGER = logging.getLogger()
+
+# a source is a (name, content) pair: `content` is None when the
+# source is a plain file, which is then read by the worker process
+Source = Tuple[str, Optional[bytes]]
+
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+def is_json_file(name: str) -> bool:
+    return name.lower().endswith(('.json', '.jsonld'))
+
+def iter_directory(path: str) -> Iterator[str]:
+    """Yields (lazily) the paths of the JSON files contained in a directory tree."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_directory(entry.path)
+            elif entry.is_file() and is_json_file(entry.name):
+                yield entry.path
+
+def iter_sources(paths: Iterable[str]) -> Iterator[Source]:
+    """Yields the JSON responses contained in directories, tar/zip archives or plain files.
+    Archives are read sequentially (tar files are streamed), one member at a time.
+
+    :param paths: Paths of directories, archives or JSON files.
+    :type paths: Iterable[str]
+    :return: An iterator of `(name, content)` pairs; the name of an archive member
+        is `<archive path>!<member name>`.
+    :rtype: Iterator[Source]
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for file_path in iter_directory(path):
+                yield (file_path, None)
+        elif path.lower().endswith(TAR_SUFFIXES):
+            with tarfile.open(path, mode='r|*') as archive:
+                for member in archive:
+                    if member.isfile() and is_json_file(member.name):
+                        yield (f'{path}!{member.name}', archive.extractfile(member).read())
+        elif path.lower().endswith('.zip'):
+            with zipfile.ZipFile(path) as archive:
+                for member in archive.infolist():
+                    if not member.is_dir() and is_json_file(member.filename):
+                        yield (f'{path}!{member.filename}', archive.read(member))
+        else:
+            yield (path, None)
+
+def iter_chunks(sources: Iterable[Source], chunk_size: int) -> Iterator[List[Source]]:
+    chunk = []
+    for source in sources:
+        chunk.append(source)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def validate_source(name: str, content: Optional[bytes], endpoint: Optional[str] = None) -> Dict:
+    """Validates one JSON response (read from `name` if `content` is None)."""
+    try:
+        if content is None:
+            with open(name, 'rb') as json_file:
+                content = json_file.read()
+        json_data = loads(content)
+    except (OSError, ValueError) as e:
+        return make_result(f'{name}::{endpoint or "unknown"}', 'error', message=f'{type(e).__name__}: {e}', group=endpoint or 'unknown', source=name)
+    return check_json_response(json_data, name, endpoint)
+
+def validate_chunk(chunk: List[Source], endpoint: Optional[str] = None) -> List[Dict]:
+    """Validates a chunk of sources (this is the unit of work of the process pool)."""
+    return [validate_source(name, content, endpoint) for name, content in chunk]
+
+def init_worker(log_level: int) -> None:
+    logging.getLogger().setLevel(log_level)
+
+def validate_dumps(
+        paths: Iterable[str],
+        processes: Optional[int] = None,
+        chunk_size: int = 256,
+        endpoint: Optional[str] = None
+) -> Iterator[Dict]:
+    """Validates the DTS API responses contained in directories or archives, using a pool
+    of processes. Sources are read lazily and sent to the workers in chunks; only a bounded
+    number of chunks is pending at any time, so memory usage stays flat whatever the number
+    of files. Results are yielded as soon as their chunk is validated (so not necessarily in
+    the order of the sources).
+
+    :param paths: Paths of directories, tar/zip archives or JSON files.
+    :type paths: Iterable[str]
+    :param processes: Number of worker processes, defaults to None (number of CPUs); with 1,
+        responses are validated in the current process
+    :type processes: Optional[int], optional
+    :param chunk_size: Number of responses sent to a worker at once, defaults to 256
+    :type chunk_size: int, optional
+    :param endpoint: The endpoint of all responses, defaults to None (detected from `@type`)
+    :type endpoint: Optional[str], optional
+    :return: An iterator over the result records.
+    :rtype: Iterator[Dict]
+    """
+    chunks = iter_chunks(iter_sources(paths), chunk_size)
+    processes = processes or os.cpu_count() or 1
+
+    if processes == 1:
+        for chunk in chunks:
+            yield from validate_chunk(chunk, endpoint)
+        return
+
+    max_pending = processes * 2
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=init_worker,
+        initargs=(logging.getLogger().getEffectiveLevel(),)
+    ) as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(validate_chunk, chunk, endpoint))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in as_completed(pending):
+            yield from future.result()
@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Any, Callable, Dict, Hashable
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'coalesced', 'maxsize', 'currsize'])
+
+class _InFlight(object):
+    """A request currently being fetched, which other callers can wait for."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class ResponseCache(object):
+    """Bounded, thread-safe LRU cache that also coalesces identical in-flight requests:
+    if a key is being fetched when another caller asks for it, the second caller waits
+    for the result of the first fetch instead of fetching it again.
+    """
+
+    def __init__(self, maxsize: int = 256, cacheable: Callable[[Any], bool] = lambda value: True) -> None:
+        """
+        :param maxsize: Maximum number of entries kept in memory (0 disables memoization, but
+            not the coalescing of in-flight requests), defaults to 256
+        :type maxsize: int, optional
+        :param cacheable: Predicate telling whether a fetched value can be memoized, defaults
+            to always true
+        :type cacheable: Callable[[Any], bool], optional
+        """
+        self.maxsize = maxsize
+        self.cacheable = cacheable
+        self._entries: OrderedDict = OrderedDict()
+        self._in_flight: Dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[Hashable], Any]) -> Any:
+        """Returns the value cached for `key`, or fetches it with `fetch(key)`.
+
+        :param key: The cache key (e.g. the request URI).
+        :type key: Hashable
+        :param fetch: The function called to fetch the value on a cache miss.
+        :type fetch: Callable[[Hashable], Any]
+        :return: The cached or fetched value.
+        :rtype: Any
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key]
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                in_flight = self._in_flight[key] = _InFlight()
+                owner = True
+                self._misses += 1
+            else:
+                owner = False
+                self._coalesced += 1
+
+        if not owner:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.result
+
+        try:
+            in_flight.result = fetch(key)
+        except BaseException as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if in_flight.error is None and self.maxsize > 0 and self.cacheable(in_flight.result):
+                    self._entries[key] = in_flight.result
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+            in_flight.done.set()
+        return in_flight.result
+
+    def clear(self) -> None:
+        """Drops all memoized entries (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def expire(self) -> Dict[Hashable, Any]:
+        """Drops all memoized entries, and returns them (e.g. to revalidate them later)."""
+        with self._lock:
+            entries = dict(self._entries)
+            self._entries.clear()
+        return entries
+
+    def info(self) -> CacheInfo:
+        """Returns the hit statistics of the cache."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._coalesced, self.maxsize, len(self._entries))
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,157 @@
+import logging
+from typing import Dict, Iterator, List, Optional
+from .client import DTS_API, DTS_CitableUnit, DTS_Navigation, DTS_Resource
+
+LOGGER = logging.getLogger()
+
+class CitationTree(object):
+    """The citation tree of a resource, as reconstructed by `walk_citation_tree`."""
+
+    def __init__(self, resource: DTS_Resource) -> None:
+        self.resource = resource
+        self.units: Dict[str, DTS_CitableUnit] = {}
+        # identifiers of the children of each unit, in document order (None is the root)
+        self.children: Dict[Optional[str], List[str]] = {None: []}
+        self.depth = 0
+        self.requests = 0
+        self.truncated = False
+        # whether units of the last level were left unexpanded (see `max_depth`)
+        self.depth_limited = False
+        self.errors: List[str] = []
+
+    def add(self, unit: DTS_CitableUnit, parent: Optional[str]) -> None:
+        self.units[unit.id] = unit
+        self.children.setdefault(parent, []).append(unit.id)
+
+    def iter_units(self) -> Iterator[DTS_CitableUnit]:
+        """Yields the citable units of the tree in document order (depth-first)."""
+        stack = list(reversed(self.children[None]))
+        while stack:
+            unit_id = stack.pop()
+            yield self.units[unit_id]
+            stack.extend(reversed(self.children.get(unit_id, [])))
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    def __repr__(self) -> str:
+        return f'CitationTree(resource={self.resource.id}, units={len(self)}, depth={self.depth})'
+
+def get_max_cite_depth(resource: DTS_Resource) -> Optional[int]:
+    """Returns the `maxCiteDepth` of the default (first) citation tree of a resource, if declared."""
+    citation_trees = resource.json.get('citationTrees') or []
+    if not citation_trees:
+        return None
+    return citation_trees[0].get('maxCiteDepth')
+
+def walk_citation_tree(
+        dts_client: DTS_API,
+        resource: DTS_Resource,
+        max_depth: Optional[int] = None,
+        max_units: Optional[int] = None,
+        max_workers: Optional[int] = None
+) -> CitationTree:
+    """Reconstructs the citation tree of a resource level by level, without relying on
+    `down=-1` (which some servers do not support, or cap): the top-level units are fetched
+    with `down=1`, then the children of all the units of a level are fetched concurrently
+    (`ref=<unit>&down=1`) to build the next level.
+
+    :param dts_client: The client of the DTS API.
+    :type dts_client: DTS_API
+    :param resource: The resource whose citation tree is to be reconstructed.
+    :type resource: DTS_Resource
+    :param max_depth: Number of levels to fetch, defaults to None (all); with the `maxCiteDepth`
+        of the resource (see `get_max_cite_depth`), the units of the last level, which have no
+        children, are not requested
+    :type max_depth: Optional[int], optional
+    :param max_units: Stop once the tree contains this many units, defaults to None (no limit)
+    :type max_units: Optional[int], optional
+    :param max_workers: Number of concurrent requests, defaults to None (`max_concurrency`)
+    :type max_workers: Optional[int], optional
+    :return: The citation tree; failed requests are recorded in its `errors`.
+    :rtype: CitationTree
+    """
+    tree = CitationTree(resource)
+
+    def add_members(navigation: DTS_Navigation, parent: Optional[str], frontier: List[str]) -> None:
+        for unit in navigation.citable_units:
+            # units already in the tree include the `ref` unit itself, which
+            # servers list among the members of `ref=<unit>&down=1` responses
+            if unit.id == parent or unit.id in tree.units:
+                continue
+            if max_units is not None and len(tree.units) >= max_units:
+                tree.truncated = True
+                return
+            tree.add(unit, parent)
+            frontier.append(unit.id)
+
+    navigation, response = dts_client.navigation(resource=resource, down=1)
+    tree.requests += 1
+    if navigation is None:
+        tree.errors.append(f'down=1: HTTP {response.status_code}')
+        return tree
+    frontier: List[str] = []
+    add_members(navigation, None, frontier)
+    tree.depth = 1 if frontier else 0
+
+    def fetch_children(unit_id: str):
+        return dts_client.navigation(resource=resource, reference=tree.units[unit_id], down=1)
+
+    while frontier and not tree.truncated and (max_depth is None or tree.depth < max_depth):
+        next_frontier: List[str] = []
+        # children lists must follow the document order of their parents
+        children_by_parent: Dict[str, DTS_Navigation] = {}
+        for unit_id, result in dts_client.map(fetch_children, frontier, max_workers=max_workers):
+            tree.requests += 1
+            if isinstance(result, Exception):
+                tree.errors.append(f'ref={unit_id}&down=1: {type(result).__name__}: {result}')
+                continue
+            navigation, response = result
+            if navigation is None:
+                tree.errors.append(f'ref={unit_id}&down=1: HTTP {response.status_code}')
+                continue
+            children_by_parent[unit_id] = navigation
+        for unit_id in frontier:
+            if unit_id in children_by_parent:
+                add_members(children_by_parent[unit_id], unit_id, next_frontier)
+        if next_frontier:
+            tree.depth += 1
+        frontier = next_frontier
+    tree.depth_limited = bool(frontier) and not tree.truncated
+
+    LOGGER.info(f'Walked the citation tree of {resource.id}: {len(tree)} units, {tree.depth} levels, {tree.requests} requests')
+    return tree
+
+def compare_citation_trees(tree: CitationTree, navigation: DTS_Navigation) -> List[str]:
+    """Compares a walked citation tree with the one returned by a single `down=-1` request.
+
+    :return: The list of inconsistencies found (empty if the two trees agree).
+    :rtype: List[str]
+    """
+    problems = []
+    full_units = {unit.id: unit for unit in navigation.citable_units}
+    missing = [unit_id for unit_id in full_units if unit_id not in tree.units]
+    if tree.depth_limited:
+        # (the units deeper than `max_depth` were not walked)
+        missing = [unit_id for unit_id in missing if full_units[unit_id].level <= tree.depth]
+    if missing and not tree.truncated:
+        problems.append(f'{len(missing)} units returned with down=-1 are not reachable level by level (e.g. {missing[0]!r})')
+    extra = [unit_id for unit_id in tree.units if unit_id not in full_units]
+    if extra:
+        problems.append(f'{len(extra)} units reachable level by level are missing with down=-1 (e.g. {extra[0]!r})')
+
+    parents = {child: parent for parent, children in tree.children.items() for child in children}
+    for unit_id, unit in tree.units.items():
+        if unit_id not in full_units:
+            continue
+        full_unit = full_units[unit_id]
+        if unit.level != full_unit.level:
+            problems.append(f'{unit_id!r} is at level {unit.level} level by level, but at level {full_unit.level} with down=-1')
+        if parents[unit_id] != full_unit.parent:
+            problems.append(f'{unit_id!r} is a child of {parents[unit_id]!r} level by level, but its parent is {full_unit.parent!r} with down=-1')
+
+    order = [unit.id for unit in tree.iter_units()]
+    full_order = [unit_id for unit_id in full_units if unit_id in tree.units]
+    if not problems and order != full_order:
+        problems.append('The document order of the units differs between down=-1 and the level by level walk')
+    return problems
@@ -1,11 +1,312 @@
+import argparse
+import logging
+import os
 import sys
-import pytest
+import time
 
-def main():
-    args = sys.argv[1:]
+# NB: heavy dependencies (pytest, requests, jsonschema) are imported only
+# by the sub-command that needs them, to keep the start-up time low
+
+def add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--results-jsonl', help='Stream the result of each check to this JSONL file')
+    parser.add_argument('--results-append', action='store_true', help='Append the results to --results-jsonl instead of overwriting it')
+    parser.add_argument('--results-junit', help='Export the results to this JUnit XML file')
+    parser.add_argument('--results-html', help='Render the results as a paginated HTML report')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Only print failures and the summary')
+    parser.add_argument('--timings', action='store_true', help='Print start-up and total time')
+    parser.add_argument('--log-level', default='warning', help='Logging level (default: warning)')
+    parser.add_argument('--events', default=None, help='Record the events (requests, checks) to this JSONL file, whatever the logging level')
+    parser.add_argument(
+        '--events-sample', action='append', default=[], metavar='TYPE=RATE',
+        help='Keep only this fraction of the events of a type (e.g. request=0.01; * for all types)'
+    )
+    parser.add_argument('--events-rate-limit', type=float, default=None, help='Keep at most this many events of each type per second')
+
+def add_validation_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--validation-cache', default=None, help='Persist the outcomes of schema validations to this file, and reuse them across runs')
+    parser.add_argument('--no-validation-memo', action='store_true', help='Validate identical responses again (do not memoize validation outcomes)')
+    parser.add_argument(
+        '--json-backend', choices=['json', 'orjson'], default=None,
+        help='Library parsing the JSON responses (default: orjson if it is installed, else json)'
+    )
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='dts-validator',
+        description=(
+            'Validate implementations of the DTS API. Without a sub-command, all arguments '
+            'are passed to pytest, which runs the full test suite.'
+        )
+    )
+    subparsers = parser.add_subparsers(dest='command')
+
+    validate_file_parser = subparsers.add_parser('validate-file', help='Validate DTS API responses stored in JSON files')
+    validate_file_parser.add_argument('paths', nargs='+', help='JSON files to validate')
+    validate_file_parser.add_argument(
+        '--endpoint', choices=['entry', 'collection', 'navigation'],
+        help='The endpoint the responses come from (detected from `@type` by default)'
+    )
+    add_validation_arguments(validate_file_parser)
+    add_output_arguments(validate_file_parser)
+
+    validate_dump_parser = subparsers.add_parser(
+        'validate-dump',
+        help='Validate (in parallel) directories or tar/zip archives of DTS API responses'
+    )
+    validate_dump_parser.add_argument('paths', nargs='+', help='Directories, tar/zip archives or JSON files to validate')
+    validate_dump_parser.add_argument(
+        '--endpoint', choices=['entry', 'collection', 'navigation'],
+        help='The endpoint the responses come from (detected from `@type` by default)'
+    )
+    validate_dump_parser.add_argument('--processes', type=int, default=None, help='Number of worker processes (default: number of CPUs)')
+    validate_dump_parser.add_argument('--chunk-size', type=int, default=256, help='Number of responses sent to a worker at once')
+    add_validation_arguments(validate_dump_parser)
+    add_output_arguments(validate_dump_parser)
+
+    validate_semantic_parser = subparsers.add_parser(
+        'validate-semantic',
+        help='Validate DTS API responses as JSON-LD against the SHACL shapes (requires rdflib and pyshacl)'
+    )
+    validate_semantic_parser.add_argument('paths', nargs='+', help='Directories, tar/zip archives or JSON files to validate')
+    validate_semantic_parser.add_argument('--batch-size', type=int, default=100, help='Number of responses validated in one SHACL run')
+    validate_semantic_parser.add_argument('--offline', action='store_true', help='Do not fetch JSON-LD contexts (use those cached by an earlier run)')
+    validate_semantic_parser.add_argument('--shapes', default=None, help='SHACL shapes (Turtle) to validate against (default: shapes/dts.shapes.ttl)')
+    add_output_arguments(validate_semantic_parser)
+
+    validate_url_parser = subparsers.add_parser('validate-url', help='Validate a remote DTS API')
+    validate_url_parser.add_argument('entry_endpoint', help='URI of the DTS Entry endpoint')
+    validate_url_parser.add_argument('--max-resources', type=int, default=1, help='Number of resources to validate (0 for all)')
+    validate_url_parser.add_argument('--rate-limit', type=float, default=None, help='Maximum number of requests per second per host')
+    validate_url_parser.add_argument('--max-concurrency', type=int, default=8, help='Maximum number of concurrent requests per host')
+    validate_url_parser.add_argument('--http2', action='store_true', help='Send the requests over HTTP/2 (requires httpx[http2])')
+    validate_url_parser.add_argument('--shard', default=None, help='Only validate the resources of this slice of the corpus, as i/N (e.g. 1/4)')
+    validate_url_parser.add_argument('--journal', default=None, help='Record the progress of the sweep to this journal file')
+    validate_url_parser.add_argument('--resume', action='store_true', help='Resume the sweep recorded in --journal, skipping the resources already validated')
+    validate_url_parser.add_argument(
+        '--processes', type=int, default=None,
+        help='Validate the responses in a pool of processes (0 for the number of CPUs), overlapping with fetching'
+    )
+    validate_url_parser.add_argument('--queue-size', type=int, default=64, help='Maximum number of fetched resources waiting for validation (with --processes)')
+    validate_url_parser.add_argument(
+        '--corpus-stats', default=None,
+        help='Profile the corpus (fan-out, citation trees, citeTypes, document sizes) and write the statistics to this JSON file'
+    )
+    validate_url_parser.add_argument('--snapshot', default=None, help='Start from this snapshot of the API (if it exists), and update it at the end')
+    add_validation_arguments(validate_url_parser)
+    add_output_arguments(validate_url_parser)
+
+    merge_parser = subparsers.add_parser('merge', help='Merge the results streams (JSONL) of the shards of a sweep into one report')
+    merge_parser.add_argument('paths', nargs='+', help='The results streams of the shards')
+    add_output_arguments(merge_parser)
+
+    diff_parser = subparsers.add_parser('diff', help='Compare the responses of two DTS deployments (or of a deployment and a recording)')
+    diff_parser.add_argument('old', help='URI of the Entry endpoint of the reference deployment, or a recording')
+    diff_parser.add_argument('new', help='URI of the Entry endpoint of the compared deployment, or a recording')
+    diff_parser.add_argument('--record', default=None, help='Record the responses of the compared deployment to this file')
+    diff_parser.add_argument('--max-workers', type=int, default=8, help='Number of collections compared concurrently')
+    diff_parser.add_argument('--max-differences', type=int, default=20, help='Maximum number of differences reported per response')
+    diff_parser.add_argument('--rate-limit', type=float, default=None, help='Maximum number of requests per second per host')
+    diff_parser.add_argument('--max-concurrency', type=int, default=8, help='Maximum number of concurrent requests per host')
+    diff_parser.add_argument('--http2', action='store_true', help='Send the requests over HTTP/2 (requires httpx[http2])')
+    add_output_arguments(diff_parser)
+
+    record_parser = subparsers.add_parser('record', help='Record the responses of a DTS deployment, to compare it later with `diff`')
+    record_parser.add_argument('entry_endpoint', help='URI of the DTS Entry endpoint')
+    record_parser.add_argument('path', help='The recording to write (JSONL)')
+    record_parser.add_argument('--max-workers', type=int, default=8, help='Number of collections fetched concurrently')
+    record_parser.add_argument('--rate-limit', type=float, default=None, help='Maximum number of requests per second per host')
+    record_parser.add_argument('--max-concurrency', type=int, default=8, help='Maximum number of concurrent requests per host')
+    record_parser.add_argument('--http2', action='store_true', help='Send the requests over HTTP/2 (requires httpx[http2])')
+    add_output_arguments(record_parser)
+
+    monitor_parser = subparsers.add_parser('monitor', help='Validate remote DTS APIs on a schedule, exporting metrics')
+    monitor_parser.add_argument('entry_endpoints', nargs='+', help='URIs of the DTS Entry endpoints to monitor')
+    monitor_parser.add_argument('--interval', type=float, default=300, help='Seconds between two validation cycles (default: 300)')
+    monitor_parser.add_argument('--cycles', type=int, default=0, help='Stop after this many cycles (default: 0, run forever)')
+    monitor_parser.add_argument('--max-resources', type=int, default=1, help='Number of resources validated per API and cycle (0 for all)')
+    monitor_parser.add_argument('--rate-limit', type=float, default=None, help='Maximum number of requests per second per host')
+    monitor_parser.add_argument('--max-concurrency', type=int, default=8, help='Maximum number of concurrent requests per host')
+    monitor_parser.add_argument('--http2', action='store_true', help='Send the requests over HTTP/2 (requires httpx[http2])')
+    monitor_parser.add_argument('--metrics-file', default=None, help='Write the metrics (Prometheus text format) to this file after each cycle')
+    monitor_parser.add_argument('--metrics-port', type=int, default=None, help='Serve the metrics over HTTP on this port (at /metrics)')
+    monitor_parser.add_argument('--alert-webhook', default=None, help='POST regressions (as JSON) to this URL')
+    monitor_parser.add_argument('--results-jsonl', help='Stream the results of all cycles to this JSONL file')
+    monitor_parser.add_argument('--results-append', action='store_true', help='Append the results to --results-jsonl instead of overwriting it')
+    monitor_parser.add_argument('--log-level', default='info', help='Logging level (default: info)')
+    return parser
+
+SUBCOMMANDS = ['validate-file', 'validate-dump', 'validate-semantic', 'validate-url', 'merge', 'diff', 'record', 'monitor']
+
+def run_engine(args: argparse.Namespace, start_time: float) -> int:
+    if getattr(args, 'resume', False) and not args.journal:
+        get_parser().error('--resume requires --journal')
+    logging.basicConfig(level=args.log_level.upper(), format='%(levelname)s %(message)s')
+    from .aggregation import RepeatedRecordFilter
+    from .engine import run, validate_files, validate_url
+    from .events import EVENTS, JSONLEventSink, LoggingEventSink, parse_event_sample
+    from .memo import VALIDATION_MEMO
+    from .reporting import ResultSink, render_html_report, write_junit_xml
+
+    # the client, the consistency checks and the fuzzing log their errors through the root logger
+    logging.getLogger().addFilter(RepeatedRecordFilter())
+    EVENTS.add_sink(LoggingEventSink(level=logging.getLogger().getEffectiveLevel()))
+    if args.events_rate_limit is not None:
+        EVENTS.configure('*', rate_limit=args.events_rate_limit)
+    for value in args.events_sample:
+        try:
+            event_type, sample_rate = parse_event_sample(value)
+            EVENTS.configure(event_type, sample_rate=sample_rate, rate_limit=args.events_rate_limit)
+        except ValueError as e:
+            get_parser().error(f'--events-sample: {e}')
+    if args.events:
+        EVENTS.add_sink(JSONLEventSink(args.events))
+    if getattr(args, 'json_backend', None):
+        from .decoding import JSON_DECODER
+        try:
+            JSON_DECODER.set_backend(args.json_backend)
+        except ImportError as e:
+            get_parser().error(str(e))
+    if getattr(args, 'no_validation_memo', False):
+        VALIDATION_MEMO.maxsize = 0
+    elif getattr(args, 'validation_cache', None):
+        VALIDATION_MEMO.open(args.validation_cache)
+
+    results_path = args.results_jsonl
+    if results_path is None and (args.results_html or args.results_junit):
+        results_path = (args.results_html or args.results_junit).rsplit('.', 1)[0] + '.jsonl'
+    sink = ResultSink(results_path, append=args.results_append) if results_path else None
+    recorder = journal = pipeline_stats = corpus_stats = None
+    sources = []
+
+    if args.command == 'validate-file':
+        results = validate_files(args.paths, endpoint=args.endpoint)
+    elif args.command == 'validate-dump':
+        from .bulk import validate_dumps
+        results = validate_dumps(args.paths, processes=args.processes, chunk_size=args.chunk_size, endpoint=args.endpoint)
+    elif args.command == 'validate-semantic':
+        from .semantic import validate_semantic
+        results = validate_semantic(args.paths, batch_size=args.batch_size, offline=args.offline, shapes_path=args.shapes)
+    elif args.command == 'merge':
+        from .sharding import merge_results
+        results = merge_results(args.paths)
+    elif args.command == 'diff':
+        from .diff import Recorder, diff_deployments, make_source
+        client_options = dict(rate_limit=args.rate_limit, max_concurrency=args.max_concurrency, http2=args.http2)
+        old, new = make_source(args.old, **client_options), make_source(args.new, **client_options)
+        sources = [old, new]
+        recorder = Recorder(args.record, new.name) if args.record else None
+        results = diff_deployments(old, new, recorder=recorder, max_workers=args.max_workers, max_differences=args.max_differences)
+    elif args.command == 'record':
+        from .diff import record_deployment
+        results = record_deployment(
+            args.entry_endpoint, args.path, max_workers=args.max_workers,
+            rate_limit=args.rate_limit, max_concurrency=args.max_concurrency, http2=args.http2
+        )
+    else:
+        from .sharding import parse_shard
+        try:
+            shard = parse_shard(args.shard) if args.shard else None
+        except ValueError as e:
+            get_parser().error(str(e))
+        if args.journal:
+            from .journal import Journal
+            journal = Journal(args.journal, {'sweep': 'validate-url', 'entry_endpoint_uri': args.entry_endpoint, 'shard': args.shard}, resume=args.resume)
+        if args.processes is not None:
+            from .pipeline import PipelineStats
+            pipeline_stats = PipelineStats(args.max_concurrency, args.processes or os.cpu_count() or 1, args.queue_size)
+        if args.corpus_stats:
+            from .corpus_stats import CorpusStatistics
+            corpus_stats = CorpusStatistics()
+        results = validate_url(
+            args.entry_endpoint,
+            max_resources=args.max_resources or None,
+            snapshot_path=args.snapshot,
+            shard=shard,
+            journal=journal,
+            processes=args.processes,
+            queue_size=args.queue_size,
+            pipeline_stats=pipeline_stats,
+            corpus_stats=corpus_stats,
+            rate_limit=args.rate_limit,
+            max_concurrency=args.max_concurrency,
+            http2=args.http2
+        )
+        if shard is not None:
+            # the shard of each result tells `merge` whether the results of all shards were merged
+            results = (dict(result, shard=str(shard)) for result in results)
+    if args.timings:
+        print(f'Start-up time: {time.perf_counter() - start_time:.3f}s', file=sys.stderr)
+    try:
+        summary = run(results, sink=sink, quiet=args.quiet)
+    finally:
+        if sink is not None:
+            sink.close()
+        if recorder is not None:
+            recorder.close()
+        for source in sources:
+            source.close()
+        if journal is not None:
+            journal.close()
+        VALIDATION_MEMO.close()
+        EVENTS.close()
+    if corpus_stats is not None:
+        corpus_stats.write_json(args.corpus_stats)
+    if args.results_junit:
+        write_junit_xml(results_path, args.results_junit)
+    if args.results_html:
+        extra_sections = VALIDATION_MEMO.html_sections()
+        if corpus_stats is not None:
+            extra_sections['Corpus statistics'] = corpus_stats.to_html()
+        render_html_report(results_path, args.results_html, extra_sections=extra_sections)
+    if args.timings:
+        if pipeline_stats is not None:
+            print(f'Pipeline: {pipeline_stats}', file=sys.stderr)
+        print(f'Total time: {time.perf_counter() - start_time:.3f}s', file=sys.stderr)
+    return 1 if summary.failures else 0
+
+def run_monitor(args: argparse.Namespace) -> int:
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s %(message)s')
+    from .aggregation import RepeatedRecordFilter
+    from .events import EVENTS, LoggingEventSink
+    from .monitor import Monitor, serve_metrics
+    from .reporting import ResultSink
+
+    logging.getLogger().addFilter(RepeatedRecordFilter())
+    EVENTS.add_sink(LoggingEventSink(level=logging.getLogger().getEffectiveLevel()))
+    sink = ResultSink(args.results_jsonl, append=args.results_append) if args.results_jsonl else None
+    monitor = Monitor(
+        args.entry_endpoints,
+        interval=args.interval,
+        max_resources=args.max_resources or None,
+        metrics_path=args.metrics_file,
+        alert_webhook=args.alert_webhook,
+        sink=sink,
+        rate_limit=args.rate_limit,
+        max_concurrency=args.max_concurrency,
+        http2=args.http2
+    )
+    if args.metrics_port:
+        serve_metrics(monitor, args.metrics_port)
+    try:
+        monitor.run(cycles=args.cycles or None)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if sink is not None:
+            sink.close()
+        EVENTS.close()
+    return 0
+
+def main(args=None):
+    start_time = time.perf_counter()
+    args = sys.argv[1:] if args is None else args
+    if args and args[0] == 'monitor':
+        sys.exit(run_monitor(get_parser().parse_args(args)))
+    if args and args[0] in SUBCOMMANDS:
+        sys.exit(run_engine(get_parser().parse_args(args), start_time))
+
+    import pytest
     sys.exit(pytest.main(args))
 
 if __name__ == "__main__":
-    args = sys.argv[1:]
-    sys.exit(pytest.main(args))
-    
\ No newline at end of file
+    main()
@@ -1,15 +1,35 @@
 from __future__ import annotations
+import gzip
+import json
 import logging
+import os
 import requests
 import random
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit
 from requests.models import Response
-from typing import Optional, Union, List, Tuple, Dict
+from typing import Optional, Union, List, Tuple, Dict, Iterable, Iterator, Callable, Any
 from uritemplate import URITemplate
 from .validation import check_required_property
+from .throttling import BACKOFF_STATUS_CODES, HostThrottle, get_host_throttle, parse_retry_after
+from .cache import CacheInfo, ResponseCache
+from .profiling import PROFILER
+from .decoding import decode_response
+from .events import EVENTS
+from .transport import TransferInfo, TransferStats, make_session
+from .sharding import Shard, in_shard
 
 
 LOGGER = logging.getLogger()
 
+SNAPSHOT_VERSION = 1
+# maximum number of discovered resources kept in (and loaded from) a snapshot
+SNAPSHOT_MAX_RESOURCES = 100
+
 class DTS_Collection(object):
     """Class representing a DTS Collection object."""
     
@@ -31,10 +51,7 @@ class DTS_Collection(object):
         children = []
         if 'member' in self._json: 
             for member in self._json['member']:
-                if member['@type'] == "Resource":
-                    children.append(DTS_Resource(member))
-                else:
-                    children.append(DTS_Collection(member))
+                children.append(make_collection(member))
         return children
 
     def __repr__(self) -> str:
@@ -91,25 +108,338 @@ class DTS_Navigation(object):
     def __repr__(self) -> str:
         return f'DTS_navigation(id={self.id})'
 
+class CrawlState(object):
+    """Where a walk of the tree of collections (see `DTS_API.iter_resources`) stands: the
+    identifiers still to be visited (`frontier`), those already discovered (`visited`) and the
+    resources to skip (`done`). Subclasses can record each step of the walk (see `expanded`),
+    so that an interrupted walk can be resumed."""
+
+    def __init__(self, frontier: Iterable[str] = (), visited: Iterable[str] = (), done: Iterable[str] = ()) -> None:
+        self.frontier = deque(frontier)
+        self.visited = set(visited)
+        self.done = set(done)
+
+    @property
+    def started(self) -> bool:
+        return bool(self.visited)
+
+    def expanded(self, collection_id: Optional[str], children: List[str]) -> None:
+        """Called when the children of a collection (None for the root) are added to the frontier."""
+
 # TODO: find a cleaner way of triggering the header validation
 class DTS_API(object):
-    def __init__(self, entry_endpoint_uri) -> None:
-        req  = requests.get(entry_endpoint_uri)
+    def __init__(
+            self,
+            entry_endpoint_uri: str,
+            rate_limit: Optional[float] = None,
+            burst: Optional[float] = None,
+            max_concurrency: int = 8,
+            max_retries: int = 3,
+            timeout: float = 60,
+            cache_size: int = 256,
+            snapshot: Optional[Dict] = None,
+            http2: bool = False
+    ) -> None:
+        """Client for a remote DTS API.
+
+        Requests are throttled per host: `rate_limit` caps the number of requests per second
+        (token bucket), while the number of concurrent requests adapts to the server's
+        latency and backoff signals (429/503, `Retry-After`), up to `max_concurrency`.
+
+        Identical GET requests are sent only once: requests for a URI that is already being
+        fetched wait for that response, and completed responses are memoized for the lifetime
+        of the client in a bounded LRU cache (see `cache_info`).
+
+        All the content codings the client can decode are negotiated (gzip, deflate, and Brotli
+        and Zstandard if their libraries are installed), and the sizes of the responses before and
+        after decompression are recorded (see `transfer_info`).
+
+        :param entry_endpoint_uri: The URI of the DTS Entry endpoint.
+        :type entry_endpoint_uri: str
+        :param rate_limit: Maximum number of requests per second per host, defaults to None (no limit)
+        :type rate_limit: Optional[float], optional
+        :param burst: Maximum number of requests sent in a burst, defaults to None (same as `rate_limit`)
+        :type burst: Optional[float], optional
+        :param max_concurrency: Maximum number of concurrent requests per host, defaults to 8
+        :type max_concurrency: int, optional
+        :param max_retries: How many times a request is retried after a backoff signal, defaults to 3
+        :type max_retries: int, optional
+        :param timeout: Timeout (in seconds) of each request, defaults to 60
+        :type timeout: float, optional
+        :param cache_size: Maximum number of responses memoized in memory, defaults to 256
+        :type cache_size: int, optional
+        :param snapshot: A snapshot of the API to start from, instead of fetching the Entry
+            endpoint, defaults to None (see `from_snapshot`)
+        :type snapshot: Optional[Dict], optional
+        :param http2: Send the requests over HTTP/2 with `httpx` (multiplexing the concurrent requests
+            to a host over one connection), defaults to False
+        :type http2: bool, optional
+        """
+        self.entry_endpoint_uri = entry_endpoint_uri
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._session = make_session(http2)
+        self.transfer_stats = TransferStats()
+        self._throttles: Dict[str, HostThrottle] = {}
+        self._throttles_lock = threading.Lock()
+        self._cache = ResponseCache(maxsize=cache_size, cacheable=is_cacheable_response)
+        self._capabilities: Dict[str, Any] = {}
+        self._initial_concurrency: Dict[str, int] = {}
+        self._discovered_resources: Dict[str, Dict] = {}
+        # guards the discovered resources and the Entry endpoint state, which the freshness
+        # check of a client created from a snapshot replaces from a background thread
+        self._state_lock = threading.Lock()
+        self._revalidation: Dict[str, Response] = {}
+        self.revalidated = 0
+        self._freshness_check: Optional[threading.Thread] = None
+        self._snapshot_fresh: Optional[bool] = None
+        self._listeners: List[Callable[[str, Response, Optional[Dict]], None]] = []
+        self._observed_lock = threading.Lock()
+
+        if snapshot is None:
+            self._load_entry(self._fetch_entry())
+        else:
+            self._load_snapshot(snapshot)
+
+        # TODO pagination can be supported in collection or navigation endpoints => check that
+
+    def _fetch_entry(self) -> Dict:
+        req  = self._get(self.entry_endpoint_uri)
         assert 'application/ld+json' in req.headers['Content-Type'] # TODO: wrap around a try/except statement
-        self._entry_endpoint_json = req.json()
+        self._capabilities.update(get_server_capabilities(req))
+        with PROFILER.phase('json_decode'):
+            return decode_response(req)
 
+    def _load_entry(self, entry_endpoint_json: Dict) -> None:
         # before using the URI templates, let's make sure that they are 
         # declared by the Entry endpoint as expected
-        check_required_property(self._entry_endpoint_json, 'collection')
-        check_required_property(self._entry_endpoint_json, 'document')
-        check_required_property(self._entry_endpoint_json, 'navigation')
+        check_required_property(entry_endpoint_json, 'collection')
+        check_required_property(entry_endpoint_json, 'document')
+        check_required_property(entry_endpoint_json, 'navigation')
 
-        # initialise URI templates
-        self._collection_endpoint_template = URITemplate(self._entry_endpoint_json['collection'])
-        self._document_endpoint_template = URITemplate(self._entry_endpoint_json['document'])
-        self._navigation_endpoint_template = URITemplate(self._entry_endpoint_json['navigation'])
+        # initialise URI templates (new objects, swapped in together: requests being sent
+        # concurrently use either the previous templates or the new ones)
+        collection_endpoint_template = get_uri_template(entry_endpoint_json['collection'])
+        document_endpoint_template = get_uri_template(entry_endpoint_json['document'])
+        navigation_endpoint_template = get_uri_template(entry_endpoint_json['navigation'])
+        with self._state_lock:
+            self._entry_endpoint_json = entry_endpoint_json
+            self._collection_endpoint_template = collection_endpoint_template
+            self._document_endpoint_template = document_endpoint_template
+            self._navigation_endpoint_template = navigation_endpoint_template
 
-        # TODO pagination can be supported in collection or navigation endpoints => check that
+    def snapshot(self) -> Dict:
+        """Returns a (JSON-serializable) snapshot of what the client knows about the API:
+        the Entry endpoint response (with the URI templates), the root of the Collection endpoint,
+        (up to `SNAPSHOT_MAX_RESOURCES`) discovered resources and the capabilities of the
+        server (e.g. the concurrency limit reached for each host).
+
+        :return: The snapshot, to be dumped with `dump_snapshot` or passed to `from_snapshot`.
+        :rtype: Dict
+        """
+        with self._throttles_lock:
+            concurrency_limits = {host: throttle.controller.limit for host, throttle in self._throttles.items()}
+        with self._state_lock:
+            entry_endpoint_json = self._entry_endpoint_json
+            resources = dict(list(self._discovered_resources.items())[:SNAPSHOT_MAX_RESOURCES])
+        return {
+            'version': SNAPSHOT_VERSION,
+            'created': time.time(),
+            'entry_endpoint_uri': self.entry_endpoint_uri,
+            'entry': entry_endpoint_json,
+            'collection_root': getattr(self, '_collection_endpoint_json', None),
+            'resources': resources,
+            'capabilities': dict(self._capabilities, concurrency_limits=concurrency_limits),
+        }
+
+    def dump_snapshot(self, path: str) -> None:
+        """Writes the snapshot of the client to `path` (JSON, gzipped if `path` ends with `.gz`).
+        The file is replaced atomically, so that concurrent readers never see a partial snapshot."""
+        tmp_path = f'{path}.tmp{os.getpid()}'
+        with (gzip.open if path.endswith('.gz') else open)(tmp_path, 'wt', encoding='utf-8') as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Union[str, Dict], check_freshness: bool = True, **kwargs) -> DTS_API:
+        """Creates a client from a snapshot (see `snapshot`) without waiting for the Entry endpoint.
+
+        :param snapshot: The snapshot, or the path of a file written by `dump_snapshot`.
+        :type snapshot: Union[str, Dict]
+        :param check_freshness: Fetch the Entry endpoint in a background thread, and reload it
+            if it changed since the snapshot was taken (see `wait_for_freshness_check`), defaults to True
+        :type check_freshness: bool, optional
+        :return: The client; `kwargs` are passed to the constructor.
+        :rtype: DTS_API
+        """
+        if isinstance(snapshot, str):
+            with (gzip.open if snapshot.endswith('.gz') else open)(snapshot, 'rt', encoding='utf-8') as snapshot_file:
+                snapshot = json.load(snapshot_file)
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f'Unsupported snapshot version: {snapshot.get("version")}')
+        client = cls(snapshot['entry_endpoint_uri'], snapshot=snapshot, **kwargs)
+        if check_freshness:
+            client._freshness_check = threading.Thread(target=client._check_freshness, name='dts-freshness-check', daemon=True)
+            client._freshness_check.start()
+        return client
+
+    def _load_snapshot(self, snapshot: Dict) -> None:
+        self._load_entry(snapshot['entry'])
+        if snapshot.get('collection_root') is not None:
+            self._collection_endpoint_json = snapshot['collection_root']
+        with self._state_lock:
+            self._discovered_resources.update(snapshot.get('resources') or {})
+        capabilities = dict(snapshot.get('capabilities') or {})
+        # start from the concurrency reached in the previous run, rather than from scratch
+        self._initial_concurrency.update(capabilities.pop('concurrency_limits', {}))
+        self._capabilities.update(capabilities)
+
+    def _check_freshness(self) -> None:
+        snapshot_entry = self._entry_endpoint_json
+        try:
+            entry_endpoint_json = self._fetch_entry()
+        except Exception as e:
+            LOGGER.warning(f'Could not check the freshness of the snapshot of {self.entry_endpoint_uri}: {e}')
+            return
+        self._snapshot_fresh = entry_endpoint_json == snapshot_entry
+        if not self._snapshot_fresh:
+            LOGGER.warning(f'The Entry endpoint {self.entry_endpoint_uri} changed since the snapshot was taken; reloading it')
+            with self._state_lock:
+                self._discovered_resources = {}
+            self._load_entry(entry_endpoint_json)
+
+    def wait_for_freshness_check(self, timeout: Optional[float] = None) -> Optional[bool]:
+        """Waits for the background freshness check of a client created with `from_snapshot`.
+
+        :return: True if the snapshot was up to date, False if the Entry endpoint changed (and was
+            reloaded), None if there was no check, or if it did not complete (e.g. network error).
+        :rtype: Optional[bool]
+        """
+        if self._freshness_check is not None:
+            self._freshness_check.join(timeout)
+        return self._snapshot_fresh
+
+    def throttle(self, uri: str) -> HostThrottle:
+        """Returns the throttle (rate limiter + concurrency controller) for the host of `uri`."""
+        return get_host_throttle(
+            self._throttles,
+            self._throttles_lock,
+            urlsplit(uri).netloc,
+            rate=self.rate_limit,
+            burst=self.burst,
+            max_concurrency=self.max_concurrency,
+            initial_concurrency=self._initial_concurrency.get(urlsplit(uri).netloc, 2)
+        )
+
+    def cache_info(self) -> CacheInfo:
+        """Returns the statistics (hits, misses, coalesced requests) of the response cache."""
+        return self._cache.info()
+
+    def transfer_info(self) -> TransferInfo:
+        """Returns the number of bytes received, on the wire and once decompressed, and the number
+        of responses per content coding and HTTP version."""
+        return self.transfer_stats.info()
+
+    def expire_cache(self) -> None:
+        """Expires the memoized responses (e.g. between two validation runs against the same API).
+        Responses with an `ETag` or `Last-Modified` header are kept aside: the next request for
+        their URI is conditional, and a `304 Not Modified` answer reuses the kept response."""
+        self._revalidation = {
+            uri: response for uri, response in self._cache.expire().items()
+            if 'ETag' in response.headers or 'Last-Modified' in response.headers
+        }
+
+    def refresh(self) -> None:
+        """Prepares the client for a new validation run: the memoized responses are expired
+        (see `expire_cache`) and the Entry endpoint is fetched again. Connections, throttles and
+        their concurrency limits are kept."""
+        self.expire_cache()
+        self._load_entry(self._fetch_entry())
+
+    def add_listener(self, listener: Callable[[str, Response, Optional[Dict]], None]) -> None:
+        """Registers a function called with each new response of the Collection, Navigation and
+        Document endpoints, as `listener(endpoint, response, json_data)` (`json_data` is the
+        decoded response, or None if it was not decoded), e.g. `CorpusStatistics.observe`.
+        Responses served again from the response cache are not passed again.
+
+        :param listener: The function to call.
+        :type listener: Callable[[str, Response, Optional[Dict]], None]
+        """
+        self._listeners.append(listener)
+
+    def _observe(self, endpoint: str, response: Response, json_data: Optional[Dict] = None) -> None:
+        if not self._listeners:
+            return
+        with self._observed_lock:
+            if getattr(response, 'observed', False):
+                return
+            response.observed = True
+        for listener in self._listeners:
+            listener(endpoint, response, json_data)
+
+    def _get(self, uri: str) -> Response:
+        """Returns the response to a GET request to `uri`, either from the response cache
+        or by fetching it (see `_fetch`).
+
+        :param uri: The URI to request.
+        :type uri: str
+        :return: The response of the server.
+        :rtype: Response
+        """
+        return self._cache.get_or_fetch(uri, self._fetch)
+
+    def _fetch(self, uri: str) -> Response:
+        """Sends a GET request to `uri`, respecting the rate and concurrency limits of its host.
+        Requests answered with 429/503, or failing with a connection error or timeout, are
+        retried (up to `max_retries` times) after the delay requested by the server.
+
+        :param uri: The URI to request.
+        :type uri: str
+        :return: The response of the server (the last one, if all retries failed).
+        :rtype: Response
+        """
+        throttle = self.throttle(uri)
+        stale_response = self._revalidation.pop(uri, None)
+        headers = get_conditional_headers(stale_response) if stale_response is not None else None
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            error = None
+            with throttle:
+                start_time = time.perf_counter()
+                try:
+                    with PROFILER.phase('network'):
+                        response = self._session.get(uri, timeout=self.timeout, headers=headers)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    error = e
+                latency = time.perf_counter() - start_time
+
+            if error is not None:
+                throttle.controller.record_backoff(f'{type(error).__name__} for {uri}')
+                if last_attempt:
+                    raise error
+                delay = 2 ** attempt
+                LOGGER.warning(f'Request to {uri} failed ({error}); retrying in {delay}s')
+                time.sleep(delay)
+                continue
+
+            if response.status_code in BACKOFF_STATUS_CODES:
+                throttle.controller.record_backoff(f'HTTP {response.status_code} for {uri}')
+                if last_attempt:
+                    return response
+                delay = parse_retry_after(response.headers.get('Retry-After'), default=2 ** attempt)
+                LOGGER.warning(f'HTTP {response.status_code} for {uri}; retrying in {delay}s')
+                throttle.bucket.pause(delay)
+                continue
+
+            throttle.controller.record_success(latency)
+            self.transfer_stats.record(response)
+            if response.status_code == 304 and stale_response is not None:
+                self.revalidated += 1
+                return stale_response
+            return response
 
     def collections(
             self, id: Optional[str] = None,
@@ -123,10 +453,14 @@ class DTS_API(object):
             else:
                 collection_req_uri = self._collection_endpoint_template.expand() # leave the default value of `nav` implicit
             
-            LOGGER.info(f'URI of request to Collection endpoint: {collection_req_uri}')
-            collection_req = requests.get(collection_req_uri)
+            if EVENTS.enabled_for(logging.INFO):
+                EVENTS.emit('request', message='URI of request to {endpoint} endpoint: {uri}', endpoint='Collection', uri=collection_req_uri)
+            collection_req = self._get(collection_req_uri)
             collection_req.raise_for_status()
-            self._collection_endpoint_json = collection_req.json()
+            with PROFILER.phase('json_decode'):
+                self._collection_endpoint_json = decode_response(collection_req)
+            if navigation != 'parents':
+                self._observe('collection', collection_req, self._collection_endpoint_json)
             try:
                 assert 'application/ld+json' in collection_req.headers['Content-Type']
             except AssertionError:
@@ -141,7 +475,7 @@ class DTS_API(object):
                         for member in self._collection_endpoint_json['member']
                     ]
                 else:
-                    collections = [DTS_Collection(member) for member in self._collection_endpoint_json['member']]
+                    collections = [make_collection(member) for member in self._collection_endpoint_json['member']]
                 return collections
             else:
                 return []
@@ -151,12 +485,94 @@ class DTS_API(object):
                 collection_req_uri = self._collection_endpoint_template.expand({'id': id, 'nav': navigation})
             else:
                 collection_req_uri = self._collection_endpoint_template.expand({'id': id})
-            LOGGER.info(f'URI of request to Collection endpoint: {collection_req_uri}')
-            collection_req = requests.get(collection_req_uri)
+            if EVENTS.enabled_for(logging.INFO):
+                EVENTS.emit('request', message='URI of request to {endpoint} endpoint: {uri}', endpoint='Collection', uri=collection_req_uri)
+            collection_req = self._get(collection_req_uri)
             collection_req.raise_for_status()
-            return DTS_Collection(collection_req.json())
+            with PROFILER.phase('json_decode'):
+                collection_json = decode_response(collection_req)
+            if navigation != 'parents':
+                self._observe('collection', collection_req, collection_json)
+            collection = make_collection(collection_json)
+            if isinstance(collection, DTS_Resource):
+                with self._state_lock:
+                    if len(self._discovered_resources) < SNAPSHOT_MAX_RESOURCES:
+                        self._discovered_resources[collection.id] = collection_json
+            return collection
+
+    def iter_resources(
+            self,
+            root_id: Optional[str] = None,
+            shard: Optional[Shard] = None,
+            state: Optional[CrawlState] = None
+    ) -> Iterator[DTS_Resource]:
+        """Walks the tree of collections (breadth-first) and yields its resources one at a time,
+        with the full metadata returned by the Collection endpoint for each of them.
+
+        Resources are yielded as they are discovered, and no response is kept once its members
+        have been queued: only identifiers are held in memory, those of the collections still to
+        be visited (`frontier`), and those of every collection and resource discovered so far
+        (`visited`, so that resources reachable through several parent collections are yielded
+        only once), plus the resources of a resumed walk already checked (`done`). Memory thus
+        grows with the number of identifiers in the corpus (O(corpus)), not with its responses.
+
+        With a `shard`, only the resources of that slice of the corpus are yielded (and fetched:
+        the `@type` of the members of a collection tells which of them are resources).
+
+        The walk can be resumed from a `state` saved by a previous (interrupted) walk: only the
+        collections left in its frontier are visited, and the resources in its `done` are skipped.
+
+        :param root_id: The ID of the collection to start from, defaults to None (the root collection)
+        :type root_id: Optional[str], optional
+        :param shard: The slice of the corpus to yield, defaults to None (all resources)
+        :type shard: Optional[Shard], optional
+        :param state: Where the walk stands (updated as it goes), defaults to None (a new walk)
+        :type state: Optional[CrawlState], optional
+        :return: An iterator over the resources of the collection.
+        :rtype: Iterator[DTS_Resource]
+        """
+        state = state if state is not None else CrawlState()
+
+        def wanted(collection: DTS_Collection) -> bool:
+            if isinstance(collection, DTS_Resource):
+                return in_shard(collection.id, shard) and collection.id not in state.done
+            return True
+
+        def expand(collection_id: Optional[str], children: List[DTS_Collection]) -> None:
+            added = [child.id for child in children if child.id not in state.visited and wanted(child)]
+            state.visited.update(added)
+            state.frontier.extend(added)
+            state.expanded(collection_id, added)
+
+        if not state.started:
+            if root_id is None:
+                expand(None, self.collections())
+            else:
+                expand(None, [DTS_Collection({'@id': root_id})])
+
+        while state.frontier:
+            collection = self.collections(id=state.frontier.popleft())
+            if isinstance(collection, DTS_Resource):
+                if wanted(collection):
+                    yield collection
+                continue
+            expand(collection.id, collection.children)
     
     def get_one_resource(self):
+        # a resource known from a snapshot spares us the walk down the collection tree
+        with self._state_lock:
+            resource_ids = list(self._discovered_resources)
+        for resource_id in resource_ids:
+            try:
+                resource = self.collections(id=resource_id)
+            except requests.exceptions.HTTPError as e:
+                # removed since the snapshot was taken
+                LOGGER.warning(f'Resource {resource_id} of the snapshot is not available anymore: {e}')
+                with self._state_lock:
+                    self._discovered_resources.pop(resource_id, None)
+                continue
+            if isinstance(resource, DTS_Resource):
+                return resource
         collections = self.collections()
         random.shuffle(collections)
         for collection in collections:
@@ -189,6 +605,29 @@ class DTS_API(object):
         :return: _description_
         :rtype: Tuple[DTS_Navigation, Response]
         """
+        navigation_endpoint_uri = self.navigation_uri(resource, down=down, reference=reference, start=start, end=end)
+        if EVENTS.enabled_for(logging.INFO):
+            EVENTS.emit('request', message='URI of request to {endpoint} endpoint: {uri}', endpoint='Navigation', uri=navigation_endpoint_uri)
+        response = self._get(navigation_endpoint_uri)
+        if response.status_code == 200:
+            with PROFILER.phase('json_decode'):
+                navigation_json = decode_response(response)
+            self._observe('navigation', response, navigation_json)
+            with PROFILER.phase('navigation'):
+                navigation = DTS_Navigation(navigation_json)
+            return (navigation, response)
+        else:
+            return (None, response)
+
+    def navigation_uri(
+            self,
+            resource: DTS_Resource,
+            down: int = None,
+            reference: DTS_CitableUnit = None,
+            start: DTS_CitableUnit = None,
+            end: DTS_CitableUnit = None
+    ) -> str:
+        """Returns the URI of a request to the Navigation endpoint (see `navigation`)."""
         parameters = {
             "resource": resource.id,
             "down": down,
@@ -196,14 +635,7 @@ class DTS_API(object):
             "start": start.id if start else None,
             "end": end.id if end else None
         }
-        navigation_endpoint_template = URITemplate(resource._json['navigation'])
-        navigation_endpoint_uri = navigation_endpoint_template.expand(parameters)
-        LOGGER.info(f'URI of request to Navigation endpoint: {navigation_endpoint_uri}')
-        response = requests.get(navigation_endpoint_uri)
-        if response.status_code == 200:
-            return (DTS_Navigation(response.json()), response)
-        else:
-            return (None, response)
+        return get_uri_template(resource._json['navigation']).expand(parameters)
 
     def document(
             self,
@@ -233,18 +665,179 @@ class DTS_API(object):
             "end": end.id if end else None
         }
         if 'document' in resource.json:
-            document_endpoint_template = URITemplate(resource.json['document'])
+            document_endpoint_template = get_uri_template(resource.json['document'])
         else:
             raise ValueError("Missing document URI-Template")
 
         document_endpoint_uri = document_endpoint_template.expand(parameters)
-        LOGGER.info(f'URI of request to Document endpoint: {document_endpoint_uri}')
-        response = requests.get(document_endpoint_uri)
+        if EVENTS.enabled_for(logging.INFO):
+            EVENTS.emit('request', message='URI of request to {endpoint} endpoint: {uri}', endpoint='Document', uri=document_endpoint_uri)
+        response = self._get(document_endpoint_uri)
         if response.status_code == 200:
+            self._observe('document', response)
             return (response.content.decode(), response)
         else:
             return (None, response)
 
+    def map(self, function: Callable[[Any], Any], items: Iterable[Any], max_workers: Optional[int] = None) -> Iterator[Tuple[Any, Any]]:
+        """Applies `function` to `items` concurrently, yielding `(item, result)` pairs as soon
+        as they complete (i.e. not necessarily in the order of `items`).
+
+        Items are consumed lazily, and only a bounded number of them is in flight at any time.
+        The actual number of concurrent requests is further limited by the throttle of each host.
+        If `function` raises an exception, it is yielded in place of the result. With
+        `max_workers=1`, items are processed one after the other in the calling thread (no pool
+        is created), which is how maps nested in the workers of another map are kept sequential.
+
+        :param function: The function to apply (typically issuing requests via this client).
+        :type function: Callable[[Any], Any]
+        :param items: The items to process.
+        :type items: Iterable[Any]
+        :param max_workers: Number of worker threads, defaults to None (`max_concurrency`)
+        :type max_workers: Optional[int], optional
+        :return: An iterator of `(item, result)` pairs.
+        :rtype: Iterator[Tuple[Any, Any]]
+        """
+        max_workers = max_workers or self.max_concurrency
+        if max_workers == 1:
+            for item in items:
+                try:
+                    result = function(item)
+                except Exception as e:
+                    result = e
+                yield (item, result)
+            return
+        items = iter(items)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < max_workers * 2:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[executor.submit(function, item)] = item
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    error = future.exception()
+                    yield (item, error if error is not None else future.result())
+
+    def documents(
+            self,
+            navigation: DTS_Navigation,
+            sample: Optional[int] = None,
+            range_size: Optional[int] = None,
+            seed: Optional[int] = None,
+            max_workers: Optional[int] = None
+    ) -> Iterator[Tuple[Tuple[DTS_CitableUnit, Optional[DTS_CitableUnit]], Optional[str], Response]]:
+        """Fetches concurrently the Document fragments of the citable units listed in a
+        Navigation response, yielding them as soon as they are received.
+
+        By default one request per citable unit is sent (`ref=<unit>`). When `range_size`
+        is given, contiguous citable units of the same level are grouped into ranges of
+        (at most) `range_size` units, fetched with one `start`/`end` request each.
+
+        :param navigation: The Navigation object whose citable units are to be fetched.
+        :type navigation: DTS_Navigation
+        :param sample: Fetch only a random sample of `sample` units (or ranges), defaults to None (all)
+        :type sample: Optional[int], optional
+        :param range_size: Number of contiguous units fetched per request, defaults to None (one per unit)
+        :type range_size: Optional[int], optional
+        :param seed: Seed of the random sampling, defaults to None
+        :type seed: Optional[int], optional
+        :param max_workers: Number of concurrent requests, defaults to None (`max_concurrency`)
+        :type max_workers: Optional[int], optional
+        :return: An iterator of `((start_or_ref, end), document_text, response)` tuples; `end` is
+            None for `ref` requests. If a request fails, the exception takes the place of the response.
+        :rtype: Iterator[Tuple[Tuple[DTS_CitableUnit, Optional[DTS_CitableUnit]], Optional[str], Response]]
+        """
+        if range_size and range_size > 1:
+            requests_to_send = group_citable_units(navigation.citable_units, range_size)
+        else:
+            requests_to_send = [(unit, None) for unit in navigation.citable_units]
+
+        if sample is not None and sample < len(requests_to_send):
+            # keep the document order of the sampled units
+            indices = sorted(random.Random(seed).sample(range(len(requests_to_send)), sample))
+            requests_to_send = [requests_to_send[i] for i in indices]
+
+        def fetch(unit_range):
+            start, end = unit_range
+            if end is None:
+                return self.document(resource=navigation.resource, reference=start)
+            return self.document(resource=navigation.resource, start=start, end=end)
+
+        for unit_range, result in self.map(fetch, requests_to_send, max_workers=max_workers):
+            if isinstance(result, Exception):
+                yield (unit_range, None, result)
+            else:
+                document_text, response = result
+                yield (unit_range, document_text, response)
+
+def group_citable_units(
+        citable_units: List[DTS_CitableUnit],
+        range_size: int
+) -> List[Tuple[DTS_CitableUnit, Optional[DTS_CitableUnit]]]:
+    """Groups contiguous citable units of the same level into `(start, end)` ranges of
+    at most `range_size` units. Ranges made of a single unit are returned as `(unit, None)`.
+
+    :param citable_units: The citable units, in document order.
+    :type citable_units: List[DTS_CitableUnit]
+    :param range_size: The maximum number of units per range.
+    :type range_size: int
+    :return: The list of ranges.
+    :rtype: List[Tuple[DTS_CitableUnit, Optional[DTS_CitableUnit]]]
+    """
+    ranges = []
+    current = []
+    for unit in citable_units:
+        if current and (unit.level != current[0].level or len(current) == range_size):
+            ranges.append((current[0], current[-1] if len(current) > 1 else None))
+            current = []
+        current.append(unit)
+    if current:
+        ranges.append((current[0], current[-1] if len(current) > 1 else None))
+    return ranges
+
+def make_collection(raw_json: Dict) -> DTS_Collection:
+    """Instantiates a `DTS_Resource` or a `DTS_Collection`, depending on the `@type` of `raw_json`."""
+    if raw_json.get('@type') == 'Resource':
+        return DTS_Resource(raw_json)
+    return DTS_Collection(raw_json)
+
+@lru_cache(maxsize=64)
+def get_uri_template(template: str) -> URITemplate:
+    """Returns the (parsed) URI template for `template`; templates are parsed only once."""
+    return URITemplate(template)
+
+def get_server_capabilities(response: Response) -> Dict[str, Any]:
+    """Returns what a response tells us about the server (content type, compression, caching)."""
+    return {
+        'content_type': response.headers.get('Content-Type'),
+        'content_encoding': response.headers.get('Content-Encoding'),
+        'etag': 'ETag' in response.headers,
+        'last_modified': 'Last-Modified' in response.headers,
+    }
+
+def get_conditional_headers(response: Response) -> Dict[str, str]:
+    """Returns the headers of a conditional request revalidating `response`."""
+    headers = {}
+    if 'ETag' in response.headers:
+        headers['If-None-Match'] = response.headers['ETag']
+    if 'Last-Modified' in response.headers:
+        headers['If-Modified-Since'] = response.headers['Last-Modified']
+    return headers
+
+def is_cacheable_response(response: Response) -> bool:
+    """Tells whether a response can be memoized: server errors and backoff
+    responses (e.g. 429) are transient, and thus not cached."""
+    return response.status_code < 500 and response.status_code not in BACKOFF_STATUS_CODES
+
 def get_resource_recursively(collection : DTS_Collection, dts_client : DTS_API) -> DTS_Resource:
     # get the full metadata from the API    
     collection = dts_client.collections(id=collection.id)
@@ -0,0 +1,241 @@
+"""Compiles the JSON schemas of `schemas/` into specialized Python functions, written to
+`dts_validator/_generated_validators.py`.
+
+A generated function returns whether a response is valid, without collecting errors: it is
+the fast path of `validation.get_validation_error`, which falls back to `jsonschema` (to
+report the same errors as before) only for the responses it rejects. Only the keywords used
+by the DTS schemas are supported; annotations (e.g. `format`, which `jsonschema` does not
+assert by default) are ignored.
+
+Run `python -m dts_validator.codegen` after changing a schema (the test suite checks that the
+generated module is up to date).
+"""
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+from typing import Dict, List, Optional, Set, Tuple
+
+SCHEMAS_DIR = (pathlib.Path(__file__) / ".." / ".." / "schemas").resolve()
+GENERATED_PATH = pathlib.Path(__file__).parent / '_generated_validators.py'
+
+# keywords that do not constrain the responses (or are not asserted by `jsonschema` by default)
+ANNOTATION_KEYWORDS = {'$schema', '$id', '$comment', '$defs', 'title', 'description', 'format', 'examples', 'default'}
+
+# how `jsonschema` checks each type (`True`/`False` are not numbers)
+TYPE_CHECKS = {
+    'object': 'isinstance({var}, dict)',
+    'array': 'isinstance({var}, list)',
+    'string': 'isinstance({var}, str)',
+    'null': '{var} is None',
+    'boolean': 'isinstance({var}, bool)',
+    'number': '(isinstance({var}, (int, float)) and not isinstance({var}, bool))',
+    'integer': '((isinstance({var}, int) and not isinstance({var}, bool)) or (isinstance({var}, float) and {var}.is_integer()))',
+}
+
+# a location in a schema: (schema file, JSON pointer)
+SchemaLocation = Tuple[str, str]
+
+def get_schema_hash(json_schema: Dict) -> str:
+    """Returns the hash identifying a schema (the same as the one `validation` computes)."""
+    return hashlib.sha1(json.dumps(json_schema, sort_keys=True).encode('utf-8')).hexdigest()
+
+def function_name(schema_file: str) -> str:
+    return 'validate_' + schema_file.split('.')[0]
+
+class SchemaCompiler(object):
+    """Compiles the schemas of a directory into the source of a Python module."""
+
+    def __init__(self, schemas_dir: pathlib.Path = SCHEMAS_DIR) -> None:
+        self.schemas_dir = schemas_dir
+        self.schemas: Dict[str, Dict] = {}
+        self.constants: List[str] = []
+        self.functions: Dict[SchemaLocation, str] = {}
+        self.sources: List[str] = []
+        self._pending: List[SchemaLocation] = []
+        self._counter = 0
+
+    def load(self, schema_file: str) -> Dict:
+        if schema_file not in self.schemas:
+            with open(self.schemas_dir / schema_file, 'r') as f:
+                self.schemas[schema_file] = json.load(f)
+        return self.schemas[schema_file]
+
+    def resolve(self, location: SchemaLocation) -> Dict:
+        schema_file, pointer = location
+        schema = self.load(schema_file)
+        for part in filter(None, pointer.split('/')):
+            part = part.replace('~1', '/').replace('~0', '~')
+            schema = schema[int(part)] if isinstance(schema, list) else schema[part]
+        return schema
+
+    def resolve_ref(self, ref: str, base_file: str) -> SchemaLocation:
+        schema_file, _, pointer = ref.partition('#')
+        return (schema_file or base_file, pointer)
+
+    def function_for(self, location: SchemaLocation) -> str:
+        """Returns the name of the function validating the subschema at `location`,
+        scheduling its compilation if needed."""
+        if location not in self.functions:
+            schema_file, pointer = location
+            if pointer:
+                self._counter += 1
+                name = f'_{function_name(schema_file)}_{self._counter}'
+            else:
+                name = function_name(schema_file)
+            self.functions[location] = name
+            self._pending.append(location)
+        return self.functions[location]
+
+    def add_constant(self, expression: str) -> str:
+        if expression not in self.constants:
+            self.constants.append(expression)
+        return f'_CONSTANT_{self.constants.index(expression)}'
+
+    def compile_file(self, schema_file: str) -> str:
+        name = self.function_for((schema_file, ''))
+        while self._pending:
+            location = self._pending.pop(0)
+            lines = [f'def {self.functions[location]}(instance):']
+            self.compile_schema(self.resolve(location), 'instance', location[0], lines, 1, {location})
+            lines.append('    return True')
+            self.sources.append('\n'.join(lines))
+        return name
+
+    def compile_schema(self, schema: Dict, var: str, base_file: str, lines: List[str], depth: int, inlined: Set[SchemaLocation]) -> None:
+        """Appends to `lines` the statements returning False if `var` is not valid against `schema`."""
+        indent = '    ' * depth
+        unsupported = set(schema) - ANNOTATION_KEYWORDS - {'type', 'properties', 'required', 'items', 'pattern', 'enum', 'anyOf', '$ref'}
+        if unsupported:
+            raise NotImplementedError(f'Keywords not supported by the generator (in {base_file}): {sorted(unsupported)}')
+
+        types = schema.get('type')
+        if isinstance(types, str):
+            types = [types]
+        if types is not None:
+            check = ' or '.join(TYPE_CHECKS[type_name].format(var=var) for type_name in types)
+            lines.append(f'{indent}if not ({check}):')
+            lines.append(f'{indent}    return False')
+
+        if 'enum' in schema:
+            if not all(isinstance(value, str) for value in schema['enum']):
+                raise NotImplementedError(f'Only enumerations of strings are supported by the generator (in {base_file})')
+            constant = self.add_constant(f'frozenset({sorted(schema["enum"])!r})')
+            lines.append(f'{indent}if not (isinstance({var}, str) and {var} in {constant}):')
+            lines.append(f'{indent}    return False')
+
+        if 'pattern' in schema:
+            constant = self.add_constant(f're.compile({schema["pattern"]!r})')
+            self.guarded(types, 'string', var, lines, depth, [
+                f'if not {constant}.search({var}):',
+                '    return False',
+            ])
+
+        if 'required' in schema or 'properties' in schema:
+            body: List[str] = []
+            for property_name in schema.get('required', []):
+                body.append(f'if {property_name!r} not in {var}:')
+                body.append('    return False')
+            for property_name, subschema in schema.get('properties', {}).items():
+                value_var = self.variable()
+                body.append(f'{value_var} = {var}.get({property_name!r}, _MISSING)')
+                body.append(f'if {value_var} is not _MISSING:')
+                sublines: List[str] = []
+                self.compile_schema(subschema, value_var, base_file, sublines, 1, inlined)
+                body.extend(sublines or ['    pass'])
+            self.guarded(types, 'object', var, lines, depth, body)
+
+        if 'items' in schema:
+            item_var = self.variable()
+            sublines = []
+            self.compile_schema(schema['items'], item_var, base_file, sublines, 1, inlined)
+            if sublines:
+                self.guarded(types, 'array', var, lines, depth, [f'for {item_var} in {var}:'] + sublines)
+
+        if 'anyOf' in schema:
+            names = []
+            for index in range(len(schema['anyOf'])):
+                pointer = self.pointer_of(schema, base_file)
+                names.append(self.function_for((base_file, f'{pointer}/anyOf/{index}')))
+            lines.append(f'{indent}if not ({" or ".join(f"{name}({var})" for name in names)}):')
+            lines.append(f'{indent}    return False')
+
+        if '$ref' in schema:
+            location = self.resolve_ref(schema['$ref'], base_file)
+            if location in inlined or location in self.functions:
+                # recursive (or shared) subschemas are validated by their own function
+                lines.append(f'{indent}if not {self.function_for(location)}({var}):')
+                lines.append(f'{indent}    return False')
+            else:
+                self.compile_schema(self.resolve(location), var, location[0], lines, depth, inlined | {location})
+
+    def guarded(self, types: Optional[List[str]], type_name: str, var: str, lines: List[str], depth: int, body: List[str]) -> None:
+        """Appends the statements of a keyword that only applies to instances of `type_name`
+        (the type check is omitted if the schema already restricts `var` to this type)."""
+        indent = '    ' * depth
+        if types == [type_name]:
+            lines.extend(indent + line for line in body)
+        else:
+            lines.append(indent + 'if ' + TYPE_CHECKS[type_name].format(var=var) + ':')
+            lines.extend(indent + '    ' + line for line in body)
+
+    def variable(self) -> str:
+        self._counter += 1
+        return f'v{self._counter}'
+
+    def pointer_of(self, subschema: Dict, schema_file: str) -> str:
+        """Returns the JSON pointer of `subschema` (an object of `schema_file`)."""
+        def search(node, pointer):
+            if node is subschema:
+                return pointer
+            children = node.items() if isinstance(node, dict) else enumerate(node) if isinstance(node, list) else ()
+            for key, child in children:
+                found = search(child, f'{pointer}/{str(key).replace("~", "~0").replace("/", "~1")}')
+                if found is not None:
+                    return found
+            return None
+
+        pointer = search(self.load(schema_file), '')
+        if pointer is None:
+            raise ValueError(f'Subschema not found in {schema_file}')
+        return pointer
+
+def generate(schemas_dir: pathlib.Path = SCHEMAS_DIR) -> str:
+    """Returns the source of the module of generated validators for the schemas of `schemas_dir`."""
+    compiler = SchemaCompiler(schemas_dir)
+    entries = []
+    for schema_file in sorted(os.listdir(schemas_dir)):
+        if schema_file.endswith('.schema.json'):
+            name = compiler.compile_file(schema_file)
+            entries.append(f'    {get_schema_hash(compiler.load(schema_file))!r}: {name},  # {schema_file}')
+
+    constants = '\n'.join(f'_CONSTANT_{index} = {expression}' for index, expression in enumerate(compiler.constants))
+    return (
+        '# Generated by `python -m dts_validator.codegen` from the schemas in `schemas/`: do not edit.\n'
+        'import re\n\n'
+        '_MISSING = object()\n\n'
+        f'{constants}\n\n'
+        + '\n\n'.join(compiler.sources)
+        + '\n\n# the generated validator of each schema, by hash of the schema (see `validation.get_validation_error`)\n'
+        'VALIDATORS = {\n' + '\n'.join(entries) + '\n}\n'
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--check', action='store_true', help='Only check that the generated module is up to date')
+    args = parser.parse_args()
+
+    source = generate()
+    if args.check:
+        with open(GENERATED_PATH, 'r') as f:
+            up_to_date = f.read() == source
+        print(f'{GENERATED_PATH} is {"up to date" if up_to_date else "out of date"}')
+        return 0 if up_to_date else 1
+    with open(GENERATED_PATH, 'w') as f:
+        f.write(source)
+    print(f'Written {GENERATED_PATH}')
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,255 @@
+import itertools
+import logging
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+from requests.models import Response
+from .client import DTS_API, DTS_Navigation, DTS_Resource
+from .citation_tree import CitationTree, compare_citation_trees, get_max_cite_depth, walk_citation_tree
+from .fragments import FragmentValidationReport, validate_document_fragments
+
+LOGGER = logging.getLogger()
+
+# properties of a Resource that the Collection and Navigation endpoints must agree upon
+SHARED_RESOURCE_PROPERTIES = ['@id', '@type', 'navigation', 'document', 'collection', 'citationTrees']
+
+class ConsistencyResult(object):
+    """Outcome of one consistency check for one resource."""
+
+    def __init__(self, resource_id: str, check: str, ok: bool, message: Optional[str] = None) -> None:
+        self.resource_id = resource_id
+        self.check = check
+        self.ok = ok
+        self.message = message
+
+    def __repr__(self) -> str:
+        outcome = 'passed' if self.ok else f'failed: {self.message}'
+        return f'ConsistencyResult({self.resource_id}, {self.check} {outcome})'
+
+class ResourceData(object):
+    """The responses of the Collection, Navigation and Document endpoints for one resource.
+    Each response is fetched once, and shared by all consistency checks."""
+
+    def __init__(
+            self,
+            resource: DTS_Resource,
+            navigation: Optional[DTS_Navigation],
+            navigation_response: Optional[Response],
+            full_tree: bool,
+            fragments: Optional[FragmentValidationReport] = None,
+            walked_tree: Optional[CitationTree] = None
+    ) -> None:
+        self.resource = resource
+        self.navigation = navigation
+        self.navigation_response = navigation_response
+        self.full_tree = full_tree
+        self.fragments = fragments
+        self.walked_tree = walked_tree
+
+def get_cite_types_by_level(citation_tree: Dict) -> Dict[int, Set[str]]:
+    """Returns the `citeType`s declared at each level of a citation tree (levels start at 1)."""
+    cite_types: Dict[int, Set[str]] = {}
+    structures = [(1, structure) for structure in citation_tree.get('citeStructure', [])]
+    while structures:
+        level, structure = structures.pop()
+        if 'citeType' in structure:
+            cite_types.setdefault(level, set()).add(structure['citeType'])
+        structures += [(level + 1, child) for child in structure.get('citeStructure', [])]
+    return cite_types
+
+def check_navigation_available(data: ResourceData) -> List[str]:
+    """The Navigation endpoint returns the citation tree of the resource."""
+    if data.navigation is None:
+        status = data.navigation_response.status_code if data.navigation_response is not None else None
+        return [f'The Navigation endpoint returned HTTP {status}']
+    return []
+
+def check_navigation_resource(data: ResourceData) -> List[str]:
+    """The Resource embedded in the Navigation response matches the one of the Collection endpoint."""
+    problems = []
+    collection_json = data.resource.json
+    navigation_json = data.navigation.resource.json
+    for prpty in SHARED_RESOURCE_PROPERTIES:
+        if prpty in collection_json and prpty in navigation_json and collection_json[prpty] != navigation_json[prpty]:
+            problems.append(
+                f'`{prpty}` differs between the Collection ({collection_json[prpty]!r}) '
+                f'and Navigation ({navigation_json[prpty]!r}) endpoints'
+            )
+    return problems
+
+def check_cite_types(data: ResourceData) -> List[str]:
+    """The `citeType` of each citable unit is declared at its level of the (default) citation tree."""
+    citation_trees = data.resource.json.get('citationTrees') or data.navigation.resource.json.get('citationTrees')
+    if not citation_trees:
+        return ['No `citationTrees` are declared for the resource']
+
+    cite_types = get_cite_types_by_level(citation_trees[0])
+    problems = []
+    for unit in data.navigation.citable_units:
+        if unit.type is not None and unit.type not in cite_types.get(unit.level, set()):
+            problems.append(f'Citable unit `{unit.id}` has `citeType` {unit.type!r}, not declared at level {unit.level}')
+    return problems
+
+def check_cite_depth(data: ResourceData) -> List[str]:
+    """No citable unit is deeper than the `maxCiteDepth` of the (default) citation tree."""
+    max_cite_depth = get_max_cite_depth(data.resource)
+    if max_cite_depth is None or not data.navigation.citable_units:
+        return []
+    max_level = max(unit.level for unit in data.navigation.citable_units)
+    if max_level > max_cite_depth:
+        return [f'Citable units go down to level {max_level}, but `maxCiteDepth` is {max_cite_depth}']
+    return []
+
+def check_parents(data: ResourceData) -> List[str]:
+    """Each citable unit's `parent` is listed in the (full) citation tree, one level above it."""
+    if not data.full_tree:
+        return []
+    levels = {unit.id: unit.level for unit in data.navigation.citable_units}
+    problems = []
+    for unit in data.navigation.citable_units:
+        if unit.parent is None:
+            if unit.level != 1:
+                problems.append(f'Citable unit `{unit.id}` (level {unit.level}) has no parent')
+        elif unit.parent not in levels:
+            problems.append(f'The parent `{unit.parent}` of citable unit `{unit.id}` is not in the citation tree')
+        elif levels[unit.parent] != unit.level - 1:
+            problems.append(f'Citable unit `{unit.id}` (level {unit.level}) has parent `{unit.parent}` at level {levels[unit.parent]}')
+    return problems
+
+def check_document_fragments(data: ResourceData) -> List[str]:
+    """The citable units listed by the Navigation endpoint resolve in the Document endpoint."""
+    if data.fragments is None:
+        return []
+    return [f'{failure.reference}: {failure.reason}' for failure in data.fragments.failures]
+
+def check_citation_tree_walk(data: ResourceData) -> List[str]:
+    """The citation tree returned with `down=-1` matches the one walked level by level (`ref=<unit>&down=1`)."""
+    if data.walked_tree is None:
+        return []
+    return data.walked_tree.errors + compare_citation_trees(data.walked_tree, data.navigation)
+
+CONSISTENCY_CHECKS: List[Callable[[ResourceData], List[str]]] = [
+    check_navigation_resource,
+    check_cite_types,
+    check_cite_depth,
+    check_parents,
+    check_document_fragments,
+    check_citation_tree_walk,
+]
+
+def fetch_resource_data(
+        dts_client: DTS_API,
+        resource: DTS_Resource,
+        document_sample: Optional[int] = 10,
+        range_size: Optional[int] = None,
+        walk_tree: bool = False,
+        max_tree_units: Optional[int] = None,
+        max_workers: Optional[int] = None
+) -> ResourceData:
+    """Fetches, once, all the responses needed to check the consistency of a resource.
+    The whole citation tree is requested (`down=-1`); if the server refuses it, the tree is
+    reconstructed level by level (see `walk_citation_tree`). With `walk_tree`, the tree is
+    walked level by level anyway, to be compared with the `down=-1` response. `max_workers`
+    bounds the concurrent requests of the tree walk and of the Document fragments.
+    """
+    navigation, navigation_response = dts_client.navigation(resource=resource, down=-1)
+    full_tree = navigation is not None
+    walked_tree = None
+    if navigation is None or walk_tree:
+        walked_tree = walk_citation_tree(
+            dts_client, resource, max_depth=get_max_cite_depth(resource), max_units=max_tree_units, max_workers=max_workers
+        )
+    if navigation is None:
+        navigation, navigation_response = dts_client.navigation(resource=resource, down=1)
+        if navigation is not None:
+            navigation.citable_units = list(walked_tree.iter_units())
+            full_tree = not walked_tree.truncated and not walked_tree.errors
+        # (there is no `down=-1` response to compare the walked tree with)
+        walked_tree = None
+
+    fragments = None
+    if navigation is not None and navigation.citable_units and document_sample != 0:
+        fragments = validate_document_fragments(
+            dts_client, navigation, sample=document_sample, range_size=range_size, max_workers=max_workers
+        )
+    return ResourceData(resource, navigation, navigation_response, full_tree, fragments, walked_tree)
+
+def check_resource_consistency(data: ResourceData) -> List[ConsistencyResult]:
+    """Runs all consistency checks on the responses fetched for one resource."""
+    resource_id = data.resource.id
+    problems = check_navigation_available(data)
+    if problems:
+        return [ConsistencyResult(resource_id, check_navigation_available.__name__, False, problems[0])]
+
+    results = []
+    for check in CONSISTENCY_CHECKS:
+        problems = check(data)
+        message = '; '.join(problems) if problems else None
+        results.append(ConsistencyResult(resource_id, check.__name__, not problems, message))
+    return results
+
+def check_corpus_consistency(
+        dts_client: DTS_API,
+        resources: Optional[Iterable[DTS_Resource]] = None,
+        max_resources: Optional[int] = None,
+        document_sample: Optional[int] = 10,
+        range_size: Optional[int] = None,
+        walk_tree: bool = False,
+        max_tree_units: Optional[int] = None,
+        journal=None
+) -> Iterator[ConsistencyResult]:
+    """Checks, in one streaming pass over the corpus, that the Collection, Navigation and
+    Document endpoints are consistent with each other for each resource.
+
+    Resources are processed concurrently as they are discovered; only the responses of the
+    resources being checked are held in memory, and they are released as soon as their
+    results have been yielded. The requests of each resource are sent one after the other,
+    so that no more than `max_concurrency` threads are used in total.
+
+    :param dts_client: The client of the DTS API being validated.
+    :type dts_client: DTS_API
+    :param resources: The resources to check, defaults to None (all resources of the API)
+    :type resources: Optional[Iterable[DTS_Resource]], optional
+    :param max_resources: Maximum number of resources to check, defaults to None (no limit)
+    :type max_resources: Optional[int], optional
+    :param document_sample: Number of citable units per resource checked against the
+        Document endpoint, defaults to 10 (None for all, 0 for none)
+    :type document_sample: Optional[int], optional
+    :param range_size: Fetch Document fragments as `start`/`end` ranges of this many units, defaults to None
+    :type range_size: Optional[int], optional
+    :param walk_tree: Also walk the citation tree of each resource level by level, and
+        compare it with the `down=-1` response, defaults to False
+    :type walk_tree: bool, optional
+    :param max_tree_units: Maximum number of citable units fetched when walking a citation
+        tree level by level, defaults to None (no limit)
+    :type max_tree_units: Optional[int], optional
+    :param journal: Where the progress of the sweep is recorded (see `Journal`); if it was resumed,
+        the results of the resources it records as checked are yielded again, defaults to None
+    :type journal: Optional[Journal], optional
+    :return: An iterator over the results of the consistency checks.
+    :rtype: Iterator[ConsistencyResult]
+    """
+    if journal is not None:
+        for result in journal.completed_results():
+            yield ConsistencyResult(**result)
+    if resources is None:
+        resources = dts_client.iter_resources(state=journal)
+    if max_resources is not None:
+        resources = itertools.islice(resources, max_resources)
+
+    def check(resource):
+        data = fetch_resource_data(
+            dts_client, resource, document_sample=document_sample, range_size=range_size,
+            walk_tree=walk_tree, max_tree_units=max_tree_units, max_workers=1
+        )
+        return check_resource_consistency(data)
+
+    for resource, results in dts_client.map(check, resources):
+        if isinstance(results, Exception):
+            LOGGER.error(f'Consistency checks of {resource} failed: {results}')
+            yield ConsistencyResult(resource.id, check_resource_consistency.__name__, False, f'{type(results).__name__}: {results}')
+            continue
+        if journal is not None:
+            journal.record_resource(resource.id, [vars(result) for result in results])
+        for result in results:
+            if not result.ok:
+                LOGGER.error(f'{resource}: {result.check} failed: {result.message}')
+            yield result
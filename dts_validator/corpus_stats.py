@@ -0,0 +1,258 @@
+import hashlib
+import html
+import json
+import logging
+import math
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from .decoding import loads
+
+LOGGER = logging.getLogger()
+
+# the quantiles reported for each distribution
+QUANTILES = (0.5, 0.9, 0.99)
+
+# citation tree levels with a distribution of their own (deeper levels are counted together)
+MAX_LEVELS = 16
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def cite_structure_depth(cite_structure: Any) -> int:
+    """Returns the number of levels of a (nested) `citeStructure`."""
+    if not isinstance(cite_structure, list):
+        return 0
+    return max((1 + cite_structure_depth(node.get('citeStructure')) for node in cite_structure if isinstance(node, dict)), default=0)
+
+class HyperLogLog(object):
+    """Approximate count of distinct values, in `2 ** precision` bytes (the relative
+    standard error is about `1.04 / sqrt(2 ** precision)`, i.e. 1.6% by default)."""
+
+    def __init__(self, precision: int = 12) -> None:
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        hashed = _hash64(value)
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # small cardinalities: linear counting
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+class QuantileSketch(object):
+    """Approximate quantiles of a distribution of non-negative values (DDSketch): values are
+    counted in logarithmic buckets, so that quantiles are within `relative_accuracy` of the
+    exact ones. Past `max_buckets`, the lowest buckets are merged (so the memory is bounded,
+    at the expense of the accuracy of the lowest quantiles)."""
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048) -> None:
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets: Counter = Counter()
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if value <= 0:
+            self.zeros += 1
+            return
+        self.buckets[math.ceil(math.log(value) / self.log_gamma)] += 1
+        if len(self.buckets) > self.max_buckets:
+            lowest, second = sorted(self.buckets)[:2]
+            self.buckets[second] += self.buckets.pop(lowest)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {'count': self.count, 'min': self.min, 'max': self.max, 'mean': round(self.total / self.count, 3) if self.count else None}
+        for q in QUANTILES:
+            value = self.quantile(q)
+            summary[f'p{int(q * 100)}'] = round(value, 3) if value is not None else None
+        return summary
+
+class SpaceSaving(object):
+    """The most frequent values of a stream, with at most `capacity` counters (the count of a
+    value is overestimated by at most its `error`)."""
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, value: str, count: int = 1) -> None:
+        if value in self.counts:
+            self.counts[value] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[value] = count
+            self.errors[value] = 0
+        else:
+            # the new value replaces the least frequent one, and inherits its count
+            evicted = min(self.counts, key=self.counts.get)
+            minimum = self.counts.pop(evicted)
+            del self.errors[evicted]
+            self.counts[value] = minimum + count
+            self.errors[value] = minimum
+
+    def top(self, n: int = 10) -> List[Tuple[str, int, int]]:
+        """Returns the `n` most frequent values, as (value, count, error) tuples."""
+        ranked = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:n]
+        return [(value, count, self.errors[value]) for value, count in ranked]
+
+class CorpusStatistics(object):
+    """Profile of a DTS corpus, built from the responses fetched by a client as they stream by
+    (see `DTS_API.add_listener`), in fixed memory whatever the size of the corpus: distinct
+    collections and resources, fan-out of the collections, depth of the citation trees (from
+    the Resources) and width of their levels (from the Navigation responses listing whole
+    levels), `citeType` distribution of the citable units, and Document sizes.
+    """
+
+    def __init__(self) -> None:
+        self.collections = HyperLogLog()
+        self.resources = HyperLogLog()
+        self.fan_out = QuantileSketch()
+        self.resources_per_collection = QuantileSketch()
+        self.tree_depth = QuantileSketch()
+        self.level_width: Dict[int, QuantileSketch] = {}
+        self.cite_types = SpaceSaving()
+        self.document_size = QuantileSketch()
+        self.responses: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def observe(self, kind: str, response, json_data: Optional[Dict] = None) -> None:
+        """Records a response of the Collection, Navigation or Document endpoint (`kind`).
+        The JSON responses are decoded from `response` if `json_data` is not given."""
+        try:
+            if kind == 'document':
+                with self._lock:
+                    self.responses[kind] += 1
+                    self.document_size.add(len(response.content))
+                return
+            if json_data is None:
+                json_data = loads(response.content)
+            with self._lock:
+                self.responses[kind] += 1
+                if kind == 'collection':
+                    self._observe_collection(json_data)
+                elif kind == 'navigation':
+                    query = parse_qs(urlsplit(getattr(response, 'url', None) or '').query)
+                    self._observe_navigation(json_data, whole_levels=not ({'ref', 'start', 'end'} & set(query)))
+        except Exception as e:
+            # statistics are best-effort: invalid responses are reported by the checks
+            LOGGER.debug(f'Cannot collect statistics from a {kind} response: {e}')
+
+    def _observe_collection(self, json_data: Dict) -> None:
+        if json_data.get('@type') == 'Resource':
+            self.resources.add(str(json_data.get('@id')))
+            for tree in json_data.get('citationTrees') or []:
+                if isinstance(tree, dict):
+                    depth = tree.get('maxCiteDepth')
+                    self.tree_depth.add(depth if isinstance(depth, int) else cite_structure_depth(tree.get('citeStructure')))
+            return
+        self.collections.add(str(json_data.get('@id')))
+        members = [member for member in json_data.get('member') or [] if isinstance(member, dict)]
+        if 'member' in json_data:
+            self.fan_out.add(len(members))
+            self.resources_per_collection.add(sum(1 for member in members if member.get('@type') == 'Resource'))
+        for member in members:
+            if member.get('@type') == 'Resource':
+                self.resources.add(str(member.get('@id')))
+            else:
+                self.collections.add(str(member.get('@id')))
+
+    def _observe_navigation(self, json_data: Dict, whole_levels: bool) -> None:
+        widths: Counter = Counter()
+        for unit in json_data.get('member') or []:
+            if not isinstance(unit, dict):
+                continue
+            level = unit.get('level')
+            if isinstance(level, (int, float)):
+                widths[min(int(level), MAX_LEVELS)] += 1
+            if unit.get('citeType'):
+                self.cite_types.add(str(unit['citeType']))
+        if not whole_levels:
+            # the members of a subtree or a range are not the whole width of their levels
+            return
+        for level, width in widths.items():
+            self.level_width.setdefault(level, QuantileSketch()).add(width)
+
+    def summary(self) -> Dict[str, Any]:
+        """Returns the statistics, as a JSON-serializable dictionary."""
+        with self._lock:
+            return {
+                'responses': dict(self.responses),
+                'distinct_collections': self.collections.count(),
+                'distinct_resources': self.resources.count(),
+                'collection_fan_out': self.fan_out.summary(),
+                'resources_per_collection': self.resources_per_collection.summary(),
+                'citation_tree_depth': self.tree_depth.summary(),
+                'units_per_level': {str(level): sketch.summary() for level, sketch in sorted(self.level_width.items())},
+                'cite_types': [{'citeType': value, 'count': count, 'error': error} for value, count, error in self.cite_types.top(20)],
+                'document_size': self.document_size.summary(),
+            }
+
+    def write_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as stats_file:
+            json.dump(self.summary(), stats_file, indent=2)
+
+    def to_html(self) -> str:
+        """Returns the statistics as HTML tables (for the `extra_sections` of the HTML report)."""
+        summary = self.summary()
+        distributions = [
+            ('Collection fan-out (members)', summary['collection_fan_out']),
+            ('Resources per collection', summary['resources_per_collection']),
+            ('Citation tree depth (levels)', summary['citation_tree_depth']),
+        ] + [
+            (f'Citable units at level {level}', level_summary) for level, level_summary in summary['units_per_level'].items()
+        ] + [
+            ('Document size (bytes)', summary['document_size']),
+        ]
+        columns = ['count', 'min', 'mean', 'p50', 'p90', 'p99', 'max']
+        parts = [
+            f'<p>About {summary["distinct_collections"]} distinct collections and {summary["distinct_resources"]} distinct resources '
+            f'(responses observed: {html.escape(", ".join(f"{kind} {count}" for kind, count in sorted(summary["responses"].items())))}).</p>',
+            '<table><tr><th>Distribution</th>' + ''.join(f'<th>{column}</th>' for column in columns) + '</tr>',
+        ]
+        for name, distribution in distributions:
+            cells = ''.join(f'<td>{"" if distribution[column] is None else distribution[column]}</td>' for column in columns)
+            parts.append(f'<tr><td>{html.escape(name)}</td>{cells}</tr>')
+        parts.append('</table>')
+        if summary['cite_types']:
+            parts.append('<table><tr><th>citeType</th><th>Citable units</th></tr>')
+            for item in summary['cite_types']:
+                count = f'{item["count"]} (±{item["error"]})' if item['error'] else str(item['count'])
+                parts.append(f'<tr><td>{html.escape(item["citeType"])}</td><td>{count}</td></tr>')
+            parts.append('</table>')
+        return '\n'.join(parts)
@@ -0,0 +1,95 @@
+import codecs
+import importlib
+import json
+import logging
+from typing import Any, Callable, Dict, Optional, Union
+
+LOGGER = logging.getLogger()
+
+ORJSON_DEPENDENCIES_MESSAGE = 'The orjson JSON backend requires `orjson`; install it with `pip install orjson` (or the `speedups` extra)'
+
+# the encodings a JSON body can be parsed in from its bytes (see RFC 8259)
+_UTF_ENCODINGS = {'utf-8', 'utf-16', 'utf-16-le', 'utf-16-be', 'utf-32', 'utf-32-le', 'utf-32-be', 'utf-8-sig'}
+
+def _stdlib_loads(data: Union[bytes, str]) -> Any:
+    # `json.loads` detects the UTF encoding of bytes itself
+    return json.loads(data)
+
+def _make_orjson_loads() -> Callable[[Union[bytes, str]], Any]:
+    orjson = importlib.import_module('orjson')
+
+    def orjson_loads(data: Union[bytes, str]) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # what orjson rejects and `json` may accept (a BOM, UTF-16, NaN, integers beyond
+            # 64 bits) is parsed by `json`, so that both backends give the same results
+            return json.loads(data)
+    return orjson_loads
+
+# the available backends, by name: each makes a function parsing JSON from bytes (or str)
+BACKENDS: Dict[str, Callable[[], Callable[[Union[bytes, str]], Any]]] = {
+    'json': lambda: _stdlib_loads,
+    'orjson': _make_orjson_loads,
+}
+
+class JSONDecoder(object):
+    """Parses JSON documents, in particular the bodies of responses, directly from their bytes
+    (`Response.json()` first decodes the body to `str`, which is then parsed), with the fastest
+    backend installed: `orjson`, or the standard library's `json`.
+    """
+
+    def __init__(self, backend: Optional[str] = None) -> None:
+        """
+        :param backend: The name of the backend (see `BACKENDS`), defaults to None (the fastest installed)
+        :type backend: Optional[str], optional
+        """
+        self.set_backend(backend)
+
+    def set_backend(self, backend: Optional[str] = None) -> None:
+        """Selects the backend parsing the documents.
+
+        :param backend: The name of the backend, defaults to None (`orjson` if it is installed, else `json`)
+        :type backend: Optional[str], optional
+        :raises ValueError: If the backend is unknown.
+        :raises ImportError: If the library of the backend is not installed.
+        """
+        if backend is None:
+            try:
+                self.loads = BACKENDS['orjson']()
+                self.backend = 'orjson'
+            except ImportError:
+                self.loads = BACKENDS['json']()
+                self.backend = 'json'
+            return
+        if backend not in BACKENDS:
+            raise ValueError(f'Unknown JSON backend {backend!r} (available: {", ".join(BACKENDS)})')
+        try:
+            self.loads = BACKENDS[backend]()
+        except ImportError as e:
+            raise ImportError(ORJSON_DEPENDENCIES_MESSAGE if backend == 'orjson' else str(e)) from e
+        self.backend = backend
+
+    def decode_response(self, response) -> Any:
+        """Parses the body of a response, like `response.json()` (with the same results), but
+        from its bytes. A body in a charset other than UTF (as declared in its `Content-Type`)
+        is left to `response.json()`."""
+        declared = response.encoding
+        if declared:
+            try:
+                declared = codecs.lookup(declared).name
+            except LookupError:
+                pass
+            if declared not in _UTF_ENCODINGS:
+                return response.json()
+        return self.loads(response.content)
+
+JSON_DECODER = JSONDecoder()
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parses a JSON document (from bytes or str) with the backend of `JSON_DECODER`."""
+    return JSON_DECODER.loads(data)
+
+def decode_response(response) -> Any:
+    """Parses the JSON body of a response with the backend of `JSON_DECODER` (see `JSONDecoder.decode_response`)."""
+    return JSON_DECODER.decode_response(response)
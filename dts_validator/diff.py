@@ -0,0 +1,364 @@
+import json
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+from .decoding import decode_response
+from .memo import content_hash
+from .profiling import PROFILER
+from .reporting import make_result
+
+LOGGER = logging.getLogger()
+
+RECORDING_VERSION = 1
+
+# identifier of the root of the Collection endpoint (and of the Entry endpoint) in diffs and recordings
+ROOT_ID = ''
+
+# keys identifying the items of a JSON array, to pair them across two responses
+ITEM_KEYS = ('@id', 'identifier')
+
+BASE_PLACEHOLDER = '{base}'
+
+def normalize_json(json_data: Any, base: str) -> Any:
+    """Returns a copy of a response where the URIs of the deployment (starting with `base`,
+    e.g. `https://staging.example.org`) are made relative, so that two deployments of the
+    same API on different hosts can be compared."""
+    if isinstance(json_data, dict):
+        return {key: normalize_json(value, base) for key, value in json_data.items()}
+    if isinstance(json_data, list):
+        return [normalize_json(value, base) for value in json_data]
+    if isinstance(json_data, str) and base and json_data.startswith(base):
+        return BASE_PLACEHOLDER + json_data[len(base):]
+    return json_data
+
+class Item(object):
+    """One response of a deployment: its HTTP status, the hash of its normalized content and
+    the normalized content itself (loaded lazily by recordings, as it is only needed when the
+    hashes of two items differ)."""
+
+    def __init__(
+            self,
+            kind: str,
+            id: str,
+            status: int,
+            hash: Optional[str] = None,
+            json_data: Any = None,
+            loader: Optional[Callable[[], Any]] = None
+    ) -> None:
+        self.kind = kind
+        self.id = id
+        self.status = status
+        self.hash = hash
+        self._json = json_data
+        self._loader = loader
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200
+
+    @property
+    def json(self) -> Any:
+        if self._json is None and self._loader is not None:
+            self._json = self._loader()
+        return self._json
+
+    def __repr__(self) -> str:
+        return f'Item({self.kind}, id={self.id!r}, status={self.status})'
+
+def make_item(kind: str, id: str, status: int, json_data: Any, base: str) -> Item:
+    if status != 200:
+        return Item(kind, id, status)
+    json_data = normalize_json(json_data, base)
+    return Item(kind, id, status, content_hash(json_data), json_data)
+
+class LiveSource(object):
+    """The responses of a deployed DTS API, fetched with a `DTS_API` client."""
+
+    def __init__(self, dts_client) -> None:
+        self.dts_client = dts_client
+        self.name = dts_client.entry_endpoint_uri
+        parts = urlsplit(dts_client.entry_endpoint_uri)
+        self.base = f'{parts.scheme}://{parts.netloc}'
+
+    def get(self, kind: str, id: str, resource: Optional[Dict] = None) -> Optional[Item]:
+        """Returns the Entry (`kind='entry'`), Collection or Navigation (`down=-1`) response
+        for `id`; the Navigation endpoint of a resource is taken from its (normalized) metadata."""
+        from .client import get_uri_template
+
+        if kind == 'entry':
+            return make_item(kind, id, 200, self.dts_client._entry_endpoint_json, self.base)
+        if kind == 'collection':
+            template = self.dts_client._collection_endpoint_template
+            uri = template.expand({'id': id}) if id != ROOT_ID else template.expand()
+        else:
+            template = resource['navigation'].replace(BASE_PLACEHOLDER, self.base, 1)
+            uri = get_uri_template(template).expand({'resource': id, 'down': -1})
+        response = self.dts_client._get(uri)
+        if response.status_code != 200:
+            return Item(kind, id, response.status_code)
+        with PROFILER.phase('json_decode'):
+            json_data = decode_response(response)
+        return make_item(kind, id, 200, json_data, self.base)
+
+    def close(self) -> None:
+        self.dts_client._session.close()
+
+class RecordedSource(object):
+    """The responses of a deployment, as recorded (see `record_deployment`) in a JSONL file.
+
+    Only an index (offset, status and hash of each response) is kept in memory; the responses
+    themselves are read from the file when their content is needed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._index: Dict[Tuple[str, str], Tuple[int, int, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        self._file = open(path, 'rb')
+        header = json.loads(self._file.readline())
+        if header.get('version') != RECORDING_VERSION:
+            raise ValueError(f'Unsupported recording version: {header.get("version")}')
+        self.name = header['entry_endpoint_uri']
+        self.base = BASE_PLACEHOLDER
+        while True:
+            offset = self._file.tell()
+            line = self._file.readline()
+            if not line:
+                break
+            # the metadata of each response comes before a tab, so that the response is not parsed
+            metadata = json.loads(line.split(b'\t', 1)[0])
+            self._index[(metadata['kind'], metadata['id'])] = (offset, metadata['status'], metadata['hash'])
+        LOGGER.info(f'Loaded the index of {len(self._index)} responses recorded from {self.name}')
+
+    def _load(self, offset: int) -> Any:
+        with self._lock:
+            self._file.seek(offset)
+            line = self._file.readline()
+        return json.loads(line.split(b'\t', 1)[1])
+
+    def get(self, kind: str, id: str, resource: Optional[Dict] = None) -> Optional[Item]:
+        """Returns the recorded response (None if it was not recorded)."""
+        if (kind, id) not in self._index:
+            return None
+        offset, status, hash = self._index[(kind, id)]
+        return Item(kind, id, status, hash, loader=lambda: self._load(offset))
+
+    def close(self) -> None:
+        self._file.close()
+
+class Recorder(object):
+    """Writes the responses of a deployment to a recording, to be compared later with `RecordedSource`."""
+
+    def __init__(self, path: str, entry_endpoint_uri: str) -> None:
+        self._file = open(path, 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._file.write(json.dumps({'version': RECORDING_VERSION, 'entry_endpoint_uri': entry_endpoint_uri}) + '\n')
+
+    def write(self, item: Item) -> None:
+        metadata = json.dumps({'kind': item.kind, 'id': item.id, 'status': item.status, 'hash': item.hash}, ensure_ascii=False)
+        line = metadata + '\t' + json.dumps(item.json, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+
+    def close(self) -> None:
+        self._file.close()
+
+def _short_repr(value: Any, max_length: int = 80) -> str:
+    text = repr(value)
+    return text if len(text) <= max_length else text[:max_length] + '...'
+
+def _item_key(items: List) -> Optional[str]:
+    """Returns the key identifying the items of an array (None if they can only be paired by position)."""
+    for key in ITEM_KEYS:
+        if items and all(isinstance(item, dict) and key in item for item in items):
+            return key
+    return None
+
+def diff_json(old: Any, new: Any, max_differences: int = 20) -> List[str]:
+    """Returns the structural differences between two responses: added, removed and changed
+    properties, with their path. The items of arrays are paired by `@id` (or `identifier`, for
+    citable units) when they have one, and by position otherwise.
+
+    :param max_differences: Stop after this many differences, defaults to 20
+    :type max_differences: int, optional
+    :return: One description per difference.
+    :rtype: List[str]
+    """
+    differences: List[str] = []
+
+    def diff(old: Any, new: Any, path: str) -> None:
+        # one difference more than reported tells whether the list was truncated
+        if len(differences) > max_differences:
+            return
+        if isinstance(old, dict) and isinstance(new, dict):
+            for key in old:
+                if key not in new:
+                    differences.append(f'{path}/{key}: removed')
+            for key in new:
+                if key not in old:
+                    differences.append(f'{path}/{key}: added ({_short_repr(new[key])})')
+                elif old[key] != new[key]:
+                    diff(old[key], new[key], f'{path}/{key}')
+        elif isinstance(old, list) and isinstance(new, list):
+            key = _item_key(old + new)
+            if key is None:
+                for index, (old_item, new_item) in enumerate(zip(old, new)):
+                    if old_item != new_item:
+                        diff(old_item, new_item, f'{path}/{index}')
+                if len(old) != len(new):
+                    differences.append(f'{path}: {len(old)} items -> {len(new)} items')
+                return
+            old_items = {item[key]: item for item in old}
+            new_items = {item[key]: item for item in new}
+            for item_id in old_items:
+                if item_id not in new_items:
+                    differences.append(f'{path}: item {key}={item_id!r} removed')
+            for item_id in new_items:
+                if item_id not in old_items:
+                    differences.append(f'{path}: item {key}={item_id!r} added')
+            common = [item_id for item_id in old_items if item_id in new_items]
+            for item_id in common:
+                if old_items[item_id] != new_items[item_id]:
+                    diff(old_items[item_id], new_items[item_id], f'{path}/[{key}={item_id}]')
+            if common != [item_id for item_id in new_items if item_id in old_items]:
+                differences.append(f'{path}: the order of the items changed')
+        elif old != new:
+            differences.append(f'{path or "/"}: {_short_repr(old)} -> {_short_repr(new)}')
+
+    diff(old, new, '')
+    if len(differences) > max_differences:
+        differences = differences[:max_differences] + ['[...]']
+    return differences
+
+def compare_items(kind: str, id: str, old: Optional[Item], new: Optional[Item], max_differences: int = 20) -> Dict:
+    """Compares the responses of two deployments for the same request.
+
+    :return: A result record: `passed` if the responses are the same, `failed` otherwise;
+        its `change` is one of `unchanged`, `changed`, `added` or `removed`.
+    :rtype: Dict
+    """
+    name = f'{kind}::{id or "<root>"}'
+    old_ok = old is not None and old.ok
+    new_ok = new is not None and new.ok
+    old_status = old.status if old is not None else None
+    new_status = new.status if new is not None else None
+    if not old_ok and not new_ok:
+        change, message = ('unchanged', None) if old_status == new_status else ('changed', f'HTTP {old_status} -> HTTP {new_status}')
+    elif not old_ok:
+        change, message = 'added', f'Only in the new deployment (HTTP {old_status} in the old one)'
+    elif not new_ok:
+        change, message = 'removed', f'Only in the old deployment (HTTP {new_status} in the new one)'
+    elif old.hash == new.hash:
+        change, message = 'unchanged', None
+    else:
+        change, message = 'changed', '\n'.join(diff_json(old.json, new.json, max_differences=max_differences))
+    outcome = 'passed' if change == 'unchanged' else 'failed'
+    return make_result(name, outcome, message=message, group=kind, source=id, change=change)
+
+def _member_ids(item: Optional[Item]) -> List[str]:
+    if item is None or not item.ok or not isinstance(item.json, dict):
+        return []
+    return [member['@id'] for member in item.json.get('member') or [] if isinstance(member, dict) and '@id' in member]
+
+def _is_resource(item: Optional[Item]) -> bool:
+    return item is not None and item.ok and isinstance(item.json, dict) and item.json.get('@type') == 'Resource'
+
+def diff_deployments(
+        old,
+        new,
+        recorder: Optional[Recorder] = None,
+        max_workers: int = 8,
+        max_differences: int = 20
+) -> Iterator[Dict]:
+    """Compares two deployments of a DTS API (or a deployment and a recording of another one).
+
+    The trees of collections of both deployments are walked together, breadth-first: each
+    collection is fetched from both sides by `@id` (in parallel, for `max_workers` collections at
+    a time), its children on either side are visited next, and the Navigation endpoint
+    (`down=-1`) of each resource is compared as well. Responses are compared through the hash of
+    their normalized content, so only the responses that changed are diffed structurally.
+
+    The responses are not kept once compared (the clients of `make_source` memoize none), but
+    the identifiers of the collections are: those still to be visited, and those already seen
+    (so that a collection with several parents, or a cycle, is visited once). Memory thus grows with the number of collections (O(collections)
+    identifiers), not with the size of their responses.
+
+    :param old: The reference deployment (`LiveSource` or `RecordedSource`).
+    :param new: The deployment compared to it.
+    :param recorder: Where the responses of `new` are recorded (when `new` is `old`, its responses
+        are fetched once and recorded without comparison), defaults to None
+    :type recorder: Optional[Recorder], optional
+    :param max_workers: Number of collections compared concurrently, defaults to 8
+    :type max_workers: int, optional
+    :param max_differences: Maximum number of differences reported per response, defaults to 20
+    :type max_differences: int, optional
+    :return: One result record per compared response.
+    :rtype: Iterator[Dict]
+    """
+    def fetch(source, kind: str, id: str, resource: Optional[Item] = None) -> Optional[Item]:
+        try:
+            return source.get(kind, id, resource=resource.json if resource is not None else None)
+        except Exception as e:
+            LOGGER.warning(f'Could not fetch {kind} {id!r} from {source.name}: {type(e).__name__}: {e}')
+            return None
+
+    def visit(kind: str, id: str, old_resource: Optional[Item] = None, new_resource: Optional[Item] = None):
+        old_item = fetch(old, kind, id, old_resource)
+        new_item = fetch(new, kind, id, new_resource) if new is not old else old_item
+        if recorder is not None and new_item is not None:
+            recorder.write(new_item)
+        results = [compare_items(kind, id, old_item, new_item, max_differences)]
+        children: List[str] = []
+        if kind == 'collection':
+            for child_id in _member_ids(old_item) + _member_ids(new_item):
+                if child_id not in children:
+                    children.append(child_id)
+            if _is_resource(old_item) or _is_resource(new_item):
+                results += visit(
+                    'navigation', id,
+                    old_item if _is_resource(old_item) else None,
+                    new_item if _is_resource(new_item) else None
+                )[0]
+        return results, children
+
+    yield from visit('entry', ROOT_ID)[0]
+
+    frontier = deque([ROOT_ID])
+    seen = {ROOT_ID}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while frontier:
+            # a bounded window of collections (and of their responses) is compared at a time
+            batch = [frontier.popleft() for _ in range(min(len(frontier), max_workers * 4))]
+            for results, children in executor.map(lambda id: visit('collection', id), batch):
+                yield from results
+                for child_id in children:
+                    if child_id not in seen:
+                        seen.add(child_id)
+                        frontier.append(child_id)
+
+def make_source(location: str, **client_options):
+    """Returns the source of a diff: a live deployment for a URI, a recording for a file path.
+    Each response of a deployment is fetched once, so the client of a live deployment memoizes
+    none (`cache_size=0`), which keeps the responses out of memory once compared."""
+    if location.startswith(('http://', 'https://')):
+        from .client import DTS_API
+        return LiveSource(DTS_API(location, **dict({'cache_size': 0}, **client_options)))
+    return RecordedSource(location)
+
+def record_deployment(location: str, path: str, max_workers: int = 8, **client_options) -> Iterator[Dict]:
+    """Records the responses of a deployment to `path`, to compare it later with `diff_deployments`.
+
+    :return: One result record per recorded response.
+    :rtype: Iterator[Dict]
+    """
+    source = make_source(location, **client_options)
+    recorder = Recorder(path, source.name)
+    try:
+        for result in diff_deployments(source, source, recorder=recorder, max_workers=max_workers):
+            yield make_result(result['name'], 'passed', group=result['group'], source=result['source'])
+    finally:
+        recorder.close()
+        source.close()
@@ -0,0 +1,263 @@
+import logging
+import os
+import sys
+import time
+import warnings
+from typing import Callable, Dict, Iterable, Iterator, Optional, TextIO
+from .aggregation import FailureAggregator
+from .decoding import loads
+from .memo import VALIDATION_MEMO
+from .reporting import FAILED_OUTCOMES, ResultSink, ResultsSummary, make_result
+from .validation import (
+    load_schema, validate_collection_response, validate_entry_response, validate_navigation_response
+)
+
+LOGGER = logging.getLogger()
+
+# `@type` of the JSON responses of each endpoint
+ENDPOINT_TYPES = {
+    'EntryPoint': 'entry',
+    'Collection': 'collection',
+    'Resource': 'collection',
+    'Navigation': 'navigation',
+}
+
+VALIDATORS: Dict[str, Callable[[Dict, Dict], None]] = {
+    'entry': validate_entry_response,
+    'collection': validate_collection_response,
+    'navigation': validate_navigation_response,
+}
+
+def detect_endpoint(json_data: Dict) -> Optional[str]:
+    """Returns the endpoint (`entry`, `collection` or `navigation`) a JSON response
+    comes from, based on its `@type` (or None if it can't be detected)."""
+    if not isinstance(json_data, dict):
+        return None
+    return ENDPOINT_TYPES.get(json_data.get('@type'))
+
+def check_json_response(json_data: Dict, source: str, endpoint: Optional[str] = None) -> Dict:
+    """Validates a JSON response with the checks for its endpoint.
+
+    :param json_data: The JSON response.
+    :type json_data: Dict
+    :param source: Where the response comes from (file path or URI); used to name the result.
+    :type source: str
+    :param endpoint: The endpoint of the response, defaults to None (detected from `@type`)
+    :type endpoint: Optional[str], optional
+    :return: The result record of the check.
+    :rtype: Dict
+    """
+    endpoint = endpoint or detect_endpoint(json_data)
+    name = f'{source}::{endpoint or "unknown"}'
+    if endpoint is None:
+        return make_result(name, 'error', message='Cannot detect the endpoint of the response (unknown `@type`)', group='unknown', source=source)
+
+    start_time = time.perf_counter()
+    error_fields = {}
+    with warnings.catch_warnings(record=True) as caught_warnings:
+        warnings.simplefilter('always')
+        try:
+            VALIDATORS[endpoint](json_data, load_schema(endpoint))
+            outcome, message = 'passed', None
+        except Exception as e:
+            outcome, message = 'failed', f'{type(e).__name__}: {getattr(e, "message", e)}'
+            error_fields = get_error_fields(e)
+    duration = time.perf_counter() - start_time
+    return make_result(
+        name, outcome, duration=duration, message=message, group=endpoint, source=source,
+        warnings=[str(warning.message) for warning in caught_warnings] or None, **error_fields
+    )
+
+def get_error_fields(error: Exception) -> Dict:
+    """Returns the fields of the result of a failed check identifying its cause (see
+    `aggregation.failure_signature`): for schema validation errors, the keyword that failed
+    and the JSON pointer of the invalid value."""
+    if hasattr(error, 'validator') and hasattr(error, 'absolute_path'):
+        pointer = ''.join(f'/{str(part).replace("~", "~0").replace("/", "~1")}' for part in error.absolute_path)
+        return {'keyword': error.validator, 'pointer': pointer}
+    return {'keyword': type(error).__name__}
+
+def validate_file(path: str, endpoint: Optional[str] = None) -> Dict:
+    """Validates a DTS API response stored in a JSON file."""
+    try:
+        with open(path, 'rb') as json_file:
+            json_data = loads(json_file.read())
+    except (OSError, ValueError) as e:
+        return make_result(f'{path}::{endpoint or "unknown"}', 'error', message=f'{type(e).__name__}: {e}', group=endpoint or 'unknown', source=path)
+    return check_json_response(json_data, path, endpoint)
+
+def validate_files(paths: Iterable[str], endpoint: Optional[str] = None) -> Iterator[Dict]:
+    for path in paths:
+        yield validate_file(path, endpoint)
+
+def check_http_response(response, source: str, endpoint: str) -> Optional[Dict]:
+    """Returns an error result if an HTTP response is not successful (or None)."""
+    if isinstance(response, Exception):
+        return make_result(f'{source}::{endpoint}', 'error', message=f'{type(response).__name__}: {response}', group=endpoint, source=source)
+    if response is None or response.status_code >= 400:
+        status = response.status_code if response is not None else None
+        return make_result(f'{source}::{endpoint}', 'failed', message=f'HTTP {status}', group=endpoint, source=source)
+    return None
+
+def validate_url(
+        entry_endpoint_uri: str,
+        max_resources: Optional[int] = 1,
+        dts_client=None,
+        snapshot_path: Optional[str] = None,
+        shard=None,
+        journal=None,
+        processes: Optional[int] = None,
+        queue_size: int = 64,
+        pipeline_stats=None,
+        corpus_stats=None,
+        **client_options
+) -> Iterator[Dict]:
+    """Validates a remote DTS API: the Entry endpoint, the root of the Collection endpoint
+    and, for (up to `max_resources`) resources, their Collection, Navigation (`down=1`)
+    and Document responses.
+
+    :param entry_endpoint_uri: The URI of the Entry endpoint.
+    :type entry_endpoint_uri: str
+    :param max_resources: Maximum number of resources to validate, defaults to 1 (None for all)
+    :type max_resources: Optional[int], optional
+    :param dts_client: An existing client for the API, defaults to None (a new one is created)
+    :type dts_client: Optional[DTS_API], optional
+    :param snapshot_path: A snapshot of the API to start from (if the file exists); it is
+        updated once all checks are done, defaults to None
+    :type snapshot_path: Optional[str], optional
+    :param shard: Only validate the resources of this slice of the corpus (the checks of the
+        Entry endpoint and of the root collection are run by every shard), defaults to None
+    :type shard: Optional[Shard], optional
+    :param journal: Where the progress of the sweep is recorded; if it was resumed, the results of
+        the resources it records as validated are yielded again, and those resources are skipped,
+        defaults to None
+    :type journal: Optional[Journal], optional
+    :param processes: Validate the responses in a pipeline (see `pipeline.run_pipeline`), with this
+        many processes (0 for the number of CPUs), defaults to None (the responses of each resource
+        are validated by the thread that fetched them)
+    :type processes: Optional[int], optional
+    :param queue_size: Maximum number of fetched resources waiting for validation in the pipeline, defaults to 64
+    :type queue_size: int, optional
+    :param pipeline_stats: Where the statistics of the stages of the pipeline are recorded, defaults to None
+    :type pipeline_stats: Optional[PipelineStats], optional
+    :param corpus_stats: Where the profile of the corpus is recorded, as the responses are fetched, defaults to None
+    :type corpus_stats: Optional[CorpusStatistics], optional
+    :return: An iterator over the result records of the checks.
+    :rtype: Iterator[Dict]
+    """
+    import itertools
+    from .client import DTS_API
+
+    if dts_client is None:
+        try:
+            if snapshot_path and os.path.exists(snapshot_path):
+                dts_client = DTS_API.from_snapshot(snapshot_path, **client_options)
+            else:
+                dts_client = DTS_API(entry_endpoint_uri, **client_options)
+        except Exception as e:
+            yield make_result(f'{entry_endpoint_uri}::entry', 'error', message=f'{type(e).__name__}: {e}', group='entry', source=entry_endpoint_uri)
+            return
+    if corpus_stats is not None:
+        dts_client.add_listener(corpus_stats.observe)
+
+    def check_entry() -> Dict:
+        # the live Entry endpoint response (not the snapshot's) is validated
+        dts_client.wait_for_freshness_check()
+        return check_json_response(dts_client._entry_endpoint_json, entry_endpoint_uri, 'entry')
+
+    # a client started from a snapshot does not wait for the Entry endpoint before the walk
+    defer_entry_check = dts_client._freshness_check is not None
+    if not defer_entry_check:
+        yield check_entry()
+
+    try:
+        dts_client.collections()
+    except Exception as e:
+        yield make_result('collection root::collection', 'error', message=f'{type(e).__name__}: {e}', group='collection')
+        if defer_entry_check:
+            yield check_entry()
+        return
+    yield check_json_response(dts_client._collection_endpoint_json, 'collection root', 'collection')
+
+    if journal is not None:
+        yield from journal.completed_results()
+    resources = dts_client.iter_resources(shard=shard, state=journal)
+    if max_resources is not None:
+        resources = itertools.islice(resources, max_resources)
+    if processes is not None:
+        from .pipeline import fetch_resource, run_pipeline
+        yield from run_pipeline(
+            dts_client, resources, lambda resource: fetch_resource(dts_client, resource),
+            processes=processes or None, queue_size=queue_size, stats=pipeline_stats,
+            on_resource=journal.record_resource if journal is not None else None
+        )
+    else:
+        for resource, results in dts_client.map(lambda resource: list(check_resource(dts_client, resource)), resources):
+            if isinstance(results, Exception):
+                # not journaled: the resource is validated again when the sweep is resumed
+                yield make_result(f'{resource.id}::resource', 'error', message=f'{type(results).__name__}: {results}', group='collection', source=resource.id)
+                continue
+            if journal is not None:
+                journal.record_resource(resource.id, results)
+            yield from results
+    if defer_entry_check:
+        yield check_entry()
+    LOGGER.info(f'Transfer statistics: {dts_client.transfer_info()}')
+    if snapshot_path:
+        dts_client.dump_snapshot(snapshot_path)
+
+def check_resource(dts_client, resource) -> Iterator[Dict]:
+    """Validates the Collection, Navigation and Document responses for one resource."""
+    yield check_json_response(resource.json, resource.id, 'collection')
+
+    navigation, response = dts_client.navigation(resource=resource, down=1)
+    error = check_http_response(response, resource.id, 'navigation')
+    if error:
+        yield error
+    else:
+        yield check_json_response(navigation._json, resource.id, 'navigation')
+
+    start_time = time.perf_counter()
+    try:
+        document_text, response = dts_client.document(resource=resource)
+    except Exception as e:
+        document_text, response = None, e
+    error = check_http_response(response, resource.id, 'document')
+    yield error or make_result(f'{resource.id}::document', 'passed', duration=time.perf_counter() - start_time, group='document', source=resource.id)
+
+def run(
+        results: Iterable[Dict],
+        sink: Optional[ResultSink] = None,
+        output: Optional[TextIO] = None,
+        quiet: bool = False,
+        max_printed_failures: int = 10
+) -> ResultsSummary:
+    """Consumes the results of the engine: prints them, writes them to `sink` (if any),
+    and returns their summary.
+
+    Failures are grouped by signature (see `aggregation.failure_signature`): only the first
+    `max_printed_failures` failures of each group are printed (all of them are written to
+    `sink`), and the groups are summarized at the end.
+    """
+    output = output or sys.stdout
+    summary = ResultsSummary()
+    aggregator = FailureAggregator()
+    for result in results:
+        summary.add(result)
+        if sink is not None:
+            sink.write(result)
+        failure_group = aggregator.add(result)
+        if failure_group is not None and failure_group.count > max_printed_failures:
+            continue
+        if not quiet or result['outcome'] in FAILED_OUTCOMES:
+            line = f'{result["outcome"].upper():8} {result["name"]}'
+            if result.get('message'):
+                line += f' - {result["message"].splitlines()[0]}'
+            print(line, file=output)
+    if aggregator.failures > len(aggregator.groups()):
+        print(aggregator.format_summary(), file=output)
+    print(f'{summary.count} checks: {summary.total["passed"]} passed, {summary.failures} failed', file=output)
+    memo_summary = VALIDATION_MEMO.summary()
+    if memo_summary:
+        print(memo_summary, file=output)
+    return summary
@@ -0,0 +1,201 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+LOGGER = logging.getLogger()
+
+# above the level of any event: the minimum level of an `EventLog` without sinks
+_NO_SINK_LEVEL = logging.CRITICAL + 1
+
+class Event(NamedTuple):
+    """Something that happened (e.g. a request was sent), as structured fields. Its `message`
+    is a `str.format` template of the fields, only formatted by the sinks that display text."""
+    time: float
+    type: str
+    level: int
+    message: Optional[str]
+    fields: Dict[str, Any]
+
+    def format(self) -> str:
+        if self.message is None:
+            return f'{self.type} ' + ' '.join(f'{key}={value}' for key, value in self.fields.items())
+        try:
+            return self.message.format(**self.fields)
+        except (KeyError, IndexError, ValueError):
+            return f'{self.message} {self.fields}'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'time': round(self.time, 6), 'event': self.type, 'level': logging.getLevelName(self.level), **self.fields}
+
+class EventPolicy(object):
+    """Which events of a type are kept: a deterministic sample (`sample_rate`, e.g. 0.01 keeps
+    one event in 100) and at most `rate_limit` events per second. Not thread-safe on its own
+    (see `EventLog`)."""
+
+    __slots__ = ('sample_rate', 'rate_limit', 'seen', 'kept', 'dropped', '_window', '_window_count')
+
+    def __init__(self, sample_rate: float = 1.0, rate_limit: Optional[float] = None) -> None:
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f'The sample rate must be in (0, 1], not {sample_rate}')
+        self.sample_rate = sample_rate
+        self.rate_limit = rate_limit
+        self.seen = 0
+        self.kept = 0
+        self.dropped = 0
+        self._window = 0
+        self._window_count = 0
+
+    def allow(self, now: float) -> bool:
+        self.seen += 1
+        # keep the events where the running count of sampled events reaches a new integer
+        if self.sample_rate < 1 and int(self.seen * self.sample_rate) == int((self.seen - 1) * self.sample_rate):
+            self.dropped += 1
+            return False
+        if self.rate_limit is not None:
+            window = int(now)
+            if window != self._window:
+                self._window, self._window_count = window, 0
+            if self._window_count >= self.rate_limit:
+                self.dropped += 1
+                return False
+            self._window_count += 1
+        self.kept += 1
+        return True
+
+class JSONLEventSink(object):
+    """Appends the events (at or above `level`) to a JSONL file, one object per event. Only the
+    process that opened the file writes to it (not the workers forked by `validate-dump`)."""
+
+    def __init__(self, path: str, level: int = logging.DEBUG) -> None:
+        self.path = path
+        self.level = level
+        self._file = open(path, 'a', encoding='utf-8')
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def write(self, event: Event) -> None:
+        if os.getpid() != self._pid:
+            return
+        line = json.dumps(event.to_dict(), default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+class LoggingEventSink(object):
+    """Passes the events (at or above `level`) on to a logger (e.g. the pytest live log), as
+    text: events are only formatted if the logger is also enabled for their level."""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO) -> None:
+        self.logger = logger or LOGGER
+        self.level = level
+
+    def write(self, event: Event) -> None:
+        if self.logger.isEnabledFor(event.level):
+            self.logger.log(event.level, event.format())
+
+    def close(self) -> None:
+        pass
+
+class EventLog(object):
+    """Structured events, dispatched to sinks (see `add_sink`). Recording an event that no sink
+    wants costs a comparison with the lowest level of the sinks: nothing is formatted, so that
+    events can be emitted on hot paths (every request, every check). There are no sinks by
+    default; add a `LoggingEventSink` to pass the events on to the logs.
+
+    Events of each type can be sampled and rate-limited (see `configure`); the number of events
+    kept and dropped per type is reported by `stats`.
+    """
+
+    def __init__(self) -> None:
+        self._sinks: List[Any] = []
+        self._min_level = _NO_SINK_LEVEL
+        self._policies: Dict[str, EventPolicy] = {}
+        self._default_policy: Optional[Tuple[float, Optional[float]]] = None
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink) -> None:
+        """Adds a sink: an object with a `level` (the minimum level of the events it wants, read
+        when the sink is added), a `write(event)` method (called concurrently) and a `close()` method."""
+        with self._lock:
+            self._set_sinks(self._sinks + [sink])
+
+    def remove_sink(self, sink) -> None:
+        with self._lock:
+            self._set_sinks([other for other in self._sinks if other is not sink])
+
+    def _set_sinks(self, sinks: List[Any]) -> None:
+        self._sinks = sinks
+        self._min_level = min((sink.level for sink in sinks), default=_NO_SINK_LEVEL)
+
+    def configure(self, event_type: str, sample_rate: float = 1.0, rate_limit: Optional[float] = None) -> None:
+        """Samples the events of `event_type`, and limits them to `rate_limit` per second.
+
+        :param event_type: The type of events (`*` for the types that are not configured otherwise:
+            each of them is sampled and rate-limited on its own).
+        :type event_type: str
+        :param sample_rate: Fraction of the events kept, defaults to 1.0 (all)
+        :type sample_rate: float, optional
+        :param rate_limit: Maximum number of events kept per second, defaults to None (no limit)
+        :type rate_limit: Optional[float], optional
+        """
+        policy = EventPolicy(sample_rate, rate_limit)
+        with self._lock:
+            if event_type == '*':
+                self._default_policy = (sample_rate, rate_limit)
+            else:
+                self._policies[event_type] = policy
+
+    def emit(self, event_type: str, level: int = logging.INFO, message: Optional[str] = None, **fields: Any) -> None:
+        """Records an event (see `Event`), e.g. `EVENTS.emit('request', uri=uri, message='Request to {uri}')`."""
+        if level < self._min_level:
+            return
+        sinks = self._sinks
+        now = time.time()
+        policy = self._policies.get(event_type)
+        if policy is not None or self._default_policy is not None:
+            with self._lock:
+                if policy is None:
+                    policy = self._policies.setdefault(event_type, EventPolicy(*self._default_policy))
+                if not policy.allow(now):
+                    return
+        event = Event(now, event_type, level, message, fields)
+        for sink in sinks:
+            if level >= sink.level:
+                sink.write(event)
+
+    def enabled_for(self, level: int) -> bool:
+        """Whether any sink wants the events of `level`: checking it before `emit` on hot paths
+        also spares building its arguments."""
+        return level >= self._min_level
+
+    def stats(self) -> Dict[str, Tuple[int, int]]:
+        """Returns the number of events kept and dropped, per configured type of events."""
+        with self._lock:
+            return {event_type: (policy.kept, policy.dropped) for event_type, policy in self._policies.items()}
+
+    def close(self) -> None:
+        """Closes and removes the sinks, and forgets the policies."""
+        with self._lock:
+            closed = self._sinks
+            self._set_sinks([])
+            self._policies = {}
+            self._default_policy = None
+        for sink in closed:
+            sink.close()
+
+def parse_event_sample(value: str) -> Tuple[str, float]:
+    """Parses a `TYPE=RATE` sampling option (e.g. `request=0.01`)."""
+    event_type, separator, rate = value.partition('=')
+    if not separator or not event_type:
+        raise ValueError(f'Expected TYPE=RATE, not {value!r}')
+    return event_type, float(rate)
+
+# the events of the validator (the command line and the test suite pass them on to the root
+# logger, at the level it is configured with)
+EVENTS = EventLog()
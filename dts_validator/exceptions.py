@@ -2,4 +2,7 @@ class URITemplateMissingParameter(Exception):
     pass
 
 class JSONResponseMissingProperty(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class DocumentFragmentInvalid(Exception):
+    pass
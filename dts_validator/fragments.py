@@ -0,0 +1,99 @@
+import logging
+from typing import List, Optional
+from .client import DTS_API, DTS_Navigation
+from .exceptions import DocumentFragmentInvalid
+from .validation import validate_document_fragment
+
+LOGGER = logging.getLogger()
+
+class FragmentFailure(object):
+    """A Document request (for a citable unit or a range) that failed."""
+
+    def __init__(self, start: str, end: Optional[str], uri: Optional[str], reason: str) -> None:
+        self.start = start
+        self.end = end
+        self.uri = uri
+        self.reason = reason
+
+    @property
+    def reference(self) -> str:
+        return self.start if self.end is None else f'{self.start}-{self.end}'
+
+    def __repr__(self) -> str:
+        return f'FragmentFailure(reference={self.reference}, reason={self.reason})'
+
+class FragmentValidationReport(object):
+    """Aggregated results of the validation of the Document fragments of a Navigation response."""
+
+    def __init__(self, navigation: DTS_Navigation) -> None:
+        self.navigation = navigation
+        self.checked = 0
+        self.failures: List[FragmentFailure] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    def summary(self) -> str:
+        lines = [f'{self.navigation.resource}: {self.checked - len(self.failures)}/{self.checked} Document fragments are valid']
+        lines += [f'  - {failure.reference}: {failure.reason} ({failure.uri})' for failure in self.failures]
+        return '\n'.join(lines)
+
+    def __repr__(self) -> str:
+        return f'FragmentValidationReport(checked={self.checked}, failures={len(self.failures)})'
+
+def validate_document_fragments(
+        dts_client: DTS_API,
+        navigation: DTS_Navigation,
+        sample: Optional[int] = None,
+        range_size: Optional[int] = None,
+        seed: Optional[int] = None,
+        max_workers: Optional[int] = None
+) -> FragmentValidationReport:
+    """Fetches concurrently the Document fragments of (a sample of) the citable units
+    advertised by a Navigation response, and validates each of them as soon as it is received.
+    Failures (HTTP errors, malformed XML, missing or empty `<dts:wrapper>`) are collected into
+    a report, rather than raised.
+
+    :param dts_client: The client of the DTS API being validated.
+    :type dts_client: DTS_API
+    :param navigation: The Navigation object whose citable units are to be checked.
+    :type navigation: DTS_Navigation
+    :param sample: Check only a random sample of `sample` units (or ranges), defaults to None (all)
+    :type sample: Optional[int], optional
+    :param range_size: Number of contiguous units fetched per `start`/`end` request, defaults to None (one `ref` request per unit)
+    :type range_size: Optional[int], optional
+    :param seed: Seed of the random sampling, defaults to None
+    :type seed: Optional[int], optional
+    :param max_workers: Number of concurrent requests, defaults to None (`max_concurrency`)
+    :type max_workers: Optional[int], optional
+    :return: The aggregated validation results.
+    :rtype: FragmentValidationReport
+    """
+    report = FragmentValidationReport(navigation)
+    results = dts_client.documents(navigation, sample=sample, range_size=range_size, seed=seed, max_workers=max_workers)
+
+    for (start, end), document_text, response in results:
+        report.checked += 1
+        failure = check_fragment_response(document_text, response)
+        if failure:
+            uri = getattr(response, 'url', None)
+            report.failures.append(FragmentFailure(start.id, end.id if end else None, uri, failure))
+
+    if report.ok:
+        LOGGER.info(f'{navigation.resource}: all {report.checked} Document fragments are valid')
+    else:
+        LOGGER.error(report.summary())
+    return report
+
+def check_fragment_response(document_text: Optional[str], response) -> Optional[str]:
+    """Returns the reason why a Document fragment response is invalid (or None if it is valid)."""
+    if isinstance(response, Exception):
+        return f'{type(response).__name__}: {response}'
+    if response.status_code >= 400:
+        return f'HTTP {response.status_code}'
+    try:
+        validate_document_fragment(document_text)
+    except DocumentFragmentInvalid as e:
+        return str(e)
+    return None
@@ -0,0 +1,206 @@
+import json
+import logging
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from .client import DTS_API, DTS_Resource
+
+LOGGER = logging.getLogger()
+
+# identifiers that no DTS API is expected to know
+UNKNOWN_RESOURCE = 'urn:dts-validator:unknown-resource'
+UNKNOWN_REFERENCE = 'dts-validator-unknown-reference'
+
+class ParameterCase(NamedTuple):
+    """A request to the Navigation or Document endpoint, with the HTTP status the specifications
+    require for its combination of parameters (200 for the valid ones)."""
+    endpoint: str
+    resource: str
+    name: str
+    parameters: Dict[str, str]
+    expected_status: int
+
+class ParameterFailure(NamedTuple):
+    """A request whose response does not have the expected status (or error body)."""
+    case: ParameterCase
+    uri: Optional[str]
+    reason: str
+
+class ParameterFuzzReport(object):
+    """Aggregated results of the requests with valid and invalid combinations of parameters."""
+
+    def __init__(self, endpoint: str, error_budget: Optional[int] = None) -> None:
+        self.endpoint = endpoint
+        self.error_budget = error_budget
+        self.checked = 0
+        self.failures: List[ParameterFailure] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    @property
+    def budget_exhausted(self) -> bool:
+        return self.error_budget is not None and len(self.failures) >= self.error_budget
+
+    def summary(self) -> str:
+        lines = [f'{self.endpoint}: {self.checked - len(self.failures)}/{self.checked} parameter combinations are handled as specified']
+        if self.budget_exhausted:
+            lines[0] += f' (stopped after {self.error_budget} failures)'
+        lines += [
+            f'  - {failure.case.resource} {failure.case.name}: {failure.reason} ({failure.uri})'
+            for failure in self.failures
+        ]
+        return '\n'.join(lines)
+
+    def __repr__(self) -> str:
+        return f'ParameterFuzzReport(endpoint={self.endpoint}, checked={self.checked}, failures={len(self.failures)})'
+
+def parameter_cases(
+        endpoint: str,
+        template_variables: Iterable[str],
+        resource_id: str,
+        references: List[str]
+) -> List[ParameterCase]:
+    """Returns the valid and invalid combinations of the parameters of the Navigation or Document
+    endpoint, for a resource and (up to two of) its citable units. Only the parameters of the
+    endpoint's URI template are combined (e.g. there are no `start`/`end` requests for an API
+    whose templates do not advertise them).
+
+    The expected statuses are those of the specifications: 400 for a request without `resource`,
+    with `ref` together with `start` or `end`, with only one of `start` and `end`, or (Navigation)
+    with none of `ref`, `start`, `end` and `down`; 404 for an unknown resource or citable unit.
+
+    :param endpoint: `navigation` or `document`.
+    :type endpoint: str
+    :param template_variables: The variables of the URI template of the endpoint.
+    :type template_variables: Iterable[str]
+    :param resource_id: The ID of the resource requested.
+    :type resource_id: str
+    :param references: Identifiers of citable units of the resource (the first two are used).
+    :type references: List[str]
+    :return: The requests to send.
+    :rtype: List[ParameterCase]
+    """
+    variables = set(template_variables)
+    navigation = endpoint == 'navigation'
+    first = references[0] if references else None
+    last = references[1] if len(references) > 1 else first
+    # the smallest request the endpoint answers (the Navigation endpoint needs `down` without a `ref`)
+    base = {'resource': resource_id, 'down': '1'} if navigation else {'resource': resource_id}
+    candidates: List[Tuple[str, Dict[str, Optional[str]], int]] = [
+        ('resource only' if not navigation else 'down without ref', base, 200),
+        ('unknown resource', dict(base, resource=UNKNOWN_RESOURCE), 404),
+        ('missing resource', {key: value for key, value in base.items() if key != 'resource'}, 400),
+        ('ref', {'resource': resource_id, 'ref': first}, 200),
+        ('unknown ref', {'resource': resource_id, 'ref': UNKNOWN_REFERENCE}, 404),
+        ('start and end', {'resource': resource_id, 'start': first, 'end': last}, 200),
+        ('ref with start and end', {'resource': resource_id, 'ref': first, 'start': first, 'end': last}, 400),
+        ('ref with end', {'resource': resource_id, 'ref': first, 'end': last}, 400),
+        ('start without end', {'resource': resource_id, 'start': first}, 400),
+        ('end without start', {'resource': resource_id, 'end': last}, 400),
+    ]
+    if navigation:
+        candidates += [
+            ('ref with down', {'resource': resource_id, 'ref': first, 'down': '1'}, 200),
+            ('no ref, start, end or down', {'resource': resource_id}, 400),
+        ]
+
+    cases = []
+    for name, parameters, expected_status in candidates:
+        if any(value is None for value in parameters.values()):
+            # the resource has no citable units to refer to
+            continue
+        if not set(parameters) <= variables:
+            continue
+        cases.append(ParameterCase(endpoint, resource_id, name, parameters, expected_status))
+    return cases
+
+def check_parameter_response(case: ParameterCase, response) -> Optional[str]:
+    """Returns the reason why the response to a request of `parameter_cases` is not the one
+    specified (or None if it is)."""
+    if isinstance(response, Exception):
+        return f'{type(response).__name__}: {response}'
+    if response.status_code != case.expected_status:
+        return f'expected HTTP {case.expected_status}, got HTTP {response.status_code}'
+    if case.expected_status >= 400 and response.content and 'json' in response.headers.get('Content-Type', ''):
+        # error bodies are not specified, but a JSON error must be valid JSON, and not a regular response
+        try:
+            error_body = json.loads(response.content)
+        except ValueError:
+            return f'HTTP {response.status_code} with an invalid JSON body'
+        if isinstance(error_body, dict) and error_body.get('@type') in ('Navigation', 'Resource'):
+            return f'HTTP {response.status_code} with the body of a successful response'
+    return None
+
+def get_references(dts_client: DTS_API, resource: DTS_Resource, count: int = 2) -> List[str]:
+    """Returns the identifiers of the first `count` top-level citable units of a resource."""
+    navigation, _ = dts_client.navigation(resource, down=1)
+    if navigation is None:
+        return []
+    return [unit.id for unit in navigation.citable_units[:count]]
+
+def fuzz_parameters(
+        dts_client: DTS_API,
+        resources: Iterable[DTS_Resource],
+        endpoint: str,
+        error_budget: Optional[int] = 20,
+        max_workers: Optional[int] = None
+) -> ParameterFuzzReport:
+    """Sends concurrently, for each resource, the requests of `parameter_cases` to the Navigation
+    or Document endpoint (derived from its URI template in the Entry endpoint), and checks the
+    status and error body of their responses. Resources are consumed lazily, and the requests
+    stop as soon as `error_budget` failures have been found (a server that ignores invalid
+    parameters fails most cases, on every resource).
+
+    :param dts_client: The client of the DTS API being validated.
+    :type dts_client: DTS_API
+    :param resources: The resources to request.
+    :type resources: Iterable[DTS_Resource]
+    :param endpoint: `navigation` or `document`.
+    :type endpoint: str
+    :param error_budget: Stop after this many failures, defaults to 20 (None for no limit)
+    :type error_budget: Optional[int], optional
+    :param max_workers: Number of concurrent requests, defaults to None (the `max_concurrency` of the client)
+    :type max_workers: Optional[int], optional
+    :return: The aggregated results.
+    :rtype: ParameterFuzzReport
+    """
+    template = dts_client._navigation_endpoint_template if endpoint == 'navigation' else dts_client._document_endpoint_template
+    report = ParameterFuzzReport(endpoint, error_budget)
+
+    def iter_cases() -> Iterator[ParameterCase]:
+        sent_once = set()
+        for resource, references in dts_client.map(lambda resource: get_references(dts_client, resource), resources, max_workers=max_workers):
+            if isinstance(references, Exception):
+                LOGGER.warning(f'Cannot get the citable units of {resource.id}: {references}')
+                references = []
+            for case in parameter_cases(endpoint, template.variable_names, resource.id, references):
+                if case.parameters.get('resource') != resource.id:
+                    # the requests for an unknown (or no) resource are the same for every resource
+                    if case.name in sent_once:
+                        continue
+                    sent_once.add(case.name)
+                yield case
+
+    def send(case: ParameterCase):
+        uri = template.expand(case.parameters)
+        return uri, dts_client._get(uri)
+
+    results = dts_client.map(send, iter_cases(), max_workers=max_workers)
+    try:
+        for case, outcome in results:
+            uri, response = (None, outcome) if isinstance(outcome, Exception) else outcome
+            report.checked += 1
+            failure = check_parameter_response(case, response)
+            if failure:
+                report.failures.append(ParameterFailure(case, uri, failure))
+                if report.budget_exhausted:
+                    LOGGER.warning(f'{endpoint}: error budget of {error_budget} failures exhausted; stopping')
+                    break
+    finally:
+        results.close()
+
+    if report.ok:
+        LOGGER.info(f'{endpoint}: all {report.checked} parameter combinations are handled as specified')
+    else:
+        LOGGER.error(report.summary())
+    return report
@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+from .client import CrawlState
+
+LOGGER = logging.getLogger()
+
+JOURNAL_VERSION = 1
+
+class Journal(CrawlState):
+    """Append-only journal of a validation sweep, from which an interrupted sweep can be resumed.
+
+    Each step of the walk of the collection tree (the children added to the frontier) and each
+    validated resource (with its results) is appended as one JSON line, flushed as soon as it is
+    written (and synced to disk every `sync_interval` seconds). A line torn by a crash is dropped
+    when the journal is loaded again, so that a resumed sweep only repeats the resources that were
+    in flight.
+    """
+
+    def __init__(self, path: str, key: Dict[str, Any], resume: bool = False, sync_interval: float = 5.0) -> None:
+        """
+        :param path: The journal file.
+        :type path: str
+        :param key: What identifies the sweep (e.g. the Entry endpoint and the shard); a journal
+            recorded for another sweep is not resumed.
+        :type key: Dict[str, Any]
+        :param resume: Resume the sweep recorded in `path` (if any), defaults to False (start over)
+        :type resume: bool, optional
+        :param sync_interval: Maximum time (in seconds) between two syncs of the journal to disk, defaults to 5.0
+        :type sync_interval: float, optional
+        """
+        super().__init__()
+        self.path = path
+        self.key = key
+        self.sync_interval = sync_interval
+        self.resumed = False
+        self._lock = threading.Lock()
+        self._last_sync = time.monotonic()
+
+        if resume and os.path.exists(path) and self._load():
+            self.resumed = True
+            self._file = open(path, 'ab')
+            LOGGER.warning(f'Resuming the sweep recorded in {path}: {len(self.done)} resources already validated, {len(self.frontier)} left in the frontier')
+        else:
+            self._file = open(path, 'wb')
+            self._append({'event': 'start', 'version': JOURNAL_VERSION, 'key': key})
+
+    def _iter_records(self) -> Iterator[Dict]:
+        """Yields the complete records of the journal file (stopping at a torn line, if any),
+        and records in `_complete_size` the size of the file up to the last complete record."""
+        self._complete_size = 0
+        with open(self.path, 'rb') as journal_file:
+            for line in journal_file:
+                if not line.endswith(b'\n'):
+                    return
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    return
+                self._complete_size += len(line)
+                yield record
+
+    def _load(self) -> bool:
+        records = self._iter_records()
+        header = next(records, None)
+        if header is None or header.get('version') != JOURNAL_VERSION or header.get('key') != self.key:
+            LOGGER.warning(f'{self.path} is not a journal of this sweep; starting over')
+            return False
+
+        discovered: List[str] = []
+        expanded = set()
+        for record in records:
+            if record['event'] == 'expand':
+                if record['id'] is not None:
+                    expanded.add(record['id'])
+                discovered.extend(record['children'])
+            elif record['event'] == 'resource':
+                self.done.add(record['id'])
+        self.visited = set(discovered)
+        self.frontier.extend(item_id for item_id in discovered if item_id not in expanded and item_id not in self.done)
+        # drop the torn line (if any) before appending
+        self._resumed_size = self._complete_size
+        with open(self.path, 'rb+') as journal_file:
+            journal_file.truncate(self._resumed_size)
+        return True
+
+    def _append(self, record: Dict) -> None:
+        line = (json.dumps(record, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if time.monotonic() - self._last_sync >= self.sync_interval:
+                os.fsync(self._file.fileno())
+                self._last_sync = time.monotonic()
+
+    def expanded(self, collection_id: Optional[str], children: List[str]) -> None:
+        self._append({'event': 'expand', 'id': collection_id, 'children': children})
+
+    def record_resource(self, resource_id: str, results: List[Dict]) -> None:
+        """Records that a resource was validated, with its results (in one line, so that a crash
+        cannot leave a resource half-recorded)."""
+        self._append({'event': 'resource', 'id': resource_id, 'results': results})
+        self.done.add(resource_id)
+
+    def completed_results(self) -> Iterator[Dict]:
+        """Yields the results of the resources validated before the sweep was resumed (they are
+        read back from the journal, rather than kept in memory)."""
+        if not self.resumed:
+            return
+        for record in self._iter_records():
+            # stop at the records appended since the sweep was resumed
+            if self._complete_size > self._resumed_size:
+                return
+            if record.get('event') == 'resource':
+                yield from record['results']
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def __enter__(self) -> 'Journal':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,230 @@
+import hashlib
+import html
+import json
+import logging
+import os
+import pathlib
+import threading
+from importlib import metadata
+from collections import OrderedDict, namedtuple
+from typing import Any, Dict, Optional, Tuple
+
+LOGGER = logging.getLogger()
+
+MEMO_VERSION = 1
+
+SCHEMAS_DIR = (pathlib.Path(__file__) / ".." / ".." / "schemas").resolve()
+
+MemoInfo = namedtuple('MemoInfo', ['hits', 'disk_hits', 'misses', 'maxsize', 'currsize', 'persisted'])
+
+# the key of a memoized outcome: (hash of the schema, hash of the canonical response)
+MemoKey = Tuple[str, str]
+
+# returned by `ValidationMemo.get` for a key whose outcome is not memoized
+MISSING = object()
+
+def content_hash(json_data: Any) -> str:
+    """Returns the hash of the canonical serialization of a JSON document (keys sorted, no
+    whitespace), so that responses differing only in key order or formatting share a hash."""
+    canonical = json.dumps(json_data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+def schemas_fingerprint(schemas_dir: pathlib.Path = SCHEMAS_DIR) -> str:
+    """Returns the hash of what the persisted outcomes depend on beyond the top-level schema
+    of their key: every schema of `schemas_dir` (the targets of the `$ref`s of the others) and
+    the versions of this package and of `jsonschema` (which reports the errors)."""
+    digest = hashlib.sha1()
+    for schema_path in sorted(schemas_dir.glob('*.schema.json')):
+        digest.update(schema_path.name.encode('utf-8') + b'\0' + schema_path.read_bytes() + b'\0')
+    for distribution in ('dts-validator', 'jsonschema'):
+        try:
+            version = metadata.version(distribution)
+        except metadata.PackageNotFoundError:
+            version = ''
+        digest.update(f'{distribution}={version}\0'.encode('utf-8'))
+    return digest.hexdigest()
+
+def serialize_error(error) -> Dict:
+    """Returns what is needed to raise `error` (a `jsonschema.ValidationError`) again for an
+    identical response: the instance it is about is not stored, as it can be found again
+    in the response at `path`."""
+    return {
+        'message': error.message,
+        'validator': error.validator,
+        'validator_value': error.validator_value,
+        'path': list(error.absolute_path),
+        'schema_path': list(error.absolute_schema_path),
+        'schema': error.schema,
+    }
+
+def deserialize_error(outcome: Dict, json_data: Any):
+    """Rebuilds the `jsonschema.ValidationError` memoized as `outcome` for the response `json_data`."""
+    from jsonschema.exceptions import ValidationError
+
+    instance = json_data
+    for part in outcome['path']:
+        instance = instance[part]
+    return ValidationError(
+        outcome['message'],
+        validator=outcome['validator'],
+        validator_value=outcome['validator_value'],
+        path=outcome['path'],
+        schema_path=outcome['schema_path'],
+        schema=outcome['schema'],
+        instance=instance,
+    )
+
+class ValidationMemo(object):
+    """Thread-safe memo of the outcomes of JSON schema validations, keyed by the hash of the
+    schema and the hash of the canonical response: byte-identical (or equivalent) responses
+    served for different URLs (e.g. a resource reached through several parent collections) are
+    validated once.
+
+    Outcomes are kept in a bounded LRU for the session, and can be persisted across runs to an
+    append-only JSONL file (see `open`). An outcome is None for a valid response, or the
+    serialized error (see `serialize_error`) for an invalid one.
+    """
+
+    def __init__(self, maxsize: int = 16384) -> None:
+        """
+        :param maxsize: Maximum number of outcomes kept in memory (0 disables the memo), defaults to 16384
+        :type maxsize: int, optional
+        """
+        self.maxsize = maxsize
+        self.path: Optional[str] = None
+        self._entries: OrderedDict = OrderedDict()
+        self._persisted: Dict[MemoKey, Optional[Dict]] = {}
+        self._file = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 or self._file is not None
+
+    def open(self, path: str, fingerprint: Optional[str] = None) -> None:
+        """Loads the outcomes persisted in `path` (if it exists), and appends the new ones to it.
+        Only the process that opened the file writes to it (the workers forked by `validate-dump`
+        read the outcomes loaded before they were forked). A file written for other schemas (or
+        other versions, see `schemas_fingerprint`) is discarded: its outcomes may be wrong.
+
+        :param path: The JSONL file the outcomes are persisted to.
+        :type path: str
+        :param fingerprint: What the outcomes depend on, defaults to None (`schemas_fingerprint()`)
+        :type fingerprint: Optional[str], optional
+        """
+        self.close()
+        path = os.path.expanduser(path)
+        if fingerprint is None:
+            fingerprint = schemas_fingerprint()
+        expected_header = {'version': MEMO_VERSION, 'schemas': fingerprint}
+        persisted = {}
+        torn = False
+        if os.path.exists(path):
+            with open(path, 'rb') as memo_file:
+                header = None
+                for line in memo_file:
+                    torn = not line.endswith(b'\n')
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # a line torn by an interrupted run
+                        continue
+                    if header is None:
+                        header = record
+                        if header != expected_header:
+                            break
+                        continue
+                    persisted[(record['schema'], record['content'])] = record['outcome']
+            if header is None or header.get('version') != MEMO_VERSION:
+                LOGGER.warning(f'{path} is not a validation memo of this version; starting over')
+                persisted = {}
+                os.remove(path)
+            elif header != expected_header:
+                LOGGER.warning(f'{path} was written for other schemas (or versions); starting over')
+                persisted = {}
+                os.remove(path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        new_file = not os.path.exists(path)
+        with self._lock:
+            self.path = path
+            self._persisted = persisted
+            self._pid = os.getpid()
+            self._file = open(path, 'a', encoding='utf-8')
+            if new_file:
+                self._file.write(json.dumps(expected_header) + '\n')
+            elif torn:
+                self._file.write('\n')
+        LOGGER.info(f'Loaded {len(persisted)} validation outcomes from {path}')
+
+    def get(self, key: MemoKey) -> Any:
+        """Returns the outcome memoized for `key`, or `MISSING`."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key]
+            if key in self._persisted:
+                self._disk_hits += 1
+                outcome = self._persisted[key]
+                self._remember(key, outcome)
+                return outcome
+            self._misses += 1
+            return MISSING
+
+    def put(self, key: MemoKey, outcome: Optional[Dict]) -> None:
+        with self._lock:
+            self._remember(key, outcome)
+            if self._file is not None and self._pid == os.getpid() and key not in self._persisted:
+                self._persisted[key] = outcome
+                self._file.write(json.dumps({'schema': key[0], 'content': key[1], 'outcome': outcome}, default=str) + '\n')
+
+    def _remember(self, key: MemoKey, outcome: Optional[Dict]) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = outcome
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def info(self) -> MemoInfo:
+        with self._lock:
+            return MemoInfo(self._hits, self._disk_hits, self._misses, self.maxsize, len(self._entries), len(self._persisted))
+
+    def clear(self) -> None:
+        """Forgets the outcomes kept in memory, and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._disk_hits = self._misses = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._persisted = {}
+            self.path = None
+
+    def summary(self) -> Optional[str]:
+        """Returns a one-line summary of the hit rate of the memo (or None if it was not used)."""
+        info = self.info()
+        lookups = info.hits + info.disk_hits + info.misses
+        if not lookups:
+            return None
+        hit_rate = (info.hits + info.disk_hits) / lookups
+        return (
+            f'Validation memo: {info.hits + info.disk_hits} hits ({info.disk_hits} from disk), '
+            f'{info.misses} misses, hit rate {hit_rate:.1%}'
+        )
+
+    def html_sections(self) -> Dict[str, str]:
+        """Returns the section of the HTML report on the hit rate of the memo (if it was used)."""
+        summary = self.summary()
+        return {'Validation memo': f'<p>{html.escape(summary)}</p>'} if summary else {}
+
+VALIDATION_MEMO = ValidationMemo()
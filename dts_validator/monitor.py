@@ -0,0 +1,248 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from .engine import validate_url
+from .reporting import FAILED_OUTCOMES, ResultSink, make_result
+
+LOGGER = logging.getLogger()
+
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class EndpointState(object):
+    """What the monitor keeps between two cycles for one DTS API."""
+
+    def __init__(self, entry_endpoint_uri: str) -> None:
+        self.entry_endpoint_uri = entry_endpoint_uri
+        self.dts_client = None
+        self.up = False
+        self.outcomes: Dict[str, str] = {}
+        self.counts: Counter = Counter()
+        self.group_durations: Counter = Counter()
+        self.cycle_duration = 0.0
+        self.last_cycle = 0.0
+        self.cycles = 0
+        self.regressions = 0
+
+def detect_regressions(previous: Dict[str, str], current: Dict[str, str]) -> List[str]:
+    """Returns the names of the checks that passed in the previous cycle and fail now."""
+    return sorted(
+        name for name, outcome in current.items()
+        if outcome in FAILED_OUTCOMES and previous.get(name) == 'passed'
+    )
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Monitor(object):
+    """Validates a set of DTS APIs on a schedule, in a long-running process.
+
+    The clients (with their connection pools, throttles and response caches) are kept from one
+    cycle to the next: responses are revalidated with conditional requests (`ETag`/`Last-Modified`)
+    rather than downloaded again, and schema validators stay compiled. After each cycle, health
+    and latency metrics are exported in the Prometheus text format, and checks that passed in the
+    previous cycle but fail now are reported as regressions.
+    """
+
+    def __init__(
+            self,
+            entry_endpoints: Iterable[str],
+            interval: float = 300,
+            max_resources: Optional[int] = 1,
+            metrics_path: Optional[str] = None,
+            alert_webhook: Optional[str] = None,
+            sink: Optional[ResultSink] = None,
+            **client_options
+    ) -> None:
+        """
+        :param entry_endpoints: The URIs of the Entry endpoints of the APIs to monitor.
+        :type entry_endpoints: Iterable[str]
+        :param interval: Time (in seconds) between the start of two cycles, defaults to 300
+        :type interval: float, optional
+        :param max_resources: Number of resources validated per API and cycle, defaults to 1
+        :type max_resources: Optional[int], optional
+        :param metrics_path: File the metrics are written to after each cycle (e.g. for the
+            textfile collector of the Prometheus node exporter), defaults to None
+        :type metrics_path: Optional[str], optional
+        :param alert_webhook: URL to which regressions are POSTed (as JSON), defaults to None
+        :type alert_webhook: Optional[str], optional
+        :param sink: Where the results of all cycles are streamed, defaults to None
+        :type sink: Optional[ResultSink], optional
+        """
+        self.endpoints = [EndpointState(uri) for uri in entry_endpoints]
+        self.interval = interval
+        self.max_resources = max_resources
+        self.metrics_path = metrics_path
+        self.alert_webhook = alert_webhook
+        self.sink = sink
+        self.client_options = client_options
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def check_endpoint(self, state: EndpointState) -> List[Dict]:
+        """Runs one validation cycle for one API, and returns its results."""
+        from .client import DTS_API
+
+        try:
+            if state.dts_client is None:
+                state.dts_client = DTS_API(state.entry_endpoint_uri, **self.client_options)
+            else:
+                state.dts_client.refresh()
+        except Exception as e:
+            LOGGER.error(f'{state.entry_endpoint_uri} is unreachable: {type(e).__name__}: {e}')
+            return [make_result(
+                f'{state.entry_endpoint_uri}::entry', 'error', message=f'{type(e).__name__}: {e}',
+                group='entry', source=state.entry_endpoint_uri
+            )]
+        return list(validate_url(state.entry_endpoint_uri, max_resources=self.max_resources, dts_client=state.dts_client))
+
+    def run_cycle(self) -> List[Tuple[str, List[str]]]:
+        """Validates all the APIs once, updates the metrics, and reports regressions.
+
+        :return: The regressions of the cycle, as `(entry endpoint, check names)` pairs.
+        :rtype: List[Tuple[str, List[str]]]
+        """
+        all_regressions = []
+        for state in self.endpoints:
+            start_time = time.perf_counter()
+            results = self.check_endpoint(state)
+            outcomes = {result['name']: result['outcome'] for result in results}
+            regressions = detect_regressions(state.outcomes, outcomes)
+
+            with self._lock:
+                state.cycle_duration = time.perf_counter() - start_time
+                state.last_cycle = time.time()
+                state.cycles += 1
+                state.regressions += len(regressions)
+                state.up = not any(result['group'] == 'entry' and result['outcome'] == 'error' for result in results)
+                state.outcomes = outcomes
+                state.counts = Counter(result['outcome'] for result in results)
+                state.group_durations = Counter()
+                for result in results:
+                    state.group_durations[result['group']] += result['duration'] or 0.0
+
+            if self.sink is not None:
+                for result in results:
+                    result.update(endpoint=state.entry_endpoint_uri, cycle=state.cycles)
+                    self.sink.write(result)
+            LOGGER.info(f'{state.entry_endpoint_uri}: {dict(state.counts)} in {state.cycle_duration:.2f}s')
+            if regressions:
+                self.alert(state.entry_endpoint_uri, regressions, results)
+                all_regressions.append((state.entry_endpoint_uri, regressions))
+
+        if self.metrics_path:
+            self.write_metrics(self.metrics_path)
+        return all_regressions
+
+    def alert(self, entry_endpoint_uri: str, regressions: List[str], results: List[Dict]) -> None:
+        """Reports the checks of an API that regressed (in the log, and to the webhook if any)."""
+        messages = {result['name']: result['message'] for result in results}
+        for name in regressions:
+            message = (messages.get(name) or '').split('\n', 1)[0]
+            LOGGER.error(f'Regression on {entry_endpoint_uri}: {name} - {message}')
+        if self.alert_webhook:
+            import requests
+            try:
+                requests.post(self.alert_webhook, timeout=10, json={
+                    'endpoint': entry_endpoint_uri,
+                    'regressions': [{'name': name, 'message': messages.get(name)} for name in regressions],
+                })
+            except requests.exceptions.RequestException as e:
+                LOGGER.warning(f'Could not send the alert to {self.alert_webhook}: {e}')
+
+    def metrics(self) -> str:
+        """Returns the metrics of the last cycle, in the Prometheus text exposition format."""
+        families = {
+            'dts_validator_up': ('gauge', 'Whether the Entry endpoint could be fetched in the last cycle.', []),
+            'dts_validator_checks': ('gauge', 'Number of checks of the last cycle, by outcome.', []),
+            'dts_validator_check_duration_seconds': ('gauge', 'Time spent on the checks of the last cycle, by endpoint type.', []),
+            'dts_validator_cycle_duration_seconds': ('gauge', 'Duration of the last validation cycle.', []),
+            'dts_validator_last_cycle_timestamp_seconds': ('gauge', 'When the last validation cycle ended.', []),
+            'dts_validator_request_latency_seconds': ('gauge', 'Smoothed latency of the requests sent to each host.', []),
+            'dts_validator_cycles_total': ('counter', 'Number of validation cycles.', []),
+            'dts_validator_regressions_total': ('counter', 'Number of checks that regressed from one cycle to the next.', []),
+            'dts_validator_cache_hits_total': ('counter', 'Number of requests answered by the response cache.', []),
+            'dts_validator_cache_misses_total': ('counter', 'Number of requests sent to the API.', []),
+            'dts_validator_revalidated_total': ('counter', 'Number of requests answered with 304 Not Modified.', []),
+            'dts_validator_received_bytes_total': ('counter', 'Size of the response bodies received, on the wire and once decompressed.', []),
+        }
+
+        def add(name: str, value: float, **labels) -> None:
+            label_text = ','.join(f'{key}="{escape_label(str(label))}"' for key, label in labels.items())
+            families[name][2].append(f'{name}{{{label_text}}} {value}')
+
+        with self._lock:
+            for state in self.endpoints:
+                endpoint = state.entry_endpoint_uri
+                add('dts_validator_up', int(state.up), endpoint=endpoint)
+                for outcome, count in sorted(state.counts.items()):
+                    add('dts_validator_checks', count, endpoint=endpoint, outcome=outcome)
+                for group, duration in sorted(state.group_durations.items()):
+                    add('dts_validator_check_duration_seconds', round(duration, 6), endpoint=endpoint, group=group)
+                add('dts_validator_cycle_duration_seconds', round(state.cycle_duration, 6), endpoint=endpoint)
+                add('dts_validator_last_cycle_timestamp_seconds', round(state.last_cycle, 3), endpoint=endpoint)
+                add('dts_validator_cycles_total', state.cycles, endpoint=endpoint)
+                add('dts_validator_regressions_total', state.regressions, endpoint=endpoint)
+                if state.dts_client is not None:
+                    cache_info = state.dts_client.cache_info()
+                    add('dts_validator_cache_hits_total', cache_info.hits + cache_info.coalesced, endpoint=endpoint)
+                    add('dts_validator_cache_misses_total', cache_info.misses, endpoint=endpoint)
+                    add('dts_validator_revalidated_total', state.dts_client.revalidated, endpoint=endpoint)
+                    transfer_info = state.dts_client.transfer_info()
+                    add('dts_validator_received_bytes_total', transfer_info.wire_bytes, endpoint=endpoint, stage='wire')
+                    add('dts_validator_received_bytes_total', transfer_info.body_bytes, endpoint=endpoint, stage='decoded')
+                    for host, throttle in list(state.dts_client._throttles.items()):
+                        if throttle.controller.latency is not None:
+                            add('dts_validator_request_latency_seconds', round(throttle.controller.latency, 6), endpoint=endpoint, host=host)
+
+        lines = []
+        for name, (metric_type, description, samples) in families.items():
+            if samples:
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} {metric_type}'] + samples
+        return '\n'.join(lines) + '\n'
+
+    def write_metrics(self, path: str) -> None:
+        """Writes the metrics to `path`, atomically (so that collectors never read a partial file)."""
+        tmp_path = f'{path}.tmp{os.getpid()}'
+        with open(tmp_path, 'w', encoding='utf-8') as metrics_file:
+            metrics_file.write(self.metrics())
+        os.replace(tmp_path, path)
+
+    def run(self, cycles: Optional[int] = None) -> None:
+        """Runs validation cycles every `interval` seconds, until `stop` is called (or `cycles` are done)."""
+        cycle = 0
+        while not self._stop.is_set():
+            start_time = time.monotonic()
+            self.run_cycle()
+            cycle += 1
+            if cycles is not None and cycle >= cycles:
+                break
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - start_time)))
+
+    def stop(self) -> None:
+        self._stop.set()
+
+def serve_metrics(monitor: Monitor, port: int, host: str = '') -> ThreadingHTTPServer:
+    """Serves the metrics of `monitor` over HTTP (at `/metrics`), from a background thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = monitor.metrics().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', METRICS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            LOGGER.debug(f'Metrics server: {format % args}')
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='dts-metrics-server', daemon=True).start()
+    return server
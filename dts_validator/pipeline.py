@@ -0,0 +1,319 @@
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from .decoding import loads
+from .engine import check_http_response, check_json_response
+from .reporting import make_result
+
+LOGGER = logging.getLogger()
+
+class Task(NamedTuple):
+    """A response to validate in the validation stage: `content` is the JSON response, either
+    as fetched (bytes, decoded by the validator) or already decoded."""
+    source: str
+    endpoint: str
+    content: Union[bytes, Dict]
+
+class ResourceWork(NamedTuple):
+    """What the fetch stage produced for one resource: its checks, in order, as tasks for the
+    validation stage or as results already known (e.g. HTTP errors). If `failed`, the resource
+    could not be fetched (its results are not passed to `on_resource`)."""
+    resource_id: str
+    checks: List[Union[Task, Dict]]
+    failed: bool = False
+
+# the end of the stream of resources, on the queue between the two stages
+_DONE = object()
+
+def fetch_resource(dts_client, resource) -> ResourceWork:
+    """Fetches the responses needed by the checks of one resource (see `engine.check_resource`):
+    its Collection and Navigation (`down=1`) responses are left to the validation stage, while
+    the Document response is only checked for its HTTP status."""
+    checks: List[Union[Task, Dict]] = [Task(resource.id, 'collection', resource.json)]
+
+    response = dts_client._get(dts_client.navigation_uri(resource, down=1))
+    error = check_http_response(response, resource.id, 'navigation')
+    content = response.content
+    if error is None and dts_client._listeners:
+        # the listeners (e.g. the corpus statistics) need the decoded response: it is decoded
+        # once, here, and passed decoded to the validation stage as well
+        try:
+            content = loads(response.content)
+        except ValueError:
+            # (reported by the validation stage)
+            pass
+        else:
+            dts_client._observe('navigation', response, content)
+    checks.append(error or Task(resource.id, 'navigation', content))
+
+    start_time = time.perf_counter()
+    try:
+        _, response = dts_client.document(resource=resource)
+    except Exception as e:
+        response = e
+    error = check_http_response(response, resource.id, 'document')
+    checks.append(error or make_result(f'{resource.id}::document', 'passed', duration=time.perf_counter() - start_time, group='document', source=resource.id))
+    return ResourceWork(resource.id, checks)
+
+def validate_tasks(tasks: List[Tuple[Any, Task]]) -> Tuple[List[Tuple[Any, Dict]], float]:
+    """Validates a batch of tasks (this is the unit of work of the validation processes), and
+    returns their results with the time spent (for the statistics of the stage)."""
+    start_time = time.perf_counter()
+    results = []
+    for key, task in tasks:
+        json_data = task.content
+        if isinstance(json_data, bytes):
+            try:
+                json_data = loads(json_data)
+            except ValueError as e:
+                results.append((key, make_result(f'{task.source}::{task.endpoint}', 'error', message=f'{type(e).__name__}: {e}', group=task.endpoint, source=task.source)))
+                continue
+        results.append((key, check_json_response(json_data, task.source, task.endpoint)))
+    return results, time.perf_counter() - start_time
+
+class StageStats(object):
+    """Number of items processed by a stage, time its workers were busy, and wall-clock time
+    from its first to its last item."""
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, items: int, busy: float) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            if self.started is None:
+                self.started = now - busy
+            self.finished = now
+            self.items += items
+            self.busy += busy
+
+    def info(self) -> Dict[str, float]:
+        with self._lock:
+            wall = (self.finished - self.started) if self.started is not None else 0.0
+            return {
+                'items': self.items,
+                'throughput': round(self.items / wall, 3) if wall else 0.0,
+                'utilization': round(self.busy / (wall * self.workers), 3) if wall else 0.0,
+            }
+
+class PipelineStats(object):
+    """Statistics of a pipeline: throughput and utilization of each stage, depth of the queue
+    between them, and the time the fetch stage was blocked by a full queue (backpressure) or
+    the validation stage starved by an empty one."""
+
+    def __init__(self, io_workers: int, processes: int, queue_size: int) -> None:
+        self.fetch = StageStats(io_workers)
+        self.validate = StageStats(processes)
+        self.queue_size = queue_size
+        self.max_depth = 0
+        self.blocked = 0.0
+        self.starved = 0.0
+        self._depth_sum = 0
+        self._depth_samples = 0
+        self._lock = threading.Lock()
+
+    def add_wait(self, blocked: float = 0.0, starved: float = 0.0) -> None:
+        with self._lock:
+            self.blocked += blocked
+            self.starved += starved
+
+    def sample_depth(self, depth: int) -> None:
+        with self._lock:
+            self.max_depth = max(self.max_depth, depth)
+            self._depth_sum += depth
+            self._depth_samples += 1
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'fetch': self.fetch.info(),
+                'validate': self.validate.info(),
+                'queue': {
+                    'size': self.queue_size,
+                    'max_depth': self.max_depth,
+                    'mean_depth': round(self._depth_sum / self._depth_samples, 3) if self._depth_samples else 0.0,
+                    'blocked': round(self.blocked, 3),
+                    'starved': round(self.starved, 3),
+                },
+            }
+
+    def __str__(self) -> str:
+        info = self.info()
+        fetch, validate, work_queue = info['fetch'], info['validate'], info['queue']
+        return (
+            f'fetch {fetch["items"]} resources ({fetch["throughput"]}/s, {fetch["utilization"]:.0%} busy), '
+            f'validate {validate["items"]} responses ({validate["throughput"]}/s, {validate["utilization"]:.0%} busy), '
+            f'queue depth {work_queue["mean_depth"]} (max {work_queue["max_depth"]}/{work_queue["size"]}), '
+            f'fetch blocked {work_queue["blocked"]}s, validation starved {work_queue["starved"]}s'
+        )
+
+def run_pipeline(
+        dts_client,
+        resources: Iterable[Any],
+        fetch: Callable[[Any], ResourceWork],
+        processes: Optional[int] = None,
+        queue_size: int = 64,
+        batch_size: int = 16,
+        on_resource: Optional[Callable[[str, List[Dict]], None]] = None,
+        stats: Optional[PipelineStats] = None
+) -> Iterator[Dict]:
+    """Runs the checks of `resources` in two stages: the threads of `dts_client` fetch the
+    responses (see `DTS_API.map`) and put them on a bounded queue, from which a pool of
+    processes validates them. The stages overlap, so that neither the network nor the CPUs
+    wait for the other; when validation falls behind, the full queue blocks the fetch stage
+    (backpressure), so that responses are never buffered without bound.
+
+    :param dts_client: The client fetching the responses.
+    :type dts_client: DTS_API
+    :param resources: The resources to check.
+    :type resources: Iterable[Any]
+    :param fetch: Fetches the responses of a resource (called in the threads of the client).
+    :type fetch: Callable[[Any], ResourceWork]
+    :param processes: Number of validation processes, defaults to None (number of CPUs); with 1,
+        responses are validated in the current process (still overlapping with fetching)
+    :type processes: Optional[int], optional
+    :param queue_size: Maximum number of fetched resources waiting for validation, defaults to 64
+    :type queue_size: int, optional
+    :param batch_size: Number of responses sent to a validation process at once, defaults to 16
+    :type batch_size: int, optional
+    :param on_resource: Called with the results of each resource, once all its checks are done
+        (e.g. to journal them), defaults to None
+    :type on_resource: Optional[Callable[[str, List[Dict]], None]], optional
+    :param stats: Where the statistics of the stages are recorded, defaults to None
+    :type stats: Optional[PipelineStats], optional
+    :return: An iterator over the results, grouped by resource (in the order resources are validated).
+    :rtype: Iterator[Dict]
+    """
+    processes = processes or os.cpu_count() or 1
+    stats = stats or PipelineStats(dts_client.max_concurrency, processes, queue_size)
+    work_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def timed_fetch(resource):
+        start_time = time.perf_counter()
+        try:
+            return fetch(resource)
+        finally:
+            stats.fetch.add(1, time.perf_counter() - start_time)
+
+    def put(item) -> bool:
+        start_time = time.perf_counter()
+        while not stop.is_set():
+            try:
+                work_queue.put(item, timeout=0.1)
+                stats.add_wait(blocked=time.perf_counter() - start_time)
+                stats.sample_depth(work_queue.qsize())
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for resource, work in dts_client.map(timed_fetch, resources):
+                if isinstance(work, Exception):
+                    resource_id = getattr(resource, 'id', str(resource))
+                    work = ResourceWork(resource_id, [make_result(
+                        f'{resource_id}::resource', 'error', message=f'{type(work).__name__}: {work}', group='collection', source=resource_id
+                    )], failed=True)
+                if not put(work):
+                    return
+        except Exception as e:
+            put(e)
+        finally:
+            put(_DONE)
+
+    producer = threading.Thread(target=produce, name='pipeline-fetch', daemon=True)
+    producer.start()
+    executor = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    max_pending = processes * 2
+    pending: Dict[Future, None] = {}
+    batch: List[Tuple[Tuple[int, int], Task]] = []
+    # the resources being validated: number -> [resource id, checks (tasks are replaced by their results), number of tasks left, failed]
+    in_progress: Dict[int, List] = {}
+    work_numbers = itertools.count()
+    producer_done = False
+
+    def complete(batch_results) -> Iterator[Dict]:
+        task_results, busy = batch_results
+        stats.validate.add(len(task_results), busy)
+        for (work_number, index), result in task_results:
+            state = in_progress[work_number]
+            state[1][index] = result
+            state[2] -= 1
+            if state[2] == 0:
+                yield from finish(work_number)
+
+    def finish(work_number) -> Iterator[Dict]:
+        resource_id, checks, _, failed = in_progress.pop(work_number)
+        if on_resource is not None and not failed:
+            on_resource(resource_id, checks)
+        yield from checks
+
+    def submit() -> Iterator[Dict]:
+        nonlocal batch
+        tasks, batch = batch, []
+        if executor is None:
+            yield from complete(validate_tasks(tasks))
+        else:
+            pending[executor.submit(validate_tasks, tasks)] = None
+
+    try:
+        while not (producer_done and not batch and not pending):
+            # collect the batches validated so far
+            if pending:
+                done, _ = wait(pending, timeout=0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del pending[future]
+                    yield from complete(future.result())
+
+            if producer_done or len(pending) >= max_pending:
+                if batch and len(pending) < max_pending:
+                    yield from submit()
+                elif pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                continue
+
+            # wait for work only if the validation processes have nothing to do
+            start_time = time.perf_counter()
+            try:
+                work = work_queue.get(timeout=0.05 if (pending or batch) else None)
+            except queue.Empty:
+                if batch:
+                    yield from submit()
+                continue
+            if not pending and not batch:
+                stats.add_wait(starved=time.perf_counter() - start_time)
+            stats.sample_depth(work_queue.qsize())
+
+            if work is _DONE:
+                producer_done = True
+                continue
+            if isinstance(work, Exception):
+                raise work
+            work_number = next(work_numbers)
+            checks = list(work.checks)
+            tasks = [(index, check) for index, check in enumerate(checks) if isinstance(check, Task)]
+            in_progress[work_number] = [work.resource_id, checks, len(tasks), work.failed]
+            if not tasks:
+                yield from finish(work_number)
+                continue
+            batch.extend(((work_number, index), task) for index, task in tasks)
+            if len(batch) >= batch_size:
+                yield from submit()
+    finally:
+        stop.set()
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        producer.join()
+        LOGGER.info(f'Pipeline statistics: {stats}')
@@ -0,0 +1,117 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+LOGGER = logging.getLogger()
+
+class PlannedRequest(NamedTuple):
+    """A node of the request plan: `fetch` is called with the client and the results
+    of the nodes in `depends_on` (in that order)."""
+    key: str
+    fetch: Callable[..., Any]
+    depends_on: Tuple[str, ...] = ()
+
+class PlanStats(NamedTuple):
+    nodes: int
+    failed: int
+    max_parallelism: int
+    duration: float
+
+class RequestPlan(object):
+    """A deduplicated DAG of the requests needed by a set of checks.
+
+    Each piece of data is requested once, however many checks need it, and `execute`
+    runs the requests with as much parallelism as their dependencies allow (a request
+    is sent as soon as all the responses it depends on are available).
+    """
+
+    def __init__(self, keys: Iterable[str], requests: Dict[str, PlannedRequest]) -> None:
+        self._requests = requests
+        self.nodes: Dict[str, PlannedRequest] = {}
+        self._results: Dict[str, Any] = {}
+        self._errors: Dict[str, BaseException] = {}
+        self.stats: Optional[PlanStats] = None
+        for key in keys:
+            self.add(key)
+
+    def add(self, key: str) -> None:
+        """Adds the request `key` (and, transitively, the requests it depends on) to the plan."""
+        if key in self.nodes:
+            return
+        request = self._requests[key]
+        for dependency in request.depends_on:
+            self.add(dependency)
+        self.nodes[key] = request
+
+    def execute(self, dts_client, max_workers: int = 8) -> PlanStats:
+        """Runs the requests of the plan concurrently, respecting their dependencies.
+        A request whose dependencies failed fails in turn (with the same error). Requests
+        already executed (e.g. by a previous call, before more were added) are not sent again."""
+        start_time = time.perf_counter()
+        waiting = {key: request for key, request in self.nodes.items() if key not in self._results and key not in self._errors}
+        max_parallelism = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            while waiting or running:
+                for key, request in list(waiting.items()):
+                    if not all(dependency in self._results or dependency in self._errors for dependency in request.depends_on):
+                        continue
+                    del waiting[key]
+                    failed = [dependency for dependency in request.depends_on if dependency in self._errors]
+                    if failed:
+                        self._errors[key] = self._errors[failed[0]]
+                        continue
+                    arguments = [self._results[dependency] for dependency in request.depends_on]
+                    running[executor.submit(request.fetch, dts_client, *arguments)] = key
+                if not running:
+                    continue
+                max_parallelism = max(max_parallelism, len(running))
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        LOGGER.warning(f'Planned request `{key}` failed: {type(error).__name__}: {error}')
+                        self._errors[key] = error
+                    else:
+                        self._results[key] = future.result()
+        self.stats = PlanStats(len(self.nodes), len(self._errors), max_parallelism, time.perf_counter() - start_time)
+        return self.stats
+
+    def result(self, key: str) -> Any:
+        """Returns the result of the request `key` (re-raising its error, if it failed).
+
+        :raises KeyError: If `key` is not part of the plan.
+        """
+        if key in self._errors:
+            raise self._errors[key]
+        return self._results[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.nodes
+
+    def __repr__(self) -> str:
+        return f'RequestPlan(nodes={list(self.nodes)})'
+
+def plan_requests(
+        needs: Iterable[str],
+        fixture_needs: Dict[str, List[str]],
+        requests: Dict[str, PlannedRequest]
+) -> RequestPlan:
+    """Builds the request plan for a set of fixtures (or checks).
+
+    :param needs: The names of the fixtures used by the selected tests.
+    :type needs: Iterable[str]
+    :param fixture_needs: For each fixture, the keys (in `requests`) of the data it needs.
+    :type fixture_needs: Dict[str, List[str]]
+    :param requests: The requests that can be planned, by key.
+    :type requests: Dict[str, PlannedRequest]
+    :return: The plan, not yet executed.
+    :rtype: RequestPlan
+    """
+    keys: Set[str] = set()
+    for name in needs:
+        keys.update(fixture_needs.get(name, ()))
+    # keep a stable order, so that plans are reproducible
+    return RequestPlan((key for key in requests if key in keys), requests)
@@ -0,0 +1,249 @@
+import cProfile
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+LOGGER = logging.getLogger()
+
+# the phases instrumented in the client and in the validation functions
+PHASES = ('network', 'json_decode', 'navigation', 'validation')
+
+# name under which the time spent outside of any test (e.g. in session fixtures) is recorded
+NO_TEST = '<session>'
+
+_NULL_PHASE = nullcontext()
+
+class PhaseStats(object):
+    """Accumulated wall-clock time, CPU time and allocated memory of a phase."""
+
+    __slots__ = ('count', 'wall', 'cpu', 'memory')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.memory = 0
+
+    def add(self, other: 'PhaseStats') -> None:
+        self.count += other.count
+        self.wall += other.wall
+        self.cpu += other.cpu
+        self.memory += other.memory
+
+    def to_dict(self) -> Dict:
+        return {'count': self.count, 'wall': self.wall, 'cpu': self.cpu, 'memory': self.memory}
+
+class _Phase(object):
+    __slots__ = ('profiler', 'name', 'wall', 'cpu', 'memory')
+
+    def __init__(self, profiler: 'Profiler', name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> '_Phase':
+        self.memory = tracemalloc.get_traced_memory()[0] if self.profiler.trace_memory else 0
+        self.cpu = time.thread_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        memory = tracemalloc.get_traced_memory()[0] - self.memory if self.profiler.trace_memory else 0
+        self.profiler._record(self.name, wall, cpu, memory)
+
+class StackSampler(object):
+    """Samples the call stacks of all threads at a fixed interval, and counts them
+    in the "collapsed stacks" format read by flamegraph tools (one `frame;frame;... count`
+    line per distinct stack)."""
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='dts-stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self) -> List[str]:
+        return [f'{stack} {count}' for stack, count in self.stacks.most_common()]
+
+class Profiler(object):
+    """Low-overhead profiler of the main phases of a validation run (network requests,
+    JSON decoding, construction of Navigation objects, schema validation).
+
+    When disabled (the default), `phase` returns a no-op context manager. When enabled,
+    the wall-clock and CPU time (and, with `trace_memory`, the memory allocated) of each
+    phase are accumulated per test. Optionally, each test is also run under cProfile
+    (`profile_calls`), tracemalloc snapshots are compared between tests to find the top
+    allocators (`trace_memory`), and the stacks of all threads are sampled (`sample_interval`).
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.trace_memory = False
+        self.profile_calls = False
+        self.current_test = NO_TEST
+        self._stats: Dict[str, Dict[str, PhaseStats]] = defaultdict(lambda: defaultdict(PhaseStats))
+        self._lock = threading.Lock()
+        self._test_profile: Optional[cProfile.Profile] = None
+        self._call_stats: Optional[pstats.Stats] = None
+        self._snapshot = None
+        self._allocators: Counter = Counter()
+        self._sampler: Optional[StackSampler] = None
+
+    def enable(self, profile_calls: bool = False, trace_memory: bool = False, sample_interval: Optional[float] = 0.005) -> None:
+        self.enabled = True
+        self.profile_calls = profile_calls
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            # one frame per trace keeps snapshots (taken after each test) cheap enough
+            tracemalloc.start(1)
+            self._snapshot = tracemalloc.take_snapshot()
+        if sample_interval:
+            self._sampler = StackSampler(sample_interval)
+            self._sampler.start()
+
+    def disable(self) -> None:
+        self.enabled = False
+        if self._sampler is not None:
+            self._sampler.stop()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def phase(self, name: str):
+        """Returns a context manager measuring the phase `name` (a no-op if disabled)."""
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def _record(self, name: str, wall: float, cpu: float, memory: int) -> None:
+        with self._lock:
+            stats = self._stats[self.current_test][name]
+            stats.count += 1
+            stats.wall += wall
+            stats.cpu += cpu
+            stats.memory += memory
+
+    def start_test(self, test_id: str) -> None:
+        self.current_test = test_id
+        if self.profile_calls:
+            self._test_profile = cProfile.Profile()
+            self._test_profile.enable()
+
+    def end_test(self) -> None:
+        if self._test_profile is not None:
+            self._test_profile.disable()
+            if self._call_stats is None:
+                self._call_stats = pstats.Stats(self._test_profile)
+            else:
+                self._call_stats.add(self._test_profile)
+            self._test_profile = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+            ])
+            if self._snapshot is not None:
+                for stat in snapshot.compare_to(self._snapshot, 'lineno')[:20]:
+                    if stat.size_diff > 0:
+                        self._allocators[str(stat.traceback[0])] += stat.size_diff
+            self._snapshot = snapshot
+        self.current_test = NO_TEST
+
+    def phase_totals(self) -> Dict[str, PhaseStats]:
+        """Returns the statistics of each phase, summed over all tests."""
+        totals: Dict[str, PhaseStats] = defaultdict(PhaseStats)
+        with self._lock:
+            for phases in self._stats.values():
+                for name, stats in phases.items():
+                    totals[name].add(stats)
+        return dict(totals)
+
+    def report(self, max_tests: int = 50, max_allocators: int = 20) -> Dict:
+        """Returns the profile as a JSON-serializable dictionary."""
+        with self._lock:
+            tests = {
+                test_id: {name: stats.to_dict() for name, stats in phases.items()}
+                for test_id, phases in self._stats.items()
+            }
+        slowest_tests = sorted(tests, key=lambda test_id: -sum(stats['wall'] for stats in tests[test_id].values()))
+        return {
+            'phases': {name: stats.to_dict() for name, stats in sorted(self.phase_totals().items())},
+            'tests': {test_id: tests[test_id] for test_id in slowest_tests[:max_tests]},
+            'top_allocators': [
+                {'location': location, 'size': size} for location, size in self._allocators.most_common(max_allocators)
+            ],
+        }
+
+    def write_report(self, base_path: str) -> List[str]:
+        """Writes the profile report beside `base_path` (e.g. the path of the HTML report):
+        `<base>.profile.json` (per-phase and per-test totals, top allocators), `<base>.profile.txt`
+        (human-readable summary) and, if collected, `<base>.collapsed` (collapsed stacks) and
+        `<base>.pstats` (cProfile statistics).
+
+        :return: The paths of the written files.
+        :rtype: List[str]
+        """
+        base = os.path.splitext(base_path)[0]
+        report = self.report()
+        written = [f'{base}.profile.json', f'{base}.profile.txt']
+        with open(written[0], 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=2)
+        with open(written[1], 'w', encoding='utf-8') as report_file:
+            report_file.write(format_profile_report(report))
+        if self._sampler is not None and self._sampler.stacks:
+            written.append(f'{base}.collapsed')
+            with open(written[-1], 'w', encoding='utf-8') as stacks_file:
+                stacks_file.write('\n'.join(self._sampler.collapsed()) + '\n')
+        if self._call_stats is not None:
+            written.append(f'{base}.pstats')
+            self._call_stats.dump_stats(written[-1])
+        return written
+
+def format_profile_report(report: Dict) -> str:
+    lines = ['Per-phase totals', '']
+    lines.append(f'{"phase":<14}{"count":>8}{"wall (s)":>12}{"cpu (s)":>12}{"memory (KiB)":>14}')
+    for name, stats in report['phases'].items():
+        lines.append(f'{name:<14}{stats["count"]:>8}{stats["wall"]:>12.3f}{stats["cpu"]:>12.3f}{stats["memory"] / 1024:>14.1f}')
+    lines += ['', 'Slowest tests', '']
+    for test_id, phases in report['tests'].items():
+        breakdown = ', '.join(f'{name} {stats["wall"]:.3f}s' for name, stats in sorted(phases.items()))
+        lines.append(f'{test_id}: {breakdown}')
+    if report['top_allocators']:
+        lines += ['', 'Top allocators', '']
+        for allocator in report['top_allocators']:
+            lines.append(f'{allocator["size"] / 1024:>10.1f} KiB  {allocator["location"]}')
+    return '\n'.join(lines) + '\n'
+
+# the profiler shared by the client and the validation functions
+PROFILER = Profiler()
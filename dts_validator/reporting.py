@@ -0,0 +1,306 @@
+import html
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Iterator, Optional, TextIO
+from xml.sax.saxutils import quoteattr
+from .aggregation import FailureAggregator
+
+LOGGER = logging.getLogger()
+
+OUTCOMES = ['passed', 'failed', 'error', 'skipped', 'xfailed', 'xpassed']
+FAILED_OUTCOMES = ('failed', 'error')
+MAX_MESSAGE_LENGTH = 4000
+
+def make_result(
+        name: str,
+        outcome: str,
+        duration: float = 0.0,
+        message: Optional[str] = None,
+        group: Optional[str] = None,
+        **extra
+) -> Dict:
+    """Creates the record of one check result, as written to a results stream.
+
+    :param name: The name of the check (e.g. the pytest node ID).
+    :type name: str
+    :param outcome: One of `passed`, `failed`, `error`, `skipped`, `xfailed`, `xpassed`.
+    :type outcome: str
+    :param duration: Duration of the check (in seconds), defaults to 0.0
+    :type duration: float, optional
+    :param message: Failure or skip message, defaults to None
+    :type message: Optional[str], optional
+    :param group: The group the check belongs to in summaries (e.g. the test module
+        or the endpoint), defaults to None
+    :type group: Optional[str], optional
+    :return: The result record; additional keyword arguments are included as they are.
+    :rtype: Dict
+    """
+    if message is not None and len(message) > MAX_MESSAGE_LENGTH:
+        message = message[:MAX_MESSAGE_LENGTH] + ' [...]'
+    result = {
+        'name': name,
+        'group': group or name.split('::')[0],
+        'outcome': outcome,
+        'duration': round(duration, 6),
+        'message': message,
+        'timestamp': time.time(),
+    }
+    result.update(extra)
+    return result
+
+class ResultSink(object):
+    """Streams check results to a JSONL file (one JSON object per line), as soon as
+    they are available. Each line is flushed to disk, so that the results survive a crash
+    of the validator. An existing file is overwritten, unless `append` is set (e.g. to add
+    the results of another run to the same stream).
+    """
+
+    def __init__(self, path: str, fsync: bool = False, append: bool = False) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.fsync = fsync
+        self.counts: Counter = Counter()
+        self._file: Optional[TextIO] = open(path, 'a' if append else 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, result: Dict) -> None:
+        """Appends one result record (see `make_result`) to the stream."""
+        line = json.dumps(result, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.counts[result['outcome']] += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> 'ResultSink':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f'ResultSink(path={self.path}, results={sum(self.counts.values())})'
+
+def iter_results(path: str) -> Iterator[Dict]:
+    """Reads back the results of a JSONL stream, one at a time. A truncated last
+    line (e.g. if the validator crashed while writing it) is ignored.
+
+    :param path: The path of the JSONL file.
+    :type path: str
+    :return: An iterator over the result records.
+    :rtype: Iterator[Dict]
+    """
+    with open(path, 'r', encoding='utf-8') as results_file:
+        for line_number, line in enumerate(results_file, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                LOGGER.warning(f'Ignoring malformed line {line_number} of {path}')
+
+class ResultsSummary(object):
+    """Counts of results per outcome, overall and per group."""
+
+    def __init__(self) -> None:
+        self.total: Counter = Counter()
+        self.groups: Dict[str, Counter] = defaultdict(Counter)
+        self.duration = 0.0
+
+    def add(self, result: Dict) -> None:
+        self.total[result['outcome']] += 1
+        self.groups[result.get('group') or ''][result['outcome']] += 1
+        self.duration += result.get('duration') or 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.total.values())
+
+    @property
+    def failures(self) -> int:
+        return sum(self.total[outcome] for outcome in FAILED_OUTCOMES)
+
+    def __repr__(self) -> str:
+        counts = ', '.join(f'{outcome}={self.total[outcome]}' for outcome in OUTCOMES if self.total[outcome])
+        return f'ResultsSummary({counts})'
+
+def summarize_results(results: Iterable[Dict]) -> ResultsSummary:
+    summary = ResultsSummary()
+    for result in results:
+        summary.add(result)
+    return summary
+
+def write_junit_xml(results_path: str, xml_path: str, suite_name: str = 'dts-validator') -> ResultsSummary:
+    """Exports the results of a JSONL stream to a JUnit XML file. The stream is read twice
+    (once for the counts declared by `<testsuite>`, once for the test cases), so that
+    memory usage does not depend on the number of results.
+
+    :param results_path: The path of the JSONL results file.
+    :type results_path: str
+    :param xml_path: The path of the JUnit XML file to write.
+    :type xml_path: str
+    :param suite_name: The name of the test suite, defaults to 'dts-validator'
+    :type suite_name: str, optional
+    :return: The summary of the results.
+    :rtype: ResultsSummary
+    """
+    summary = summarize_results(iter_results(results_path))
+    skipped = summary.total['skipped'] + summary.total['xfailed']
+
+    with open(xml_path, 'w', encoding='utf-8') as xml_file:
+        xml_file.write('<?xml version="1.0" encoding="utf-8"?>\n<testsuites>\n')
+        xml_file.write(
+            f'<testsuite name={quoteattr(suite_name)} tests="{summary.count}" '
+            f'failures="{summary.total["failed"] + summary.total["xpassed"]}" errors="{summary.total["error"]}" '
+            f'skipped="{skipped}" time="{summary.duration:.3f}">\n'
+        )
+        for result in iter_results(results_path):
+            classname, _, name = result['name'].rpartition('::')
+            xml_file.write(
+                f'<testcase classname={quoteattr(classname or result.get("group") or "")} '
+                f'name={quoteattr(name)} time="{result.get("duration") or 0.0:.3f}"'
+            )
+            outcome = result['outcome']
+            message = quoteattr((result.get('message') or '').splitlines()[0] if result.get('message') else '')
+            if outcome == 'passed':
+                xml_file.write('/>\n')
+                continue
+            xml_file.write('>')
+            if outcome in ('failed', 'xpassed'):
+                xml_file.write(f'<failure message={message}>{html.escape(result.get("message") or "")}</failure>')
+            elif outcome == 'error':
+                xml_file.write(f'<error message={message}>{html.escape(result.get("message") or "")}</error>')
+            else:
+                xml_file.write(f'<skipped message={message}/>')
+            xml_file.write('</testcase>\n')
+        xml_file.write('</testsuite>\n</testsuites>\n')
+    return summary
+
+HTML_HEADER = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{font-family: sans-serif; margin: 2em;}}
+table {{border-collapse: collapse; width: 100%;}}
+th, td {{border: 1px solid #ddd; padding: 4px 8px; text-align: left; vertical-align: top;}}
+td.message {{font-family: monospace; white-space: pre-wrap; font-size: small;}}
+.passed, .xfailed {{color: #2e7d32;}} .failed, .error, .xpassed {{color: #c62828;}} .skipped {{color: #757575;}}
+</style></head><body>
+<h1>{title}</h1>
+"""
+
+def render_html_report(
+        results_path: str,
+        html_path: str,
+        page_size: int = 500,
+        max_failures_listed: int = 100,
+        title: str = 'DTS validation report',
+        extra_sections: Optional[Dict[str, str]] = None
+) -> ResultsSummary:
+    """Renders the results of a JSONL stream as a paginated HTML report: `html_path` contains
+    the summary (counts per outcome and per group, failures grouped by signature, first
+    failures), and links to pages of (at most) `page_size` results each, written next to it.
+
+    :param results_path: The path of the JSONL results file.
+    :type results_path: str
+    :param html_path: The path of the HTML summary page.
+    :type html_path: str
+    :param page_size: Number of results per page, defaults to 500
+    :type page_size: int, optional
+    :param max_failures_listed: Number of failures listed in the summary page, defaults to 100
+    :type max_failures_listed: int, optional
+    :param title: The title of the report, defaults to 'DTS validation report'
+    :type title: str, optional
+    :param extra_sections: Additional HTML sections (title -> HTML content) to include in the summary page, defaults to None
+    :type extra_sections: Optional[Dict[str, str]], optional
+    :return: The summary of the results.
+    :rtype: ResultsSummary
+    """
+    directory = os.path.dirname(html_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    basename = os.path.splitext(os.path.basename(html_path))[0]
+
+    summary = ResultsSummary()
+    aggregator = FailureAggregator()
+    first_failures = []
+    pages = []
+    page_file = None
+
+    def page_path(page_number):
+        return os.path.join(directory, f'{basename}-page-{page_number}.html')
+
+    for index, result in enumerate(iter_results(results_path)):
+        summary.add(result)
+        aggregator.add(result)
+        if result['outcome'] in FAILED_OUTCOMES and len(first_failures) < max_failures_listed:
+            first_failures.append((index // page_size + 1, result))
+        if index % page_size == 0:
+            if page_file is not None:
+                page_file.write('</table></body></html>\n')
+                page_file.close()
+            pages.append(index)
+            page_file = open(page_path(len(pages)), 'w', encoding='utf-8')
+            page_file.write(HTML_HEADER.format(title=f'{html.escape(title)} (page {len(pages)})'))
+            page_file.write(f'<p><a href="{basename}.html">Back to summary</a></p>\n')
+            page_file.write('<table><tr><th>#</th><th>Check</th><th>Outcome</th><th>Duration (s)</th><th>Message</th></tr>\n')
+        page_file.write(format_result_row(index + 1, result))
+    if page_file is not None:
+        page_file.write('</table></body></html>\n')
+        page_file.close()
+
+    with open(html_path, 'w', encoding='utf-8') as html_file:
+        html_file.write(HTML_HEADER.format(title=html.escape(title)))
+        html_file.write(f'<p>{summary.count} results, {summary.failures} failures, total duration {summary.duration:.2f}s.</p>\n')
+        html_file.write('<h2>Summary</h2>\n<table><tr><th>Group</th><th>Total</th>')
+        html_file.write(''.join(f'<th>{outcome}</th>' for outcome in OUTCOMES) + '</tr>\n')
+        for group, counts in sorted(summary.groups.items()):
+            html_file.write(f'<tr><td>{html.escape(group)}</td><td>{sum(counts.values())}</td>')
+            html_file.write(''.join(f'<td class="{outcome}">{counts[outcome] or ""}</td>' for outcome in OUTCOMES) + '</tr>\n')
+        html_file.write(f'<tr><th>All</th><th>{summary.count}</th>')
+        html_file.write(''.join(f'<th class="{outcome}">{summary.total[outcome] or ""}</th>' for outcome in OUTCOMES) + '</tr></table>\n')
+
+        for section_title, section_html in (extra_sections or {}).items():
+            html_file.write(f'<h2>{html.escape(section_title)}</h2>\n{section_html}\n')
+
+        if aggregator.failures:
+            html_file.write(f'<h2>Failures by signature ({len(aggregator.groups())} groups)</h2>\n{aggregator.to_html()}\n')
+
+        if first_failures:
+            html_file.write(f'<h2>Failures (first {len(first_failures)} of {summary.failures})</h2>\n<table>')
+            html_file.write('<tr><th>Page</th><th>Check</th><th>Outcome</th><th>Message</th></tr>\n')
+            for page_number, result in first_failures:
+                html_file.write(
+                    f'<tr><td><a href="{os.path.basename(page_path(page_number))}">{page_number}</a></td>'
+                    f'<td>{html.escape(result["name"])}</td><td class="{result["outcome"]}">{result["outcome"]}</td>'
+                    f'<td class="message">{html.escape(result.get("message") or "")}</td></tr>\n'
+                )
+            html_file.write('</table>\n')
+
+        html_file.write('<h2>All results</h2>\n<ul>\n')
+        for page_number, first_index in enumerate(pages, start=1):
+            last_index = min(first_index + page_size, summary.count)
+            html_file.write(f'<li><a href="{os.path.basename(page_path(page_number))}">Results {first_index + 1}-{last_index}</a></li>\n')
+        html_file.write('</ul></body></html>\n')
+    return summary
+
+def format_result_row(number: int, result: Dict) -> str:
+    return (
+        f'<tr><td>{number}</td><td>{html.escape(result["name"])}</td>'
+        f'<td class="{result["outcome"]}">{result["outcome"]}</td>'
+        f'<td>{result.get("duration") or 0.0:.3f}</td>'
+        f'<td class="message">{html.escape(result.get("message") or "")}</td></tr>\n'
+    )
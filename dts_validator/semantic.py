@@ -0,0 +1,264 @@
+import copy
+import json
+import logging
+import os
+import pathlib
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import quote
+from .decoding import loads
+from .reporting import make_result
+
+LOGGER = logging.getLogger()
+
+SHAPES_PATH = (pathlib.Path(__file__) / ".." / ".." / "shapes" / "dts.shapes.ttl").resolve()
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'dts-validator', 'contexts')
+DEFAULT_BASE_URI = 'urn:dts-validator:'
+SEMANTIC_DEPENDENCIES_MESSAGE = (
+    'Semantic (JSON-LD/SHACL) validation requires `rdflib` and `pyshacl`; '
+    'install them with `pip install rdflib pyshacl` (or the `semantic` extra)'
+)
+
+def require_semantic_dependencies():
+    """Imports (lazily) the optional dependencies of semantic validation.
+
+    :raises ImportError: If `rdflib` or `pyshacl` are not installed.
+    :return: The `rdflib` and `pyshacl` modules.
+    """
+    try:
+        import rdflib
+        import pyshacl
+    except ImportError as e:
+        raise ImportError(SEMANTIC_DEPENDENCIES_MESSAGE) from e
+    return rdflib, pyshacl
+
+class ContextCache(object):
+    """Resolves JSON-LD `@context` URLs without fetching them for every response.
+
+    Contexts are looked up, in order, in memory, in the on-disk cache (`cache_dir`), and on the
+    network (unless `offline`; fetched contexts are stored in the on-disk cache). No context is
+    bundled with the validator: an offline run needs contexts cached by an earlier online run,
+    and responses whose context cannot be resolved are reported as errors.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR, offline: bool = False, timeout: float = 10) -> None:
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.timeout = timeout
+        self._contexts: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _cache_path(self, url: str) -> Optional[str]:
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, quote(url, safe='') + '.json')
+
+    def _load(self, url: str) -> Any:
+        cache_path = self._cache_path(url)
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as context_file:
+                return json.load(context_file)
+
+        if self.offline:
+            raise ValueError(f'Cannot resolve the JSON-LD context {url} offline: it is not in the cache ({self.cache_dir}); run once online to cache it')
+        import requests
+        try:
+            response = requests.get(url, timeout=self.timeout, headers={'Accept': 'application/ld+json, application/json'})
+            response.raise_for_status()
+            context = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise ValueError(f'Cannot resolve the JSON-LD context {url}: {e}') from e
+        if cache_path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # replaced atomically, as other threads (or processes) may read it
+            tmp_path = f'{cache_path}.tmp{os.getpid()}.{threading.get_ident()}'
+            with open(tmp_path, 'w', encoding='utf-8') as context_file:
+                json.dump(context, context_file)
+            os.replace(tmp_path, cache_path)
+        return context
+
+    def get(self, url: str) -> Dict:
+        """Returns the content of the `@context` of the context document at `url`.
+
+        :raises ValueError: If the context cannot be resolved.
+        """
+        with self._lock:
+            if url in self._contexts:
+                return self._contexts[url]
+        # fetched without holding the lock, so that other contexts are not blocked by a slow
+        # server (a context requested concurrently may be fetched twice)
+        context = self._load(url).get('@context', {})
+        with self._lock:
+            return self._contexts.setdefault(url, context)
+
+    def resolve(self, context: Union[str, Dict, List, None]) -> Union[Dict, List, None]:
+        """Replaces the remote contexts (URLs) referenced in a `@context` value with their content."""
+        if isinstance(context, str):
+            return self.get(context)
+        if isinstance(context, list):
+            return [self.resolve(item) for item in context]
+        return context
+
+    def inline(self, json_data: Dict) -> Dict:
+        """Returns a (shallow) copy of a JSON-LD document whose top-level `@context` is inlined."""
+        if '@context' not in json_data:
+            return json_data
+        json_data = copy.copy(json_data)
+        json_data['@context'] = self.resolve(json_data['@context'])
+        return json_data
+
+@lru_cache(maxsize=None)
+def load_shapes(shapes_path: str = str(SHAPES_PATH)):
+    """Loads (once per process) the SHACL shapes graph.
+
+    :param shapes_path: The path of the shapes (Turtle), defaults to `shapes/dts.shapes.ttl`
+    :type shapes_path: str, optional
+    :return: The shapes graph.
+    :rtype: rdflib.Graph
+    """
+    rdflib, _ = require_semantic_dependencies()
+    shapes_graph = rdflib.Graph()
+    shapes_graph.parse(shapes_path, format='turtle')
+    LOGGER.info(f'Loaded {len(shapes_graph)} triples of SHACL shapes from {shapes_path}')
+    return shapes_graph
+
+class SemanticValidator(object):
+    """Validates DTS API responses as JSON-LD against SHACL shapes.
+
+    The contexts are resolved through a `ContextCache` and the shapes are loaded once; responses
+    are validated in batches: the graphs of `batch_size` responses are merged and validated in
+    one SHACL run, and each violation is attributed back to the response it comes from.
+    """
+
+    def __init__(
+            self,
+            context_cache: Optional[ContextCache] = None,
+            shapes_path: str = str(SHAPES_PATH),
+            batch_size: int = 100
+    ) -> None:
+        self.rdflib, self.pyshacl = require_semantic_dependencies()
+        from rdflib.plugins.parsers.jsonld import to_rdf
+
+        self._to_rdf = to_rdf
+        self.context_cache = context_cache or ContextCache()
+        self.shapes_graph = load_shapes(shapes_path)
+        self.batch_size = batch_size
+
+    def to_graph(self, json_data: Dict, source: str):
+        """Converts a JSON-LD response into an RDF graph (with its context inlined)."""
+        graph = self.rdflib.Graph()
+        base = source if '://' in source else DEFAULT_BASE_URI + quote(source, safe='')
+        self._to_rdf(self.context_cache.inline(json_data), graph, base=base)
+        return graph
+
+    def validate_batch(self, responses: List[Tuple[str, Dict]]) -> List[Dict]:
+        """Validates a batch of `(source, json_data)` responses in one SHACL run.
+
+        :param responses: The responses to validate, with their source (file path or URI).
+        :type responses: List[Tuple[str, Dict]]
+        :return: One result record per response.
+        :rtype: List[Dict]
+        """
+        data_graph = self.rdflib.Graph()
+        subject_sources: Dict[Any, str] = {}
+        violations: Dict[str, List[str]] = {source: [] for source, _ in responses}
+        errors: Dict[str, str] = {}
+
+        for source, json_data in responses:
+            try:
+                graph = self.to_graph(json_data, source)
+            except Exception as e:
+                errors[source] = f'{type(e).__name__}: {e}'
+                continue
+            for subject in graph.subjects(unique=True):
+                subject_sources.setdefault(subject, source)
+            data_graph += graph
+
+        if len(data_graph):
+            conforms, results_graph, _ = self.pyshacl.validate(data_graph, shacl_graph=self.shapes_graph)
+            if not conforms:
+                for focus_node, path, message in iter_shacl_results(self.rdflib, results_graph):
+                    source = subject_sources.get(focus_node)
+                    violation = f'{focus_node.n3()} {path.n3() if path is not None else ""}: {message}'
+                    if source is None:
+                        LOGGER.warning(f'SHACL violation not attributable to a response: {violation}')
+                    else:
+                        violations[source].append(violation)
+
+        results = []
+        for source, json_data in responses:
+            if source in errors:
+                results.append(make_result(f'{source}::semantic', 'error', message=errors[source], group='semantic', source=source))
+            elif violations[source]:
+                message = '\n'.join(sorted(violations[source]))
+                results.append(make_result(f'{source}::semantic', 'failed', message=message, group='semantic', source=source))
+            else:
+                results.append(make_result(f'{source}::semantic', 'passed', group='semantic', source=source))
+        return results
+
+    def validate_many(self, responses: Iterable[Tuple[str, Dict]]) -> Iterator[Dict]:
+        """Validates responses in batches of `batch_size`, yielding one result per response."""
+        batch = []
+        for response in responses:
+            batch.append(response)
+            if len(batch) == self.batch_size:
+                yield from self.validate_batch(batch)
+                batch = []
+        if batch:
+            yield from self.validate_batch(batch)
+
+def iter_shacl_results(rdflib, results_graph) -> Iterator[Tuple[Any, Any, str]]:
+    """Yields the `(focus node, path, message)` of each result of a SHACL validation report."""
+    SH = rdflib.Namespace('http://www.w3.org/ns/shacl#')
+    for result in results_graph.subjects(rdflib.RDF.type, SH.ValidationResult):
+        focus_node = results_graph.value(result, SH.focusNode)
+        path = results_graph.value(result, SH.resultPath)
+        message = results_graph.value(result, SH.resultMessage)
+        yield (focus_node, path, str(message) if message is not None else 'SHACL constraint violated')
+
+def validate_semantic(
+        paths: Iterable[str],
+        batch_size: int = 100,
+        offline: bool = False,
+        shapes_path: Optional[str] = None
+) -> Iterator[Dict]:
+    """Validates the DTS API responses contained in directories, archives or JSON files
+    against the SHACL shapes.
+
+    :param paths: Paths of directories, tar/zip archives or JSON files.
+    :type paths: Iterable[str]
+    :param batch_size: Number of responses validated in one SHACL run, defaults to 100
+    :type batch_size: int, optional
+    :param offline: Do not fetch remote contexts, defaults to False
+    :type offline: bool, optional
+    :param shapes_path: The SHACL shapes, defaults to None (`shapes/dts.shapes.ttl`)
+    :type shapes_path: Optional[str], optional
+    :return: An iterator over the result records.
+    :rtype: Iterator[Dict]
+    """
+    from .bulk import iter_sources
+
+    validator = SemanticValidator(
+        context_cache=ContextCache(offline=offline),
+        shapes_path=shapes_path or str(SHAPES_PATH),
+        batch_size=batch_size
+    )
+
+    def iter_responses() -> Iterator[Tuple[str, Dict]]:
+        for name, content in iter_sources(paths):
+            try:
+                if content is None:
+                    with open(name, 'rb') as json_file:
+                        content = json_file.read()
+                yield (name, loads(content))
+            except (OSError, ValueError) as e:
+                errors.append(make_result(f'{name}::semantic', 'error', message=f'{type(e).__name__}: {e}', group='semantic', source=name))
+
+    errors: List[Dict] = []
+    for result in validator.validate_many(iter_responses()):
+        yield from errors
+        errors.clear()
+        yield result
+    yield from errors
@@ -0,0 +1,86 @@
+import hashlib
+import logging
+from collections import Counter
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional
+from .reporting import iter_results, make_result
+
+LOGGER = logging.getLogger()
+
+# when the shards of a sweep report different outcomes for the same check, the most severe one is kept
+OUTCOME_SEVERITY = {'skipped': 0, 'xfailed': 1, 'passed': 2, 'xpassed': 3, 'failed': 4, 'error': 5}
+
+class Shard(NamedTuple):
+    """The slice `index` (starting at 1) of `count` slices of a corpus."""
+    index: int
+    count: int
+
+    def contains(self, resource_id: str) -> bool:
+        return shard_of(resource_id, self.count) == self.index
+
+    def __str__(self) -> str:
+        return f'{self.index}/{self.count}'
+
+def shard_of(resource_id: str, count: int) -> int:
+    """Returns the shard (from 1 to `count`) a resource belongs to. The partition depends only
+    on the `@id` of the resource (not on the order resources are discovered in, nor on the
+    process), so that each machine can compute its own slice without coordination."""
+    digest = hashlib.sha1(resource_id.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+def parse_shard(text: str) -> Shard:
+    """Parses a shard given as `i/N` (e.g. `2/4` for the second of four shards).
+
+    :raises ValueError: If `text` is not a valid shard.
+    """
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise ValueError(f'Invalid shard {text!r}: expected i/N (e.g. 1/4)')
+    if not 1 <= index <= count:
+        raise ValueError(f'Invalid shard {text!r}: i must be between 1 and N')
+    return Shard(index, count)
+
+def merge_results(paths: Iterable[str]) -> Iterator[Dict]:
+    """Merges the results streams (JSONL) of the shards of a sweep into one stream.
+
+    Checks that do not depend on the shard (e.g. those of the Entry endpoint) are run by every
+    shard: they are reported once, with the most severe outcome, and the messages of the shards
+    that disagree. If the results record their shard (`shard`), missing shards are reported
+    as an error.
+
+    :param paths: The results streams of the shards.
+    :type paths: Iterable[str]
+    :return: An iterator over the merged results.
+    :rtype: Iterator[Dict]
+    """
+    merged: Dict[str, Dict] = {}
+    shards: Counter = Counter()
+    for path in paths:
+        for result in iter_results(path):
+            shard = result.get('shard')
+            shards[shard] += 1
+            previous = merged.get(result['name'])
+            if previous is None:
+                merged[result['name']] = result
+                continue
+            if OUTCOME_SEVERITY.get(result['outcome'], 0) > OUTCOME_SEVERITY.get(previous['outcome'], 0):
+                kept, other = result, previous
+            else:
+                kept, other = previous, result
+            if other['message'] and other['message'] != kept['message']:
+                kept['message'] = '\n'.join(filter(None, [kept['message'], f'[shard {other.get("shard")}] {other["message"]}']))
+            merged[result['name']] = kept
+    yield from merged.values()
+
+    counts = {int(shard.split('/')[1]) for shard in shards if shard}
+    if len(counts) > 1:
+        yield make_result('merge::shards', 'error', message=f'The results come from sweeps with different numbers of shards: {sorted(counts)}', group='merge')
+    elif counts:
+        count = counts.pop()
+        missing = [str(Shard(index, count)) for index in range(1, count + 1) if str(Shard(index, count)) not in shards]
+        if missing:
+            yield make_result('merge::shards', 'error', message=f'Missing the results of shards {", ".join(missing)}', group='merge')
+    LOGGER.info(f'Merged {sum(shards.values())} results of {len(shards)} shards into {len(merged)} results')
+
+def in_shard(resource_id: str, shard: Optional[Shard]) -> bool:
+    return shard is None or shard.contains(resource_id)
@@ -0,0 +1,236 @@
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from .events import EVENTS
+
+LOGGER = logging.getLogger()
+
+# HTTP status codes by which a server tells us to slow down
+BACKOFF_STATUS_CODES = (429, 503)
+
+class TokenBucket(object):
+    """Thread-safe token bucket limiting the rate of requests sent to one host.
+
+    Tokens are refilled continuously at `rate` tokens per second, up to `capacity`
+    tokens; each request consumes one token, and blocks until one is available.
+    """
+
+    def __init__(self, rate: Optional[float] = None, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate or 1.0)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            elapsed = now - self._last_refill
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Takes `tokens` from the bucket, waiting until they are available.
+
+        :param tokens: The number of tokens to consume, defaults to 1.0
+        :type tokens: float, optional
+        :return: The time (in seconds) spent waiting.
+        :rtype: float
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif not self.rate:
+                    return waited
+                else:
+                    self._refill(now)
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return waited
+                    delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Stops handing out tokens for `seconds` (e.g. to honour a `Retry-After` header)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def __repr__(self) -> str:
+        return f'TokenBucket(rate={self.rate}, capacity={self.capacity})'
+
+class AdaptiveConcurrencyController(object):
+    """Limits the number of concurrent requests sent to one host, adapting the limit
+    to the server's behaviour (additive increase, multiplicative decrease).
+
+    The limit is raised by one after a full round of requests whose latency stays close
+    to the baseline latency of the server. It is reduced when latency rises, and halved
+    when the server answers with 429/503 or a request fails (e.g. times out).
+    """
+
+    def __init__(
+            self,
+            initial: int = 2,
+            minimum: int = 1,
+            maximum: int = 16,
+            latency_tolerance: float = 2.0,
+            min_latency_increase: float = 0.05,
+            smoothing: float = 0.2
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_tolerance = latency_tolerance
+        self.min_latency_increase = min_latency_increase
+        self.smoothing = smoothing
+        self._limit = float(max(minimum, min(initial, maximum)))
+        self._in_flight = 0
+        self._successes = 0
+        self._baseline_latency = None
+        self._latency = None
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def latency(self) -> Optional[float]:
+        """The (smoothed) latency of recent requests, in seconds (None before the first one)."""
+        return self._latency
+
+    def acquire(self) -> None:
+        """Waits until a request slot is available, and takes it."""
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        """Gives back a request slot taken with `acquire`."""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def record_success(self, latency: float) -> None:
+        """Records the latency of a successful request, and raises the limit if the
+        server keeps up.
+
+        :param latency: Time (in seconds) it took to get the response.
+        :type latency: float
+        """
+        with self._condition:
+            if self._latency is None:
+                self._latency = latency
+                self._baseline_latency = latency
+            else:
+                self._latency += self.smoothing * (latency - self._latency)
+                # the baseline follows decreases immediately, increases only slowly
+                if latency < self._baseline_latency:
+                    self._baseline_latency = latency
+                else:
+                    self._baseline_latency += self.smoothing * 0.1 * (latency - self._baseline_latency)
+
+            # (very small increases, e.g. on a local network, are just noise)
+            latency_increase = self._latency - self._baseline_latency
+            if self._latency > self._baseline_latency * self.latency_tolerance and latency_increase > self.min_latency_increase:
+                self._decrease(factor=0.75, reason=f'latency rising ({self._latency:.3f}s)')
+            else:
+                self._successes += 1
+                if self._successes >= int(self._limit) and self._limit < self.maximum:
+                    self._limit += 1
+                    self._successes = 0
+                    self._condition.notify_all()
+                    EVENTS.emit('concurrency', logging.DEBUG, message='Concurrency limit raised to {limit}', limit=int(self._limit))
+
+    def record_backoff(self, reason: str) -> None:
+        """Records that the server asked us to slow down (429/503, timeout, etc.)."""
+        with self._condition:
+            self._decrease(factor=0.5, reason=reason)
+
+    def _decrease(self, factor: float, reason: str) -> None:
+        # only decrease once per window of (roughly) one round-trip, otherwise
+        # all requests in flight at the time of a slowdown would collapse the limit
+        now = time.monotonic()
+        window = self._latency or 0.0
+        self._successes = 0
+        if now - self._last_decrease < window:
+            return
+        self._last_decrease = now
+        new_limit = max(float(self.minimum), self._limit * factor)
+        if int(new_limit) < int(self._limit):
+            LOGGER.warning(f'Concurrency limit lowered to {int(new_limit)}: {reason}')
+        self._limit = new_limit
+
+    def __repr__(self) -> str:
+        return f'AdaptiveConcurrencyController(limit={self.limit}, in_flight={self.in_flight})'
+
+class HostThrottle(object):
+    """Combines a `TokenBucket` and an `AdaptiveConcurrencyController` for a given host."""
+
+    def __init__(
+            self,
+            host: str,
+            rate: Optional[float] = None,
+            burst: Optional[float] = None,
+            max_concurrency: int = 16,
+            initial_concurrency: int = 2
+    ) -> None:
+        self.host = host
+        self.bucket = TokenBucket(rate=rate, capacity=burst)
+        self.controller = AdaptiveConcurrencyController(
+            initial=min(initial_concurrency, max_concurrency),
+            maximum=max_concurrency
+        )
+
+    def __enter__(self) -> 'HostThrottle':
+        self.controller.acquire()
+        self.bucket.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.controller.release()
+
+    def __repr__(self) -> str:
+        return f'HostThrottle(host={self.host}, {self.bucket}, {self.controller})'
+
+def parse_retry_after(value: Optional[str], default: float = 1.0, maximum: float = 120.0) -> float:
+    """Parses the value of a `Retry-After` header (either a number of seconds or an HTTP date).
+
+    :param value: The header value (or None if the header is missing).
+    :type value: Optional[str]
+    :param default: The delay to use when the header is missing or invalid, defaults to 1.0
+    :type default: float, optional
+    :param maximum: The longest delay we are willing to wait, defaults to 120.0
+    :type maximum: float, optional
+    :return: The number of seconds to wait before retrying.
+    :rtype: float
+    """
+    if not value:
+        return default
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            retry_date = parsedate_to_datetime(value)
+            delay = retry_date.timestamp() - time.time()
+        except (TypeError, ValueError):
+            return default
+    return min(max(delay, 0.0), maximum)
+
+def get_host_throttle(throttles: Dict[str, HostThrottle], lock: threading.Lock, host: str, **kwargs) -> HostThrottle:
+    """Returns the throttle for `host` from `throttles`, creating it if needed."""
+    with lock:
+        if host not in throttles:
+            throttles[host] = HostThrottle(host, **kwargs)
+        return throttles[host]
@@ -0,0 +1,126 @@
+import importlib.util
+import logging
+import threading
+from collections import Counter, namedtuple
+from typing import Dict, Optional
+import requests
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+LOGGER = logging.getLogger()
+
+HTTP2_DEPENDENCIES_MESSAGE = (
+    'The HTTP/2 transport requires `httpx` with HTTP/2 support; '
+    'install it with `pip install httpx[http2]` (or the `http2` extra)'
+)
+
+TransferInfo = namedtuple('TransferInfo', ['requests', 'wire_bytes', 'body_bytes', 'encodings', 'http_versions'])
+
+def _is_installed(*modules: str) -> bool:
+    return any(importlib.util.find_spec(module) is not None for module in modules)
+
+def get_accept_encoding() -> str:
+    """Returns the content codings the client can decode, for the `Accept-Encoding` header:
+    gzip and deflate always, Brotli and Zstandard if the libraries decoding them are installed."""
+    encodings = ['gzip', 'deflate']
+    if _is_installed('brotli', 'brotlicffi'):
+        encodings.append('br')
+    if _is_installed('zstandard'):
+        encodings.append('zstd')
+    return ', '.join(encodings)
+
+def get_wire_size(response: Response) -> Optional[int]:
+    """Returns the number of bytes of the body of `response` as transferred (i.e. before
+    decompression), or None if it is unknown."""
+    if getattr(response, 'wire_bytes', None) is not None:
+        return response.wire_bytes
+    raw = getattr(response, 'raw', None)
+    if raw is not None and hasattr(raw, 'tell'):
+        try:
+            return raw.tell()
+        except Exception:
+            return None
+    return None
+
+def get_http_version(response: Response) -> str:
+    if getattr(response, 'http_version', None):
+        return response.http_version
+    version = getattr(getattr(response, 'raw', None), 'version', None)
+    return {10: 'HTTP/1.0', 11: 'HTTP/1.1', 20: 'HTTP/2'}.get(version, 'unknown')
+
+class TransferStats(object):
+    """Thread-safe counters of the bytes transferred by a client: the size of the bodies on the
+    wire (compressed) and once decoded, and the number of responses per content coding and HTTP version."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+        self.encodings: Counter = Counter()
+        self.http_versions: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, response: Response) -> None:
+        body_bytes = len(response.content)
+        wire_bytes = get_wire_size(response)
+        with self._lock:
+            self.requests += 1
+            self.body_bytes += body_bytes
+            self.wire_bytes += wire_bytes if wire_bytes is not None else body_bytes
+            self.encodings[response.headers.get('Content-Encoding', 'identity')] += 1
+            self.http_versions[get_http_version(response)] += 1
+
+    def info(self) -> TransferInfo:
+        with self._lock:
+            return TransferInfo(self.requests, self.wire_bytes, self.body_bytes, dict(self.encodings), dict(self.http_versions))
+
+class HTTP2Session(object):
+    """A drop-in replacement for the `requests.Session` of `DTS_API`, sending requests with `httpx`
+    over HTTP/2: the concurrent requests to a host are multiplexed over a single connection.
+
+    Responses are converted to `requests` responses (and errors to `requests` exceptions), so that
+    the rest of the client does not depend on the transport.
+    """
+
+    def __init__(self) -> None:
+        try:
+            import httpx
+            import h2  # noqa: F401 (needed by httpx for HTTP/2)
+        except ImportError as e:
+            raise ImportError(HTTP2_DEPENDENCIES_MESSAGE) from e
+        self._httpx = httpx
+        self.headers: Dict[str, str] = {}
+        self._client = httpx.Client(http2=True, follow_redirects=True)
+
+    def get(self, uri: str, timeout: Optional[float] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+        httpx = self._httpx
+        try:
+            httpx_response = self._client.get(uri, timeout=timeout, headers=dict(self.headers, **(headers or {})))
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+        response = Response()
+        response.status_code = httpx_response.status_code
+        response.headers = CaseInsensitiveDict(httpx_response.headers)
+        response.url = str(httpx_response.url)
+        response.reason = httpx_response.reason_phrase
+        response._content = httpx_response.content
+        response.wire_bytes = httpx_response.num_bytes_downloaded
+        response.http_version = httpx_response.http_version
+        return response
+
+    def close(self) -> None:
+        self._client.close()
+
+def make_session(http2: bool = False):
+    """Returns the session a client sends its requests with, negotiating all the content codings it can decode.
+
+    :param http2: Use the (optional) HTTP/2 transport, defaults to False
+    :type http2: bool, optional
+    :raises ImportError: If `http2` is set but `httpx` (with HTTP/2 support) is not installed.
+    """
+    session = HTTP2Session() if http2 else requests.Session()
+    session.headers['Accept-Encoding'] = get_accept_encoding()
+    return session
@@ -1,23 +1,141 @@
+import hashlib
+import json
 import logging
 import warnings
 import pathlib
 import os.path
-from jsonschema.exceptions import ValidationError, SchemaError
-from jsonschema import validate, RefResolver
+from functools import lru_cache
+import xml.etree.ElementTree as ET
+from typing import Dict, Tuple, Union
+from jsonschema.exceptions import ValidationError, SchemaError, best_match
+from jsonschema.validators import validator_for
+from jsonschema import RefResolver
 from uritemplate import URITemplate
-from .exceptions import URITemplateMissingParameter, JSONResponseMissingProperty
+from .aggregation import RepeatedRecordFilter
+from .events import EVENTS
+from .exceptions import URITemplateMissingParameter, JSONResponseMissingProperty, DocumentFragmentInvalid
+from ._generated_validators import VALIDATORS as FAST_VALIDATORS
+from .memo import MISSING, VALIDATION_MEMO, content_hash, deserialize_error, serialize_error
+from .profiling import PROFILER
 
 LOGGER = logging.getLogger(__name__)
+# a systematic bug of a server makes every response fail in the same way: log it only a few times
+LOGGER.addFilter(RepeatedRecordFilter())
+SCHEMAS_DIR = (pathlib.Path(__file__) / ".." / ".." / "schemas").resolve()
+DTS_NAMESPACE = 'https://w3id.org/dts/api#'
+DTS_WRAPPER_TAG = f'{{{DTS_NAMESPACE}}}wrapper'
 
-def validate_json(json_data, json_schema):
+# JSON schema used to validate the responses of each endpoint
+SCHEMA_FILES = {
+    'entry': 'entry_response.schema.json',
+    'collection': 'collection_response.schema.json',
+    'navigation': 'navigation_response.schema.json',
+}
+
+# parameters that the URI templates declared by the Entry endpoint must contain
+ENTRY_URI_TEMPLATE_PARAMETERS = {
+    'collection': ['id', 'nav'], # NOTE: see question to tech. comm. about `page` param
+    'navigation': ['resource', 'ref', 'start', 'end'], # if compliancy_level == 1, `start` and `end` must be there
+    'document': ['resource', 'ref', 'start', 'end'] # if compliancy_level == 1, `start` and `end` must be there
+}
+
+@lru_cache(maxsize=None)
+def load_schema(endpoint: str) -> Dict:
+    """Loads (once per process) the JSON schema for the responses of a DTS endpoint.
+
+    :param endpoint: The name of the endpoint (see `SCHEMA_FILES`).
+    :type endpoint: str
+    :return: The JSON schema.
+    :rtype: Dict
+    """
+    with open(SCHEMAS_DIR / SCHEMA_FILES[endpoint], 'r') as schema_file:
+        return json.load(schema_file)
+
+@lru_cache(maxsize=32)
+def _get_validator(schema_key: str):
+    json_schema = json.loads(schema_key)
     # Set up resolver to correctly handle relative paths
     resolver = RefResolver(
-        base_uri=(pathlib.Path(__file__) / ".." / ".." / "schemas").resolve().as_uri() + "/",
+        base_uri=SCHEMAS_DIR.as_uri() + "/",
         referrer=json_schema
     )
+    validator_class = validator_for(json_schema)
+    validator_class.check_schema(json_schema)
+    return validator_class(json_schema, resolver=resolver)
+
+def get_validator(json_schema):
+    """Returns a validator for `json_schema`, compiled (and checked against its
+    metaschema) only once per process, however many responses it validates.
+
+    :param json_schema: The JSON schema.
+    :type json_schema: Dict
+    :raises SchemaError: If the schema is invalid according to its metaschema.
+    :return: The validator.
+    :rtype: jsonschema.protocols.Validator
+    """
+    return _get_validator(get_schema_key(json_schema)[0])
+
+# the canonical serialization and hash of each schema object (see `get_schema_key`), with the
+# schema itself, so that its `id` is not reused by another object while it is in the cache
+_SCHEMA_KEYS: Dict[int, Tuple[Dict, str, str]] = {}
+MAX_SCHEMA_KEYS = 32
+
+def get_schema_key(json_schema) -> Tuple[str, str]:
+    """Returns the canonical serialization of a schema (which identifies its compiled validator)
+    and its hash (which identifies its generated validator and its memoized outcomes).
+
+    They are computed once per schema object, rather than for every response it validates:
+    schemas are not to be modified once used.
+
+    :param json_schema: The JSON schema.
+    :type json_schema: Dict
+    :return: The serialization and the hash of the schema.
+    :rtype: Tuple[str, str]
+    """
+    entry = _SCHEMA_KEYS.get(id(json_schema))
+    if entry is None or entry[0] is not json_schema:
+        schema_key = json.dumps(json_schema, sort_keys=True)
+        if len(_SCHEMA_KEYS) >= MAX_SCHEMA_KEYS:
+            _SCHEMA_KEYS.clear()
+        entry = (json_schema, schema_key, hashlib.sha1(schema_key.encode('utf-8')).hexdigest())
+        _SCHEMA_KEYS[id(json_schema)] = entry
+    return entry[1], entry[2]
+
+def get_validation_error(json_data, json_schema):
+    """Returns the most relevant error of `json_data` against `json_schema` (or None if it is
+    valid).
+
+    The schemas of `schemas/` have generated validators (see `codegen`), which tell quickly
+    whether a response is valid; the errors of the responses they reject are then reported by
+    `jsonschema`. Those outcomes are memoized (see `VALIDATION_MEMO`) by the hash of the schema
+    and of the canonical response, so that identical responses are validated only once.
+
+    :raises SchemaError: If the schema is invalid according to its metaschema.
+    :rtype: Optional[ValidationError]
+    """
+    schema_key, schema_hash = get_schema_key(json_schema)
+    fast_validator = FAST_VALIDATORS.get(schema_hash)
+    if fast_validator is not None and fast_validator(json_data):
+        return None
+    if not VALIDATION_MEMO.enabled:
+        return best_match(_get_validator(schema_key).iter_errors(json_data))
+
+    key = (schema_hash, content_hash(json_data))
+    outcome = VALIDATION_MEMO.get(key)
+    if outcome is not MISSING:
+        return None if outcome is None else deserialize_error(outcome, json_data)
+    error = best_match(_get_validator(schema_key).iter_errors(json_data))
+    VALIDATION_MEMO.put(key, None if error is None else serialize_error(error))
+    return error
+
+def validate_json(json_data, json_schema):
     try:
-        assert validate(json_data, json_schema, resolver=resolver) is None
-        LOGGER.info('JSON schema and JSON response are valid.')
+        with PROFILER.phase('validation'):
+            error = get_validation_error(json_data, json_schema)
+        if error is not None:
+            raise error
+        if EVENTS.enabled_for(logging.INFO):
+            EVENTS.emit('validation', message='JSON schema and JSON response are valid.', outcome='valid')
     except SchemaError as e:
          LOGGER.error(f'The provided JSON schema is invalid according to its metaschema.')
     except ValidationError as e:
@@ -33,8 +151,11 @@ def validate_uri_template(uri_template, template_name, required_parameters) -> N
     for param in required_parameters:
             try:
                 assert param in available_parameters
-                msg = f'Expected parameter `{param}` is contained in the `{template_name}` URI template {uri_template}'
-                LOGGER.info(msg)
+                if EVENTS.enabled_for(logging.INFO):
+                    EVENTS.emit(
+                        'uri_template', message='Expected parameter `{parameter}` is contained in the `{template_name}` URI template {uri_template}',
+                        parameter=param, template_name=template_name, uri_template=uri_template.uri
+                    )
             except AssertionError:
                 msg = f'Parameter `{param}` must be contained in the `{template_name}` URI template {uri_template} (available parameters: {available_parameters})'
                 LOGGER.error(msg)
@@ -45,9 +166,11 @@ def validate_uri_template(uri_template, template_name, required_parameters) -> N
 def check_required_property(json_data, property_name):
     try:
         assert property_name in json_data
-        LOGGER.info(f'The property `{property_name}` is present as expected')
+        if EVENTS.enabled_for(logging.INFO):
+            EVENTS.emit('property', message='The property `{property}` is present as expected', property=property_name)
     except AssertionError as e:
-        LOGGER.error(f'The required property `{property_name}` (URI template) is missing in the following JSON: {json_data}')
+        # (the @id is a logging argument, so that `RepeatedRecordFilter` collapses the records of all the resources)
+        LOGGER.error(f'The required property `{property_name}` (URI template) is missing in the JSON response (@id: %s)', json_data.get('@id'))
         raise JSONResponseMissingProperty(f'The required property `{property_name}` (URI template) is missing')
 
 def check_deprecated_property(json_data, property_name):
@@ -57,6 +180,11 @@ def check_deprecated_property(json_data, property_name):
         warn_message = f'The property `{property_name}` is present in the JSON but it was deprecated'
         warnings.warn(warn_message, category=DeprecationWarning)
 
+def validate_entry_response(json_data, json_schema):
+    validate_json(json_data, json_schema)
+    for template_name, params in ENTRY_URI_TEMPLATE_PARAMETERS.items():
+        validate_uri_template(json_data[template_name], template_name=template_name, required_parameters=params)
+
 def validate_collection_response(json_data, json_schema):
     validate_json(json_data, json_schema)
     check_deprecated_property(json_data, 'totalItems')
@@ -65,4 +193,55 @@ def validate_collection_response(json_data, json_schema):
 # TODO: implement
 def validate_navigation_response(json_data, json_schema):
     validate_json(json_data, json_schema)
-    # TODO: finish...
\ No newline at end of file
+    # TODO: finish...
+
+def validate_document_fragment(document: Union[str, bytes], require_wrapper: bool = True, chunk_size: int = 65536) -> None:
+    """Checks that a response of the Document endpoint is well-formed XML and, for
+    fragments (`ref` or `start`/`end` requests), that its content is wrapped into
+    a non-empty `<dts:wrapper>` element.
+
+    The document is parsed incrementally and elements are discarded once checked, so
+    that no element tree of the document is built; the document itself is already in
+    memory (`DTS_API.document` reads the whole body), and a `str` is encoded again.
+
+    :param document: The body of the Document endpoint response.
+    :type document: Union[str, bytes]
+    :param require_wrapper: Whether a non-empty `<dts:wrapper>` is expected, defaults to True
+    :type require_wrapper: bool, optional
+    :param chunk_size: Size of the chunks fed to the XML parser, defaults to 65536
+    :type chunk_size: int, optional
+    :raises DocumentFragmentInvalid: If the document is not well-formed, or if the wrapper is missing or empty.
+    """
+    if isinstance(document, str):
+        document = document.encode('utf-8')
+
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    wrapper_found = False
+    wrapper_empty = True
+    open_wrappers = 0
+    try:
+        for offset in range(0, len(document), chunk_size):
+            parser.feed(document[offset:offset + chunk_size])
+            for event, element in parser.read_events():
+                is_wrapper = element.tag == DTS_WRAPPER_TAG
+                if event == 'start':
+                    if is_wrapper:
+                        wrapper_found = True
+                        open_wrappers += 1
+                    elif open_wrappers:
+                        wrapper_empty = False
+                else:
+                    if is_wrapper:
+                        open_wrappers -= 1
+                        if element.text and element.text.strip():
+                            wrapper_empty = False
+                    element.clear()
+        parser.close()
+    except ET.ParseError as e:
+        LOGGER.error(f'The Document response is not well-formed XML: {e}')
+        raise DocumentFragmentInvalid(f'The Document response is not well-formed XML: {e}')
+
+    if require_wrapper and not wrapper_found:
+        raise DocumentFragmentInvalid('The Document response is missing the `<dts:wrapper>` element')
+    if require_wrapper and wrapper_empty:
+        raise DocumentFragmentInvalid('The `<dts:wrapper>` element of the Document response is empty')
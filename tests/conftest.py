@@ -1,11 +1,26 @@
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import pytest 
+import itertools
 import json
 import os
 import requests
 import logging
 from uritemplate import URITemplate
 from dts_validator.client import DTS_API, DTS_Navigation
+from dts_validator.fragments import FragmentValidationReport, validate_document_fragments
+from dts_validator.fuzzing import ParameterFuzzReport, fuzz_parameters
+from dts_validator.aggregation import RepeatedRecordFilter
+from dts_validator.reporting import ResultSink, make_result, render_html_report, write_junit_xml
+from dts_validator.profiling import PROFILER
+from dts_validator.memo import VALIDATION_MEMO
+from dts_validator.decoding import JSON_DECODER
+from dts_validator.events import EVENTS, JSONLEventSink, LoggingEventSink, parse_event_sample
+from dts_validator.corpus_stats import CorpusStatistics
+from dts_validator.planner import RequestPlan, plan_requests
+from .planned_requests import REQUESTS
+from dts_validator.sharding import parse_shard
+from dts_validator.journal import Journal
+from dts_validator.consistency import ConsistencyResult, ResourceData, check_corpus_consistency, check_resource_consistency
 
 LOGGER = logging.getLogger()
 SKIP_MOCK_TESTS_MESSAGE = 'A remote DTS API is provided; skipping tests on mock/example data'
@@ -15,6 +30,303 @@ def pytest_addoption(parser):
     parser.addoption(
         "--entry-endpoint", action="store"
     )
+    parser.addoption(
+        "--rate-limit", action="store", type=float, default=None,
+        help="Maximum number of requests per second sent to each host of the DTS API"
+    )
+    parser.addoption(
+        "--max-concurrency", action="store", type=int, default=8,
+        help="Maximum number of concurrent requests sent to each host of the DTS API"
+    )
+    parser.addoption(
+        "--cache-size", action="store", type=int, default=256,
+        help="Maximum number of DTS API responses memoized during the test session"
+    )
+    parser.addoption(
+        "--http2", action="store_true", default=False,
+        help="Send the requests to the DTS API over HTTP/2 (requires httpx[http2])"
+    )
+    parser.addoption(
+        "--snapshot", action="store", default=None,
+        help="Start the DTS API client from this snapshot file (if it exists), and update it at the end of the session"
+    )
+    parser.addoption(
+        "--document-sample", action="store", type=int, default=50,
+        help="Number of citable units whose Document fragment is fetched by bulk tests (0 for all)"
+    )
+    parser.addoption(
+        "--document-range-size", action="store", type=int, default=None,
+        help="Fetch Document fragments in bulk as `start`/`end` ranges of this many contiguous citable units"
+    )
+    parser.addoption(
+        "--consistency-max-resources", action="store", type=int, default=10,
+        help="Maximum number of resources checked for cross-endpoint consistency (0 for all)"
+    )
+    parser.addoption(
+        "--fuzz-max-resources", action="store", type=int, default=3,
+        help="Number of resources requested with valid and invalid combinations of parameters (0 for all)"
+    )
+    parser.addoption(
+        "--fuzz-error-budget", action="store", type=int, default=20,
+        help="Stop requesting invalid combinations of parameters after this many failures per endpoint (0 for no limit)"
+    )
+    parser.addoption(
+        "--shard", action="store", type=parse_shard, default=None,
+        help="Only check the resources of this slice of the corpus, as i/N (e.g. 1/4); merge the results with `dts-validator merge`"
+    )
+    parser.addoption(
+        "--journal", action="store", default=None,
+        help="Record the progress of the consistency sweep to this journal file"
+    )
+    parser.addoption(
+        "--resume", action="store_true", default=False,
+        help="Resume the consistency sweep recorded in --journal, skipping the resources already checked"
+    )
+    parser.addoption(
+        "--walk-citation-trees", action="store_true", default=False,
+        help="Also walk citation trees level by level (ref=<unit>&down=1) and compare them with down=-1 responses"
+    )
+    parser.addoption(
+        "--citation-tree-max-units", action="store", type=int, default=1000,
+        help="Maximum number of citable units fetched when walking a citation tree level by level (0 for all)"
+    )
+    parser.addoption(
+        "--results-jsonl", action="store", default=None,
+        help="Stream the result of each test, as soon as it completes, to this JSONL file"
+    )
+    parser.addoption(
+        "--results-append", action="store_true", default=False,
+        help="Append the results to --results-jsonl instead of overwriting it (the exports then include the earlier results)"
+    )
+    parser.addoption(
+        "--results-junit", action="store", default=None,
+        help="At the end of the session, export the results stream to this JUnit XML file"
+    )
+    parser.addoption(
+        "--results-html", action="store", default=None,
+        help="At the end of the session, render the results stream as a paginated HTML report"
+    )
+    parser.addoption(
+        "--events", action="store", default=None,
+        help="Record the events (requests, checks) to this JSONL file, whatever the logging level"
+    )
+    parser.addoption(
+        "--events-sample", action="append", type=parse_event_sample, default=[], metavar="TYPE=RATE",
+        help="Keep only this fraction of the events of a type (e.g. request=0.01; * for all types)"
+    )
+    parser.addoption(
+        "--events-rate-limit", action="store", type=float, default=None,
+        help="Keep at most this many events of each type per second"
+    )
+    parser.addoption(
+        "--json-backend", action="store", choices=['json', 'orjson'], default=None,
+        help="Library parsing the JSON responses (default: orjson if it is installed, else json)"
+    )
+    parser.addoption(
+        "--validation-cache", action="store", default=None,
+        help="Persist the outcomes of schema validations to this file, and reuse them across sessions"
+    )
+    parser.addoption(
+        "--no-validation-memo", action="store_true", default=False,
+        help="Validate identical responses again (do not memoize validation outcomes)"
+    )
+    parser.addoption(
+        "--corpus-stats", action="store", default=None,
+        help="Profile the corpus of the remote DTS API (fan-out, citation trees, citeTypes, document sizes) and write the statistics to this JSON file"
+    )
+    parser.addoption(
+        "--profile", action="store_true", default=False,
+        help="Time the phases of each test (network, JSON decoding, Navigation objects, validation) and write a profile report"
+    )
+    parser.addoption(
+        "--profile-calls", action="store_true", default=False,
+        help="With --profile, also run each test under cProfile (written to a .pstats file)"
+    )
+    parser.addoption(
+        "--profile-memory", action="store_true", default=False,
+        help="With --profile, also trace memory allocations (per phase, and top allocators between tests)"
+    )
+
+######################################
+#     Hooks for streaming results    #
+######################################
+
+class ResultsStreamPlugin(object):
+    """Streams the result of each test to a `ResultSink` as soon as it completes, and
+    exports the stream (JUnit XML, paginated HTML) at the end of the session."""
+
+    def __init__(
+            self,
+            sink: ResultSink,
+            junit_path: Optional[str] = None,
+            html_path: Optional[str] = None,
+            extra: Optional[Dict] = None
+    ) -> None:
+        self.sink = sink
+        self.junit_path = junit_path
+        self.html_path = html_path
+        self.extra = extra or {}
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport):
+        # one result per test: the outcome of the call, or of the setup if the test didn't run
+        if report.when == 'call' or (report.when == 'setup' and not report.passed) or (report.when == 'teardown' and report.failed):
+            self.sink.write(make_result(
+                report.nodeid,
+                get_report_outcome(report),
+                duration=report.duration,
+                message=get_report_message(report),
+                phase=report.when,
+                **self.extra
+            ))
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        self.sink.close()
+        if self.junit_path:
+            write_junit_xml(self.sink.path, self.junit_path)
+        if self.html_path:
+            extra_sections = VALIDATION_MEMO.html_sections()
+            corpus_stats_plugin = session.config.pluginmanager.get_plugin('dts-corpus-stats')
+            if corpus_stats_plugin is not None:
+                extra_sections['Corpus statistics'] = corpus_stats_plugin.statistics.to_html()
+            render_html_report(self.sink.path, self.html_path, extra_sections=extra_sections)
+
+class ValidationMemoPlugin(object):
+    """Logs the hit rate of the validation memo, and closes its file (if any), at the end of the session."""
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session: pytest.Session):
+        summary = VALIDATION_MEMO.summary()
+        if summary:
+            LOGGER.warning(summary)
+        VALIDATION_MEMO.close()
+
+class EventLogPlugin(object):
+    """Closes the event sinks (and logs how many events were dropped by sampling or rate
+    limiting) at the end of the session."""
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session: pytest.Session):
+        dropped = {event_type: dropped for event_type, (_, dropped) in EVENTS.stats().items() if dropped}
+        if dropped:
+            LOGGER.warning(f'Events dropped by sampling or rate limiting: {dropped}')
+        EVENTS.close()
+
+class CorpusStatisticsPlugin(object):
+    """Profiles the corpus from the responses fetched by the `dts_client` fixture, and writes
+    the statistics at the end of the session."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.statistics = CorpusStatistics()
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        self.statistics.write_json(self.path)
+        LOGGER.warning(f'Corpus statistics written to {self.path}')
+
+class ProfilePlugin(object):
+    """Attributes the phases measured by the profiler to each test, and writes the profile
+    report at the end of the session, beside the HTML report (if any)."""
+
+    def __init__(self, report_path: str) -> None:
+        self.report_path = report_path
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item: pytest.Item, nextitem):
+        PROFILER.start_test(item.nodeid)
+        yield
+        PROFILER.end_test()
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        PROFILER.disable()
+        written = PROFILER.write_report(self.report_path)
+        LOGGER.warning(f'Profile report written to {", ".join(written)}')
+
+def get_events_log_level(config: pytest.Config) -> Optional[int]:
+    """Returns the lowest level of the live log and of the captured logs (if any is set)."""
+    levels = []
+    for name in ('log_cli_level', 'log_level'):
+        level = config.getoption(name, default=None) or config.getini(name)
+        if level:
+            levels.append(int(level) if str(level).isdigit() else logging.getLevelName(str(level).upper()))
+    return min(levels, default=None)
+
+def pytest_configure(config: pytest.Config):
+    # the client, the consistency checks and the fuzzing log their errors through the root logger
+    logging.getLogger().addFilter(RepeatedRecordFilter())
+    # the events (e.g. the URI of each request) are logged like the records they replace
+    events_log_level = get_events_log_level(config)
+    if events_log_level is not None:
+        EVENTS.add_sink(LoggingEventSink(level=events_log_level))
+    rate_limit = config.getoption('--events-rate-limit', default=None)
+    if rate_limit is not None:
+        EVENTS.configure('*', rate_limit=rate_limit)
+    for event_type, sample_rate in config.getoption('--events-sample', default=[]):
+        EVENTS.configure(event_type, sample_rate=sample_rate, rate_limit=rate_limit)
+    if config.getoption('--events', default=None):
+        EVENTS.add_sink(JSONLEventSink(config.getoption('--events')))
+    config.pluginmanager.register(EventLogPlugin(), 'dts-event-log')
+    if config.getoption('--json-backend', default=None):
+        JSON_DECODER.set_backend(config.getoption('--json-backend'))
+    if config.getoption('--no-validation-memo', default=False):
+        VALIDATION_MEMO.maxsize = 0
+    elif config.getoption('--validation-cache', default=None):
+        VALIDATION_MEMO.open(config.getoption('--validation-cache'))
+    config.pluginmanager.register(ValidationMemoPlugin(), 'dts-validation-memo')
+    if config.getoption('--corpus-stats', default=None):
+        config.pluginmanager.register(CorpusStatisticsPlugin(config.getoption('--corpus-stats')), 'dts-corpus-stats')
+
+    if config.getoption('--profile', default=False):
+        report_path = (
+            getattr(config.option, 'htmlpath', None)
+            or config.getoption('--results-html', default=None)
+            or config.getoption('--results-jsonl', default=None)
+            or 'dts-validator.html'
+        )
+        PROFILER.enable(
+            profile_calls=config.getoption('--profile-calls'),
+            trace_memory=config.getoption('--profile-memory')
+        )
+        config.pluginmanager.register(ProfilePlugin(report_path), 'dts-profile')
+
+    results_path = config.getoption('--results-jsonl', default=None)
+    junit_path = config.getoption('--results-junit', default=None)
+    html_path = config.getoption('--results-html', default=None)
+    # exports are generated from the results stream, so we need one
+    if results_path is None and (html_path or junit_path):
+        results_path = os.path.splitext(html_path or junit_path)[0] + '.jsonl'
+    if results_path is not None:
+        shard = config.getoption('--shard', default=None)
+        config.pluginmanager.register(
+            ResultsStreamPlugin(
+                ResultSink(results_path, append=config.getoption('--results-append')), junit_path=junit_path, html_path=html_path,
+                extra={'shard': str(shard)} if shard else None
+            ),
+            'dts-results-stream'
+        )
+
+# names of the fixtures used by the selected tests (see `request_plan`)
+SELECTED_FIXTURES_KEY = pytest.StashKey[set]()
+
+# after the `-k`/`-m` deselection, so that only the data of the selected tests is fetched
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session: pytest.Session, config: pytest.Config, items: List[pytest.Item]):
+    config.stash[SELECTED_FIXTURES_KEY] = set(
+        fixture_name for item in items for fixture_name in getattr(item, 'fixturenames', ())
+    )
+
+def get_report_outcome(report: pytest.TestReport) -> str:
+    if hasattr(report, 'wasxfail'):
+        return 'xfailed' if report.skipped else 'xpassed'
+    if report.failed and report.when != 'call':
+        return 'error'
+    return report.outcome
+
+def get_report_message(report: pytest.TestReport) -> Optional[str]:
+    if report.passed:
+        return None
+    if report.skipped and isinstance(report.longrepr, tuple):
+        return report.longrepr[2]
+    return report.longreprtext or None
 
 ######################################
 #     Fixtures for JSON schemas      #
@@ -61,25 +373,96 @@ def navigation_response_schema(request) -> Dict:
 #   Fixtures for DTS API client and Entry Endpoint  #
 #####################################################
 
-def load_mock_data(basedir, filename) -> Dict:
+def load_mock_data(basedir, filename) -> Union[Dict, str]:
     # load the mock data from a JSON file stored in `tests/data/`
     mock_data_path = os.path.join(basedir, f'data/{filename}')
 
     with open(mock_data_path, 'r') as file:
         if mock_data_path.endswith('json'):
             mock_request = json.load(file)
+        elif mock_data_path.endswith('xml'):
+            mock_request = file.read()
         else:
             raise
         LOGGER.info(f'Loaded mock response from file {mock_data_path}')
     return mock_request
 
-@pytest.fixture(scope='module')
+@pytest.fixture(scope='session')
 def dts_client(request: pytest.FixtureRequest) -> Optional[DTS_API]:
+    # the client is shared by the whole session, so that its response cache
+    # spares us from fetching the same URIs again in different test modules
     if request.config.getoption('--entry-endpoint') is not None:
         entry_endpoint_uri = request.config.getoption('--entry-endpoint')
-        return DTS_API(entry_endpoint_uri)
+        snapshot_path = request.config.getoption('--snapshot')
+        client_options = dict(
+            rate_limit=request.config.getoption('--rate-limit'),
+            max_concurrency=request.config.getoption('--max-concurrency'),
+            cache_size=request.config.getoption('--cache-size'),
+            http2=request.config.getoption('--http2')
+        )
+        if snapshot_path and os.path.exists(snapshot_path):
+            client = DTS_API.from_snapshot(snapshot_path, **client_options)
+            if client.entry_endpoint_uri != entry_endpoint_uri:
+                LOGGER.warning(f'The snapshot {snapshot_path} is for another API ({client.entry_endpoint_uri}); ignoring it')
+                client = DTS_API(entry_endpoint_uri, **client_options)
+        else:
+            client = DTS_API(entry_endpoint_uri, **client_options)
+        corpus_stats_plugin = request.config.pluginmanager.get_plugin('dts-corpus-stats')
+        if corpus_stats_plugin is not None:
+            client.add_listener(corpus_stats_plugin.statistics.observe)
+        yield client
+        LOGGER.info(f'Response cache statistics: {client.cache_info()}')
+        LOGGER.info(f'Transfer statistics: {client.transfer_info()}')
+        if snapshot_path:
+            client.dump_snapshot(snapshot_path)
     else:
-        return None    
+        yield None
+
+# the data (see `tests.planned_requests.REQUESTS`) needed by each fixture, when testing a remote DTS API
+FIXTURE_NEEDS = {
+    'collection_endpoint_response_root': ['collection_root'],
+    'collection_endpoint_response_one': ['collection_one'],
+    'collection_endpoint_response_readable': ['resource_full'],
+    'navigation_endpoint_response_down_one': ['navigation_down_one'],
+    'navigation_endpoint_response_down_two': ['navigation_down_two'],
+    'navigation_endpoint_response_ref': ['navigation_ref'],
+    'navigation_endpoint_response_top_ref_down_two': ['navigation_top_ref_down_two'],
+    'navigation_endpoint_response_low_ref_down_one': ['navigation_low_ref_down_one'],
+    'navigation_endpoint_response_range_plus_down': ['navigation_range_plus_down'],
+    'navigation_endpoint_response_range': ['navigation_range'],
+    'document_endpoint_response_resource': ['document_resource'],
+    'document_endpoint_response_ref': ['document_ref'],
+    'document_endpoint_response_fragment': ['document_ref'],
+    'document_endpoint_response_range': ['document_range'],
+    'document_endpoint_responses_bulk': ['navigation_full'],
+}
+
+@pytest.fixture(scope='session')
+def request_plan(request: pytest.FixtureRequest, dts_client: Optional[DTS_API]) -> Optional[RequestPlan]:
+    """
+    This fixture collects the data needed by all the selected tests before any of them runs,
+    and fetches it at once: every piece of data is requested only once (e.g. the `down=1`
+    Navigation response that many fixtures start from, for the same `Resource`), and
+    independent requests are sent concurrently.
+    """
+    if dts_client is None:
+        return None
+    selected_fixtures = request.config.stash.get(SELECTED_FIXTURES_KEY, set(FIXTURE_NEEDS))
+    plan = plan_requests(selected_fixtures, FIXTURE_NEEDS, REQUESTS)
+    stats = plan.execute(dts_client, max_workers=request.config.getoption('--max-concurrency'))
+    LOGGER.info(f'Executed the request plan: {stats} ({dts_client.cache_info()})')
+    return plan
+
+def get_planned_result(request: pytest.FixtureRequest, key: str):
+    plan = request.getfixturevalue('request_plan')
+    # (fixtures requested dynamically are not known when the plan is built)
+    if key not in plan:
+        plan.add(key)
+        plan.execute(request.getfixturevalue('dts_client'))
+    return plan.result(key)
+
+def skip_no_citable_units(request: pytest.FixtureRequest):
+    pytest.skip(f'{get_planned_result(request, "resource")}: {SKIP_NO_CITABLE_UNITS_MESSAGE}')
 
 @pytest.fixture(
         scope='module',
@@ -98,6 +481,8 @@ def entry_endpoint_response(request: pytest.FixtureRequest, dts_client: Optional
     """
     # use remote API for tests
     if request.param is None and dts_client is not None:
+        # (with a snapshot, make sure that we validate the live response)
+        dts_client.wait_for_freshness_check()
         return dts_client._entry_endpoint_json
     # use mock/example data for tests
     elif request.param and dts_client is None:
@@ -125,7 +510,7 @@ def collection_endpoint_response_root(request: pytest.FixtureRequest, dts_client
     """
     # use remote API for tests
     if request.param is None and dts_client is not None:
-        dts_client.collections()
+        get_planned_result(request, 'collection_root')
         return dts_client._collection_endpoint_json
     # use mock/example data for tests
     elif request.param and dts_client is None:
@@ -149,10 +534,9 @@ def collection_endpoint_response_one(request: pytest.FixtureRequest, dts_client:
     """
     # use remote API for tests
     if request.param is None and dts_client is not None:
-        one_collection_id = dts_client.collections()[-1].id # let's take always the last one
         # TODO: use the URITemplate declared in `Resource.collection` rather than the one 
         # declared by the Entry endpoint
-        return dts_client.collections(id=one_collection_id)._json # get full collection metadata from the API
+        return get_planned_result(request, 'collection_one')._json # full metadata of the last collection
     # use mock/example data for tests
     elif request.param and dts_client is None:
         tests_dir = os.path.dirname(request.module.__file__)
@@ -175,8 +559,7 @@ def collection_endpoint_response_readable(request: pytest.FixtureRequest, dts_cl
     """
     # use remote API for tests
     if request.param is None and dts_client is not None:
-        readable_resource_id = dts_client.get_one_resource().id
-        return dts_client.collections(id=readable_resource_id)._json
+        return get_planned_result(request, 'resource_full')._json
     # use mock/example data for tests
     elif request.param and dts_client is None:
         tests_dir = os.path.dirname(request.module.__file__)
@@ -206,8 +589,7 @@ def navigation_endpoint_response_down_one(
     """
     # use remote API for tests
     if request.param is None and dts_client is not None:
-        readable_resource = dts_client.get_one_resource()
-        return dts_client.navigation(resource=readable_resource, down=1)
+        return get_planned_result(request, 'navigation_down_one')
     # use mock/example data for tests
     elif request.param and dts_client is None:
         tests_dir = os.path.dirname(request.module.__file__)
@@ -237,9 +619,8 @@ def navigation_endpoint_response_down_two(
     """
     # use remote API for tests
     if request.param is None and dts_client is not None:
-        readable_resource = dts_client.get_one_resource()
         # TODO: here we should check the maxCiteDepth in the default CitationTree
-        return dts_client.navigation(resource=readable_resource, down=2)
+        return get_planned_result(request, 'navigation_down_two')
     # use mock/example data for tests
     elif request.param and dts_client is None:
         tests_dir = os.path.dirname(request.module.__file__)
@@ -269,19 +650,11 @@ def navigation_endpoint_response_ref(
     """
     # use remote API for tests
     if request.param is None and dts_client is not None:
-        readable_resource = dts_client.get_one_resource()
-        
-        # first we need to get all resource's citable units
-        navigation_obj, response_obj = dts_client.navigation(resource=readable_resource, down=1)
-        
-        # if the Resource has citable units, we pick by default the last one
-        # and use it to query its subtree
-        if navigation_obj.citable_units:
-            target_citable_unit = navigation_obj.citable_units[-1]
-            return dts_client.navigation(resource=readable_resource, reference=target_citable_unit, down=-1)
-        # otherwise we skip the test
-        else:
-            pytest.skip(f'{navigation_obj.resource}: {SKIP_NO_CITABLE_UNITS_MESSAGE}')
+        # the subtree of the last citable unit of the Resource (None if the Resource has no citable units)
+        navigation = get_planned_result(request, 'navigation_ref')
+        if navigation is None:
+            skip_no_citable_units(request)
+        return navigation
     # use mock/example data for tests
     elif request.param and dts_client is None:
         tests_dir = os.path.dirname(request.module.__file__)
@@ -312,18 +685,11 @@ def navigation_endpoint_response_top_ref_down_two(
     """
     # use remote API for tests
     if request.param is None and dts_client is not None:
-        readable_resource = dts_client.get_one_resource()
-        
-        # first we need to get all resource's citable units
-        navigation_obj, response_obj = dts_client.navigation(resource=readable_resource, down=1)
-        
-        # if the Resource has citable units, we pick by default the last one
-        # and use it to query its subtree
-        if navigation_obj.citable_units:
-            target_citable_unit = navigation_obj.citable_units[-1]
-            return dts_client.navigation(resource=readable_resource, reference=target_citable_unit, down=2)
-        else:
-            pytest.skip(f'{navigation_obj.resource}: {SKIP_NO_CITABLE_UNITS_MESSAGE}')
+        # the subtree of the last citable unit of the Resource (None if the Resource has no citable units)
+        navigation = get_planned_result(request, 'navigation_top_ref_down_two')
+        if navigation is None:
+            skip_no_citable_units(request)
+        return navigation
     # use mock/example data for tests
     elif request.param and dts_client is None:
         tests_dir = os.path.dirname(request.module.__file__)
@@ -355,8 +721,11 @@ def navigation_endpoint_response_low_ref_down_one(
     """
     # use remote API for tests
     if request.param is None and dts_client is not None:
-        # TODO: finish implementation
-        pytest.skip('Not implemented yet; depends on changes to `client.DTS_API`')
+        # the children of the last citable unit below the top level (None if the Resource has none)
+        navigation = get_planned_result(request, 'navigation_low_ref_down_one')
+        if navigation is None:
+            pytest.skip(f'{get_planned_result(request, "resource")}: no citable units below the top level')
+        return navigation
     # use mock/example data for tests
     elif request.param and dts_client is None:
         tests_dir = os.path.dirname(request.module.__file__)
@@ -387,24 +756,11 @@ def navigation_endpoint_response_range_plus_down(
     """
     # use remote API for tests
     if request.param is None and dts_client is not None:
-        readable_resource = dts_client.get_one_resource()
-        
-        # first we need to get all resource's citable units
-        navigation_obj, response_obj = dts_client.navigation(resource=readable_resource, down=1)
-        
-        # if the Resource has citable units, we define a range of refs (first-last),
-        # and use this range to query the navigation endpoint
-        if navigation_obj.citable_units:
-            start_ref = navigation_obj.citable_units[0]
-            end_ref = navigation_obj.citable_units[-1]
-            return dts_client.navigation(
-                resource=readable_resource,
-                start=start_ref,
-                end=end_ref,
-                down=1
-            )
-        else:
-            pytest.skip(f'{navigation_obj.resource}: {SKIP_NO_CITABLE_UNITS_MESSAGE}')
+        # the range between the first and last citable units of the Resource (None if it has no citable units)
+        navigation = get_planned_result(request, 'navigation_range_plus_down')
+        if navigation is None:
+            skip_no_citable_units(request)
+        return navigation
     # use mock/example data for tests
     elif request.param and dts_client is None:
         tests_dir = os.path.dirname(request.module.__file__)
@@ -434,23 +790,11 @@ def navigation_endpoint_response_range(
     """
     # use remote API for tests
     if request.param is None and dts_client is not None:
-        readable_resource = dts_client.get_one_resource()
-        
-        # first we need to get all resource's citable units
-        navigation_obj, response_obj = dts_client.navigation(resource=readable_resource, down=1)
-        
-        # if the Resource has citable units, we define a range of refs (first-last),
-        # and use this range to query the navigation endpoint
-        if navigation_obj.citable_units:
-            start_ref = navigation_obj.citable_units[0]
-            end_ref = navigation_obj.citable_units[-1]
-            return dts_client.navigation(
-                resource=readable_resource,
-                start=start_ref,
-                end=end_ref
-            )
-        else:
-            pytest.skip(f'{navigation_obj.resource}: {SKIP_NO_CITABLE_UNITS_MESSAGE}')
+        # the range between the first and last citable units of the Resource (None if it has no citable units)
+        navigation = get_planned_result(request, 'navigation_range')
+        if navigation is None:
+            skip_no_citable_units(request)
+        return navigation
     # use mock/example data for tests
     elif request.param and dts_client is None:
         tests_dir = os.path.dirname(request.module.__file__)
@@ -485,10 +829,7 @@ def document_endpoint_response_resource(
     """
     # use remote API for tests
     if request.param is None and dts_client is not None:
-        one_resource = dts_client.get_one_resource()
-        return dts_client.document(
-            resource=one_resource
-        )
+        return get_planned_result(request, 'document_resource')
     # use mock/example data for tests
     elif request.param and dts_client is None:
         tests_dir = os.path.dirname(request.module.__file__)
@@ -526,11 +867,7 @@ def document_endpoint_response_range(
     if response_object and dts_client is not None:
         assert navigation_object
         assert navigation_object.start and navigation_object.end and navigation_object.resource
-        return dts_client.document(
-            resource=navigation_object.resource,
-            start=navigation_object.start,
-            end=navigation_object.end
-        )
+        return get_planned_result(request, 'document_range')
     # use mock/example data for tests
     elif request.param and dts_client is None:
         tests_dir = os.path.dirname(request.module.__file__)
@@ -570,11 +907,7 @@ def document_endpoint_response_ref(
         assert navigation_object
         # if the Resource has no citable units (this may happen) we skip the test 
         if navigation_object.citable_units:
-            one_reference = navigation_object.citable_units[0]
-            return dts_client.document(
-                resource=navigation_object.resource,
-                reference=one_reference
-            )
+            return get_planned_result(request, 'document_ref')
         else:
             pytest.skip(f'{navigation_object.resource}: {SKIP_NO_CITABLE_UNITS_MESSAGE}')
     # use mock/example data for tests
@@ -583,4 +916,142 @@ def document_endpoint_response_ref(
         document = load_mock_data(tests_dir, request.param)
         return (document, None) 
     else:
-        pytest.skip()
\ No newline at end of file
+        pytest.skip()
+
+@pytest.fixture(
+        scope='module',
+        params=[
+            pytest.param(None), # response is None,
+            'document/document_mock_response_ref.xml', # mock Document fragment
+            pytest.param('document/document_mock_response_empty_wrapper.xml', marks=pytest.mark.xfail), # fragment with empty <dts:wrapper>
+        ]
+)
+def document_endpoint_response_fragment(
+    request: pytest.FixtureRequest,
+    dts_client: Optional[DTS_API],
+    navigation_endpoint_response_down_one: Tuple[Optional[DTS_Navigation], requests.models.Response]
+) -> Tuple[Optional[str], requests.models.Response]:
+    """
+    This fixture returns the Document fragment of one citable unit. It is used
+    to check the content of fragments (well-formedness, `<dts:wrapper>`).
+
+    If no URI is provided via the `--entry-endpoint` parameter, a number of tests on
+    mock/example data will be performed (otherwise they will be skipped).
+    """
+    navigation_object, response_object = navigation_endpoint_response_down_one
+
+    # use remote API for tests
+    if request.param is None and response_object and dts_client is not None:
+        if navigation_object.citable_units:
+            return get_planned_result(request, 'document_ref')
+        else:
+            pytest.skip(f'{navigation_object.resource}: {SKIP_NO_CITABLE_UNITS_MESSAGE}')
+    # use mock/example data for tests
+    elif request.param and dts_client is None:
+        tests_dir = os.path.dirname(request.module.__file__)
+        document = load_mock_data(tests_dir, request.param)
+        return (document, None)
+    else:
+        pytest.skip(SKIP_MOCK_TESTS_MESSAGE)
+
+@pytest.fixture(scope='module')
+def document_endpoint_responses_bulk(
+    request: pytest.FixtureRequest,
+    dts_client: Optional[DTS_API]
+) -> FragmentValidationReport:
+    """
+    This fixture fetches and validates (concurrently) the Document fragments of all the citable
+    units of a `Resource`, as advertised by the Navigation endpoint (`down=-1`). Only a sample
+    of `--document-sample` units is fetched; if `--document-range-size` is provided, contiguous
+    units are fetched in `start`/`end` ranges.
+
+    Requires a remote DTS API (via the `--entry-endpoint` parameter).
+    """
+    if dts_client is None:
+        pytest.skip('Bulk Document requests require a remote DTS API')
+
+    navigation_obj, response_obj = get_planned_result(request, 'navigation_full')
+    if navigation_obj is None or not navigation_obj.citable_units:
+        pytest.skip(f'{get_planned_result(request, "resource")}: {SKIP_NO_CITABLE_UNITS_MESSAGE}')
+
+    sample = request.config.getoption('--document-sample') or None
+    return validate_document_fragments(
+        dts_client,
+        navigation_obj,
+        sample=sample,
+        range_size=request.config.getoption('--document-range-size')
+    )
+
+@pytest.fixture(scope='module', params=['navigation', 'document'])
+def parameter_fuzzing_report(request: pytest.FixtureRequest, dts_client: Optional[DTS_API]) -> ParameterFuzzReport:
+    """
+    This fixture requests the Navigation and Document endpoints (concurrently) with the valid and
+    invalid combinations of parameters derived from their URI templates (e.g. `ref` together with
+    `start`/`end`), for up to `--fuzz-max-resources` resources, and checks the status of each
+    response. Requests stop once `--fuzz-error-budget` failures have been found.
+
+    Requires a remote DTS API (via the `--entry-endpoint` parameter).
+    """
+    if dts_client is None:
+        pytest.skip('Requests with invalid parameters require a remote DTS API')
+
+    max_resources = request.config.getoption('--fuzz-max-resources') or None
+    resources = itertools.islice(dts_client.iter_resources(shard=request.config.getoption('--shard')), max_resources)
+    return fuzz_parameters(
+        dts_client,
+        resources,
+        request.param,
+        error_budget=request.config.getoption('--fuzz-error-budget') or None
+    )
+
+#####################################################
+#     Fixtures for cross-endpoint consistency       #
+#####################################################
+
+@pytest.fixture(
+        scope='module',
+        params=[
+            pytest.param(None), # the responses come from the remote DTS API being tested
+            'navigation/navigation_docs_response_down_one.json', # JSON response from the documentation examples
+            # the documentation example has a level 1 unit (`C3`) declared with `level: 2`
+            pytest.param('navigation/navigation_docs_response_down_two.json', marks=pytest.mark.xfail),
+        ]
+)
+def consistency_results(request: pytest.FixtureRequest, dts_client: Optional[DTS_API]) -> List[ConsistencyResult]:
+    """
+    This fixture returns the results of the cross-endpoint consistency checks (Collection vs
+    Navigation vs Document endpoints). With a remote DTS API, up to `--consistency-max-resources`
+    resources are checked; with mock data, the Resource embedded in a Navigation response
+    is checked against the response itself.
+    """
+    # use remote API for tests
+    if request.param is None and dts_client is not None:
+        max_resources = request.config.getoption('--consistency-max-resources') or None
+        shard = request.config.getoption('--shard')
+        journal = None
+        if request.config.getoption('--journal'):
+            journal = Journal(
+                request.config.getoption('--journal'),
+                {'sweep': 'consistency', 'entry_endpoint_uri': dts_client.entry_endpoint_uri, 'shard': str(shard) if shard else None},
+                resume=request.config.getoption('--resume')
+            )
+        try:
+            return list(check_corpus_consistency(
+                dts_client,
+                resources=dts_client.iter_resources(shard=shard, state=journal),
+                max_resources=max_resources,
+                range_size=request.config.getoption('--document-range-size'),
+                walk_tree=request.config.getoption('--walk-citation-trees'),
+                max_tree_units=request.config.getoption('--citation-tree-max-units') or None,
+                journal=journal
+            ))
+        finally:
+            if journal is not None:
+                journal.close()
+    # use mock/example data for tests
+    elif request.param and dts_client is None:
+        tests_dir = os.path.dirname(request.module.__file__)
+        navigation = DTS_Navigation(load_mock_data(tests_dir, request.param))
+        return check_resource_consistency(ResourceData(navigation.resource, navigation, None, full_tree=True))
+    else:
+        pytest.skip(SKIP_MOCK_TESTS_MESSAGE)
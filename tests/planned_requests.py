@@ -0,0 +1,77 @@
+from typing import Any, Dict, Optional, Tuple
+from dts_validator.planner import PlannedRequest
+
+def _resource(dts_client):
+    return dts_client.get_one_resource()
+
+def _resource_full(dts_client, resource):
+    # the member stub embedded in the parent collection is not the resource's own Collection response
+    return dts_client.collections(id=resource.id)
+
+def _collection_one(dts_client, collection_root):
+    # let's take always the last one
+    return dts_client.collections(id=collection_root[-1].id)
+
+def _units(navigation_result) -> Optional[Tuple[Any, Any]]:
+    """Returns the first and last citable units of a Navigation response (None if it has none)."""
+    navigation, _ = navigation_result
+    if navigation is None or not navigation.citable_units:
+        return None
+    return (navigation.citable_units[0], navigation.citable_units[-1])
+
+def _navigation_from_last_unit(down: int):
+    def fetch(dts_client, resource, navigation_down_one):
+        units = _units(navigation_down_one)
+        if units is None:
+            return None
+        return dts_client.navigation(resource=resource, reference=units[1], down=down)
+    return fetch
+
+def _navigation_low_ref_down_one(dts_client, resource, navigation_down_two):
+    navigation, _ = navigation_down_two
+    if navigation is None:
+        return None
+    low_units = [unit for unit in navigation.citable_units if unit.level > 1]
+    if not low_units:
+        return None
+    return dts_client.navigation(resource=resource, reference=low_units[-1], down=1)
+
+def _navigation_range(down: Optional[int]):
+    def fetch(dts_client, resource, navigation_down_one):
+        units = _units(navigation_down_one)
+        if units is None:
+            return None
+        return dts_client.navigation(resource=resource, start=units[0], end=units[1], down=down)
+    return fetch
+
+def _document_ref(dts_client, navigation_down_one):
+    units = _units(navigation_down_one)
+    if units is None:
+        return None
+    return dts_client.document(resource=navigation_down_one[0].resource, reference=units[0])
+
+def _document_range(dts_client, navigation_range):
+    if navigation_range is None or navigation_range[0] is None:
+        return None
+    navigation = navigation_range[0]
+    return dts_client.document(resource=navigation.resource, start=navigation.start, end=navigation.end)
+
+# the data needed by the checks, and how to get it from the DTS API
+# (nodes returning None have nothing to test, e.g. a resource without citable units)
+REQUESTS: Dict[str, PlannedRequest] = {request.key: request for request in [
+    PlannedRequest('collection_root', lambda dts_client: dts_client.collections()),
+    PlannedRequest('collection_one', _collection_one, ('collection_root',)),
+    PlannedRequest('resource', _resource),
+    PlannedRequest('resource_full', _resource_full, ('resource',)),
+    PlannedRequest('navigation_down_one', lambda dts_client, resource: dts_client.navigation(resource=resource, down=1), ('resource',)),
+    PlannedRequest('navigation_down_two', lambda dts_client, resource: dts_client.navigation(resource=resource, down=2), ('resource',)),
+    PlannedRequest('navigation_full', lambda dts_client, resource: dts_client.navigation(resource=resource, down=-1), ('resource',)),
+    PlannedRequest('navigation_ref', _navigation_from_last_unit(down=-1), ('resource', 'navigation_down_one')),
+    PlannedRequest('navigation_top_ref_down_two', _navigation_from_last_unit(down=2), ('resource', 'navigation_down_one')),
+    PlannedRequest('navigation_low_ref_down_one', _navigation_low_ref_down_one, ('resource', 'navigation_down_two')),
+    PlannedRequest('navigation_range_plus_down', _navigation_range(down=1), ('resource', 'navigation_down_one')),
+    PlannedRequest('navigation_range', _navigation_range(down=None), ('resource', 'navigation_down_one')),
+    PlannedRequest('document_resource', lambda dts_client, resource: dts_client.document(resource=resource), ('resource',)),
+    PlannedRequest('document_ref', _document_ref, ('navigation_down_one',)),
+    PlannedRequest('document_range', _document_range, ('navigation_range',)),
+]}
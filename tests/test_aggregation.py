@@ -0,0 +1,101 @@
+import io
+import logging
+from dts_validator.aggregation import FailureAggregator, RepeatedRecordFilter, failure_signature, message_pattern, pointer_pattern
+from dts_validator.engine import check_json_response, run
+from dts_validator.reporting import make_result, render_html_report, ResultSink
+
+def make_navigation(units, cite_type=None):
+    members = [
+        {'identifier': str(index), '@type': 'CitableUnit', 'level': 1, 'parent': None, 'citeType': cite_type or 'line'}
+        for index in range(units)
+    ]
+    return {
+        '@id': 'https://example.org/api/dts/navigation/?resource=r', '@type': 'Navigation', 'dtsVersion': 'unstable',
+        'resource': {'@id': 'r', '@type': 'Resource', 'citationTrees': [], 'navigation': 'n', 'document': 'd'},
+        'member': members,
+    }
+
+def test_patterns():
+    assert pointer_pattern('/member/12/citeType') == '/member/*/citeType'
+    assert pointer_pattern('/member/12') == '/member/*'
+    assert message_pattern('HTTP 404 for https://example.org/api/dts/collection/?id=3') == 'HTTP # for <uri>'
+    assert message_pattern('def test():\n    assert x\nE   AssertionError: 2 != 3\nmore') == 'AssertionError: # != #'
+
+def test_schema_failures_are_grouped_by_keyword_and_pointer():
+    aggregator = FailureAggregator(max_exemplars=2)
+    for index in range(50):
+        navigation = make_navigation(3)
+        navigation['member'][index % 3]['citeType'] = index
+        result = check_json_response(navigation, f'resource-{index}', 'navigation')
+        assert result['keyword'] == 'type'
+        aggregator.add(result)
+    aggregator.add(check_json_response({'@type': 'Navigation'}, 'other', 'navigation'))
+    aggregator.add(make_result('passed::navigation', 'passed'))
+
+    groups = aggregator.groups()
+    assert aggregator.failures == 51
+    assert [(tuple(group.signature), group.count) for group in groups] == [
+        (('navigation', 'type', '/member/*/citeType'), 50),
+        (('navigation', 'required', ''), 1),
+    ]
+    assert len(groups[0].exemplars) == 2
+    assert failure_signature(make_result('a::document', 'failed', message='HTTP 500')) == ('a', 'failed', 'HTTP #')
+
+def test_groups_are_bounded():
+    aggregator = FailureAggregator(max_groups=5)
+    for index in range(20):
+        aggregator.add(make_result(f'r{index}::collection', 'failed', message=f'Error {"x" * index}', group='collection'))
+    groups = aggregator.groups()
+    assert len(groups) == 6
+    assert groups[0].count == 15 and groups[0].signature.pattern == 'other failures'
+
+def test_run_prints_a_few_failures_per_group(tmp_path):
+    results = [check_json_response(make_navigation(1, cite_type=1), f'resource-{index}', 'navigation') for index in range(30)]
+    output = io.StringIO()
+    summary = run(results, output=output, quiet=True, max_printed_failures=3)
+    lines = output.getvalue().splitlines()
+    assert summary.failures == 30
+    assert len([line for line in lines if line.startswith('FAILED')]) == 3
+    assert '30 failures in 1 groups:' in lines
+
+    with ResultSink(str(tmp_path / 'results.jsonl')) as sink:
+        for result in results:
+            sink.write(result)
+    render_html_report(str(tmp_path / 'results.jsonl'), str(tmp_path / 'report.html'))
+    report = (tmp_path / 'report.html').read_text()
+    assert 'Failures by signature (1 groups)' in report
+    assert '/member/*/citeType' in report
+
+def test_repeated_log_records_are_suppressed():
+    logger = logging.getLogger('test_aggregation')
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+    logger.addFilter(RepeatedRecordFilter(max_repeats=3, report_every=10))
+    try:
+        for index in range(23):
+            logger.error(f'The required property is missing in response {index}')
+        logger.error('Another error')
+    finally:
+        logger.removeHandler(handler)
+    messages = [record.getMessage() for record in records]
+    assert len(messages) == 6
+    assert messages[3] == 'The required property is missing in response 12 [10 similar messages suppressed]'
+    assert messages[-1] == 'Another error'
+
+def test_repeated_log_records_with_identifiers_are_suppressed():
+    logger = logging.getLogger('test_aggregation.identifiers')
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+    logger.addFilter(RepeatedRecordFilter(max_repeats=3))
+    try:
+        for index in range(24):
+            logger.error('The required property is missing (@id: %s)', f'urn:cts:greekLit:tlg00{index}.tlg001')
+            logger.error(f'Resource urn:cts:latinLit:phi{index}.phi001 failed')
+    finally:
+        logger.removeHandler(handler)
+    assert len(records) == 6
+    assert message_pattern('Resource urn:cts:latinLit:phi1.phi001 failed') == 'Resource <uri> failed'
@@ -0,0 +1,36 @@
+import os
+import shutil
+import tarfile
+import zipfile
+import pytest
+from dts_validator.bulk import iter_sources, validate_dumps
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+@pytest.fixture(scope='module')
+def response_dumps(tmp_path_factory):
+    """Copies the example responses of `tests/data` into a directory, a tar and a zip archive."""
+    dumps_dir = tmp_path_factory.mktemp('dumps')
+    shutil.copytree(DATA_DIR, dumps_dir / 'responses', ignore=shutil.ignore_patterns('*.xml'))
+    with tarfile.open(dumps_dir / 'responses.tar.gz', 'w:gz') as archive:
+        archive.add(dumps_dir / 'responses', arcname='responses')
+    with zipfile.ZipFile(dumps_dir / 'responses.zip', 'w') as archive:
+        for root, _, files in os.walk(dumps_dir / 'responses'):
+            for filename in files:
+                archive.write(os.path.join(root, filename), arcname=filename)
+    return [str(dumps_dir / name) for name in ['responses', 'responses.tar.gz', 'responses.zip']]
+
+def test_iter_sources(response_dumps):
+    """Checks that the JSON responses are found in directories and archives."""
+    sources = list(iter_sources(response_dumps))
+    assert len(sources) == 3 * 12
+    assert all(content is None for name, content in sources[:12])
+    assert all(isinstance(content, bytes) for name, content in sources[12:])
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_validate_dumps(response_dumps, processes):
+    """Checks the results of the bulk validation (only the two invalid Entry examples fail)."""
+    results = list(validate_dumps(response_dumps, processes=processes, chunk_size=5))
+    assert len(results) == 3 * 12
+    failed = sorted(os.path.basename(result['source'].split('!')[-1]) for result in results if result['outcome'] != 'passed')
+    assert failed == sorted(['entry_invalid_response.json', 'entry_old_response.json'] * 3)
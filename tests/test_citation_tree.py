@@ -0,0 +1,76 @@
+from typing import Dict, List, Optional
+from dts_validator.client import DTS_Navigation, DTS_Resource
+from dts_validator.citation_tree import compare_citation_trees, get_max_cite_depth, walk_citation_tree
+
+RESOURCE_JSON = {'@id': 'urn:resource', '@type': 'Resource', 'citationTrees': [{'@type': 'CitationTree', 'maxCiteDepth': 3}]}
+
+def make_units(books: int = 3, chapters: int = 4, sections: int = 2) -> List[Dict]:
+    units = []
+    for b in range(1, books + 1):
+        units.append({'identifier': f'{b}', 'level': 1, 'parent': None, 'citeType': 'book'})
+        for c in range(1, chapters + 1):
+            units.append({'identifier': f'{b}.{c}', 'level': 2, 'parent': f'{b}', 'citeType': 'chapter'})
+            for s in range(1, sections + 1):
+                units.append({'identifier': f'{b}.{c}.{s}', 'level': 3, 'parent': f'{b}.{c}', 'citeType': 'section'})
+    return units
+
+class MockClient(object):
+    """Serves Navigation responses (`down=1`, `ref=<unit>&down=1`, `down=-1`) for a fixed list of units."""
+
+    def __init__(self, units: List[Dict]) -> None:
+        self.units = units
+        self.requests = []
+
+    def navigation(self, resource, down: Optional[int] = None, reference=None, start=None, end=None):
+        self.requests.append((reference.id if reference else None, down))
+        if reference is not None:
+            ref = next(unit for unit in self.units if unit['identifier'] == reference.id)
+            members = [ref] + [unit for unit in self.units if unit['parent'] == reference.id]
+        elif down == -1:
+            members = self.units
+        else:
+            members = [unit for unit in self.units if unit['level'] == 1]
+        return (DTS_Navigation({'@id': 'nav', 'resource': RESOURCE_JSON, 'member': members}), None)
+
+    def map(self, function, items, max_workers=None):
+        for item in items:
+            yield (item, function(item))
+
+def test_walk_citation_tree():
+    """Checks that the tree walked level by level matches the full tree, in document order."""
+    units = make_units()
+    client = MockClient(units)
+    resource = DTS_Resource(RESOURCE_JSON)
+    tree = walk_citation_tree(client, resource, max_depth=get_max_cite_depth(resource))
+    assert [unit.id for unit in tree.iter_units()] == [unit['identifier'] for unit in units]
+    assert tree.depth == 3 and not tree.truncated and not tree.errors
+    # one request for the top level, then one per unit above `maxCiteDepth`
+    assert tree.requests == 1 + 3 + 3 * 4
+
+    full_navigation, _ = client.navigation(None, down=-1)
+    assert compare_citation_trees(tree, full_navigation) == []
+
+def test_walk_citation_tree_limits():
+    client = MockClient(make_units())
+    tree = walk_citation_tree(client, DTS_Resource(RESOURCE_JSON), max_depth=2)
+    assert tree.depth == 2 and len(tree) == 3 + 3 * 4
+    # (the units deeper than `max_depth` are not reported as unreachable)
+    assert compare_citation_trees(tree, client.navigation(None, down=-1)[0]) == []
+
+    # without `max_depth`, the units of the last level are expanded as well
+    tree = walk_citation_tree(client, DTS_Resource(RESOURCE_JSON))
+    assert tree.depth == 3 and tree.requests == 1 + 3 + 3 * 4 + 3 * 4 * 2
+
+    tree = walk_citation_tree(client, DTS_Resource(RESOURCE_JSON), max_units=10)
+    assert tree.truncated and len(tree) == 10
+
+def test_compare_citation_trees_inconsistencies():
+    """Checks that units missing from (or misplaced in) the down=-1 response are reported."""
+    units = make_units(books=2, chapters=2, sections=0)
+    tree = walk_citation_tree(MockClient(units), DTS_Resource(RESOURCE_JSON))
+    inconsistent_units = [dict(unit) for unit in units if unit['identifier'] != '2.2']
+    inconsistent_units[2]['parent'] = '2'
+    full_navigation = DTS_Navigation({'@id': 'nav', 'resource': RESOURCE_JSON, 'member': inconsistent_units})
+    problems = compare_citation_trees(tree, full_navigation)
+    assert any('missing with down=-1' in problem for problem in problems)
+    assert any("'1.2' is a child of '1'" in problem for problem in problems)
@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+import time
+import requests
+from dts_validator.cache import ResponseCache
+from dts_validator.client import DTS_API, DTS_CitableUnit, SNAPSHOT_VERSION, group_citable_units
+from dts_validator.throttling import TokenBucket, AdaptiveConcurrencyController, parse_retry_after
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+def test_token_bucket_rate():
+    """Checks that a token bucket does not hand out more tokens than its rate allows."""
+    bucket = TokenBucket(rate=50, capacity=1)
+    start_time = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # the first token is available immediately, the other five take 1/50s each
+    assert time.monotonic() - start_time >= 0.09
+
+def test_token_bucket_unlimited():
+    """Checks that a token bucket without rate never blocks."""
+    bucket = TokenBucket()
+    assert sum(bucket.acquire() for _ in range(1000)) == 0
+
+def test_concurrency_controller_increase_and_backoff():
+    """Checks that the concurrency limit grows while latency is stable, and is halved on backoff."""
+    controller = AdaptiveConcurrencyController(initial=2, maximum=8)
+    for _ in range(20):
+        controller.record_success(0.1)
+    assert controller.limit > 2
+
+    limit = controller.limit
+    controller.record_backoff('HTTP 429')
+    assert controller.limit == limit // 2
+
+def test_concurrency_controller_rising_latency():
+    """Checks that the concurrency limit is reduced when latency rises."""
+    controller = AdaptiveConcurrencyController(initial=8, maximum=8)
+    controller.record_success(0.1)
+    for _ in range(20):
+        controller.record_success(2.0)
+    assert controller.limit < 8
+
+def test_concurrency_controller_ignores_small_latency_increases():
+    """Checks that latency increases of a few milliseconds (e.g. on a local server) are not
+    taken for an overloaded server."""
+    controller = AdaptiveConcurrencyController(initial=4, maximum=8)
+    controller.record_success(0.001)
+    for _ in range(20):
+        controller.record_success(0.01)
+    assert controller.limit > 4
+
+def test_parse_retry_after():
+    """Checks the parsing of `Retry-After` header values."""
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after(None, default=1.5) == 1.5
+    assert parse_retry_after('not a date', default=2.0) == 2.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('3600', maximum=120.0) == 120.0
+
+def test_response_cache_lru():
+    """Checks that the response cache memoizes values, and evicts the least recently used ones."""
+    cache = ResponseCache(maxsize=2)
+    fetched = []
+    fetch = lambda key: fetched.append(key) or key.upper()
+
+    assert cache.get_or_fetch('a', fetch) == 'A'
+    assert cache.get_or_fetch('b', fetch) == 'B'
+    assert cache.get_or_fetch('a', fetch) == 'A'
+    cache.get_or_fetch('c', fetch)  # evicts `b`
+    assert 'b' not in cache and 'a' in cache
+    assert fetched == ['a', 'b', 'c']
+    assert cache.info().hits == 1 and cache.info().misses == 3
+
+def test_response_cache_coalescing():
+    """Checks that concurrent requests for the same key result in one single fetch."""
+    cache = ResponseCache(maxsize=0)
+    release = threading.Event()
+    fetched = []
+
+    def slow_fetch(key):
+        fetched.append(key)
+        release.wait(timeout=5)
+        return key
+
+    threads = [threading.Thread(target=cache.get_or_fetch, args=('uri', slow_fetch)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while cache.info().coalesced < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert fetched == ['uri']
+    assert len(cache) == 0
+
+def test_group_citable_units():
+    """Checks that contiguous citable units of the same level are grouped into ranges."""
+    units = [
+        DTS_CitableUnit({"identifier": identifier, "level": identifier.count('.') + 1, "citeType": "poem"})
+        for identifier in ['1', '1.1', '1.2', '1.3', '2', '2.1']
+    ]
+    ranges = [(start.id, end.id if end else None) for start, end in group_citable_units(units, range_size=2)]
+    assert ranges == [('1', None), ('1.1', '1.2'), ('1.3', None), ('2', None), ('2.1', None)]
+
+def make_snapshot(entry_json):
+    return {
+        'version': SNAPSHOT_VERSION,
+        'created': time.time(),
+        'entry_endpoint_uri': 'https://example.org/api/dts',
+        'entry': entry_json,
+        'collection_root': None,
+        'resources': {'urn:resource': {'@id': 'urn:resource', '@type': 'Resource'}},
+        'capabilities': {'content_type': 'application/ld+json', 'concurrency_limits': {'example.org': 6}},
+    }
+
+def test_client_snapshot_round_trip(tmp_path):
+    """Checks that a client created from a snapshot needs no request to start, and that
+    its snapshot can be dumped and loaded again."""
+    with open(os.path.join(DATA_DIR, 'entry', 'entry_docs_response.json'), 'r') as json_file:
+        entry_json = json.load(json_file)
+    client = DTS_API.from_snapshot(make_snapshot(entry_json), check_freshness=False)
+    assert client.cache_info().misses == 0
+    assert client._navigation_endpoint_template.uri == entry_json['navigation']
+    assert client.throttle('https://example.org/api/dts/navigation').controller.limit == 6
+
+    snapshot_path = str(tmp_path / 'snapshot.json.gz')
+    client.dump_snapshot(snapshot_path)
+    reloaded = DTS_API.from_snapshot(snapshot_path, check_freshness=False)
+    assert reloaded._entry_endpoint_json == entry_json
+    assert list(reloaded._discovered_resources) == ['urn:resource']
+    assert reloaded.wait_for_freshness_check() is None
+
+def test_client_snapshot_freshness_check(monkeypatch):
+    """Checks that the Entry endpoint is reloaded when it changed since the snapshot."""
+    with open(os.path.join(DATA_DIR, 'entry', 'entry_docs_response.json'), 'r') as json_file:
+        entry_json = json.load(json_file)
+    live_entry_json = dict(entry_json, navigation='/api/dts/v2/navigation{?resource,ref,start,end,down}')
+    monkeypatch.setattr(DTS_API, '_fetch_entry', lambda client: live_entry_json)
+
+    client = DTS_API.from_snapshot(make_snapshot(entry_json))
+    assert client.wait_for_freshness_check(timeout=5) is False
+    assert client._navigation_endpoint_template.uri == live_entry_json['navigation']
+    assert client._discovered_resources == {}
+
+def make_json_response(uri, status_code, body=None):
+    response = requests.models.Response()
+    response.status_code = status_code
+    response.url = uri
+    response.headers['Content-Type'] = 'application/ld+json'
+    response._content = json.dumps(body).encode('utf-8') if body is not None else b''
+    return response
+
+def test_snapshot_resource_removed_since_the_snapshot():
+    """Checks that a resource of the snapshot that was removed from the API is skipped, and
+    that a resource is then found by walking the collection tree."""
+    with open(os.path.join(DATA_DIR, 'entry', 'entry_docs_response.json'), 'r') as json_file:
+        entry_json = json.load(json_file)
+    other = {'@id': 'urn:other', '@type': 'Resource'}
+
+    def serve(uri):
+        if 'urn%3Aresource' in uri:
+            return make_json_response(uri, 404)
+        if 'urn%3Aother' in uri:
+            return make_json_response(uri, 200, other)
+        return make_json_response(uri, 200, {'@id': 'root', '@type': 'Collection', 'member': [other]})
+
+    client = DTS_API.from_snapshot(make_snapshot(entry_json), check_freshness=False)
+    client._fetch = serve
+    assert client.get_one_resource().id == 'urn:other'
+    assert 'urn:resource' not in client._discovered_resources
+
+def test_nested_maps_stay_within_max_concurrency():
+    """Checks that maps run with `max_workers=1` inside the workers of another map (as the
+    consistency sweep does) add no thread to those of the outer map."""
+    with open(os.path.join(DATA_DIR, 'entry', 'entry_docs_response.json'), 'r') as json_file:
+        entry_json = json.load(json_file)
+    client = DTS_API.from_snapshot(make_snapshot(entry_json), check_freshness=False)
+    client.max_concurrency = 3
+    threads = set()
+
+    def fetch(item):
+        threads.add(threading.current_thread())
+        time.sleep(0.01)
+        return item
+
+    def check(resource):
+        return [result for _, result in client.map(fetch, range(4), max_workers=1)]
+
+    results = dict(client.map(check, range(6)))
+    assert results == {resource: [0, 1, 2, 3] for resource in range(6)}
+    assert len(threads) <= 3
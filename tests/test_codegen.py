@@ -0,0 +1,88 @@
+import copy
+import json
+import os
+import pytest
+from jsonschema.exceptions import best_match
+from dts_validator._generated_validators import VALIDATORS
+from dts_validator.codegen import GENERATED_PATH, generate, get_schema_hash
+from dts_validator.validation import SCHEMAS_DIR, get_validation_error, get_validator
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+# the schema of the responses of each directory of `tests/data`
+DATA_SCHEMAS = {
+    'entry': 'entry_response.schema.json',
+    'collection': 'collection_response.schema.json',
+    'navigation': 'navigation_response.schema.json',
+}
+
+# values substituted for each value of a response, to make it (possibly) invalid
+WRONG_VALUES = [None, 1, True, 'x', [], {}, ['x'], [{}]]
+
+def load_schema(schema_file):
+    with open(SCHEMAS_DIR / schema_file) as schema_file:
+        return json.load(schema_file)
+
+def iter_examples():
+    for directory, schema_file in DATA_SCHEMAS.items():
+        for file_name in sorted(os.listdir(os.path.join(DATA_DIR, directory))):
+            with open(os.path.join(DATA_DIR, directory, file_name)) as json_file:
+                yield pytest.param(schema_file, json.load(json_file), id=f'{directory}/{file_name}')
+
+def iter_paths(json_data, path=()):
+    yield path
+    if isinstance(json_data, dict):
+        for key, value in json_data.items():
+            yield from iter_paths(value, path + (key,))
+    elif isinstance(json_data, list):
+        for index, value in enumerate(json_data):
+            yield from iter_paths(value, path + (index,))
+
+def iter_mutations(json_data):
+    """Yields copies of a response where one value is replaced by a value of another type,
+    or one property is removed."""
+    for path in iter_paths(json_data):
+        for value in WRONG_VALUES:
+            mutated = copy.deepcopy(json_data)
+            if not path:
+                yield value
+                continue
+            parent = mutated
+            for part in path[:-1]:
+                parent = parent[part]
+            parent[path[-1]] = value
+            yield mutated
+        if path and isinstance(path[-1], str):
+            mutated = copy.deepcopy(json_data)
+            parent = mutated
+            for part in path[:-1]:
+                parent = parent[part]
+            del parent[path[-1]]
+            yield mutated
+
+def test_generated_module_is_up_to_date():
+    with open(GENERATED_PATH) as generated_file:
+        assert generated_file.read() == generate(), 'Run `python -m dts_validator.codegen` to regenerate the validators'
+
+def test_every_schema_has_a_generated_validator():
+    for schema_file in os.listdir(SCHEMAS_DIR):
+        if schema_file.endswith('.schema.json'):
+            assert get_schema_hash(load_schema(schema_file)) in VALIDATORS
+
+@pytest.mark.parametrize('schema_file,json_data', list(iter_examples()))
+def test_generated_validators_agree_with_jsonschema(schema_file, json_data):
+    json_schema = load_schema(schema_file)
+    fast_validator = VALIDATORS[get_schema_hash(json_schema)]
+    validator = get_validator(json_schema)
+    for document in [json_data] + list(iter_mutations(json_data)):
+        assert fast_validator(document) == (best_match(validator.iter_errors(document)) is None), document
+
+def test_rejected_responses_report_the_jsonschema_error():
+    json_schema = load_schema('navigation_response.schema.json')
+    with open(os.path.join(DATA_DIR, 'navigation', 'navigation_docs_response_down_two.json')) as json_file:
+        json_data = json.load(json_file)
+    json_data['member'][1]['level'] = '2'
+    error = get_validation_error(json_data, json_schema)
+    expected = best_match(get_validator(json_schema).iter_errors(json_data))
+    assert str(error) == str(expected)
+    assert list(error.path) == ['member', 1, 'level']
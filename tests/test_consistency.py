@@ -0,0 +1,17 @@
+import logging
+from typing import List
+from dts_validator.consistency import ConsistencyResult
+
+LOGGER = logging.getLogger(__name__)
+
+def test_cross_endpoint_consistency(consistency_results: List[ConsistencyResult]):
+    """Checks that what the Collection endpoint advertises for each `Resource` (URI templates,
+    `citationTrees`) is consistent with the responses of the Navigation endpoint, and that
+    the citable units it returns resolve in the Document endpoint.
+
+    :param consistency_results: The results of the consistency checks (Fixture)
+    :type consistency_results: List[ConsistencyResult]
+    """
+    assert consistency_results
+    failures = [result for result in consistency_results if not result.ok]
+    assert not failures, '\n'.join(f'{result.resource_id}: {result.check}: {result.message}' for result in failures)
@@ -0,0 +1,83 @@
+import json
+import os
+import random
+from dts_validator.corpus_stats import CorpusStatistics, HyperLogLog, QuantileSketch, SpaceSaving, cite_structure_depth
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+class FakeResponse(object):
+    def __init__(self, json_data=None, content=None, url='https://example.org/api/dts/navigation/?resource=r&down=-1'):
+        self.content = content if content is not None else json.dumps(json_data).encode('utf-8')
+        self.url = url
+
+def load(endpoint, name):
+    with open(os.path.join(DATA_DIR, endpoint, name), 'r') as f:
+        return json.load(f)
+
+def test_hyperloglog_estimates_distinct_counts():
+    for distinct in (10, 1000, 50000):
+        sketch = HyperLogLog()
+        for index in range(distinct * 2):
+            sketch.add(f'urn:resource:{index % distinct}')
+        assert abs(sketch.count() - distinct) <= distinct * 0.05
+
+def test_quantile_sketch_is_within_relative_accuracy():
+    rng = random.Random(0)
+    values = [rng.lognormvariate(8, 2) for _ in range(20000)] + [0] * 100
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    values.sort()
+    for q in (0.1, 0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= exact * 0.011
+    assert sketch.quantile(0) == 0.0
+    assert sketch.quantile(1) == max(values)
+
+    bounded = QuantileSketch(max_buckets=500)
+    for value in values:
+        bounded.add(value)
+    assert len(bounded.buckets) <= 500
+    exact = values[int(0.99 * (len(values) - 1))]
+    assert abs(bounded.quantile(0.99) - exact) <= exact * 0.011
+
+def test_space_saving_finds_heavy_hitters():
+    rng = random.Random(0)
+    sketch = SpaceSaving(capacity=10)
+    stream = ['line'] * 5000 + ['poem'] * 2000 + ['chapter'] * 1000 + [f'rare-{index}' for index in range(3000)]
+    rng.shuffle(stream)
+    for value in stream:
+        sketch.add(value)
+    top = sketch.top(3)
+    assert [value for value, _, _ in top] == ['line', 'poem', 'chapter']
+    for value, count, error in top:
+        assert count - error <= stream.count(value) <= count
+    assert len(sketch.counts) == 10
+
+def test_corpus_statistics_of_example_responses():
+    statistics = CorpusStatistics()
+    statistics.observe('collection', FakeResponse(load('collection', 'collection_docs_response_root.json')))
+    statistics.observe('collection', FakeResponse(load('collection', 'collection_docs_response_one.json')))
+    readable = load('collection', 'collection_docs_response_readable.json')
+    statistics.observe('collection', FakeResponse(readable), readable)
+    down_two = load('navigation', 'navigation_docs_response_down_two.json')
+    statistics.observe('navigation', FakeResponse(down_two))
+    # members of a subtree do not count in the width of their levels
+    statistics.observe('navigation', FakeResponse(load('navigation', 'navigation_docs_response_ref.json'), url='https://example.org/api/dts/navigation/?resource=r&ref=C1'))
+    statistics.observe('document', FakeResponse(content=b'<TEI>' + b' ' * 995 + b'</TEI>'))
+    statistics.observe('navigation', FakeResponse(content=b'not JSON'))
+
+    summary = statistics.summary()
+    assert summary['responses'] == {'collection': 3, 'navigation': 2, 'document': 1}
+    assert summary['collection_fan_out']['count'] == 2
+    assert summary['citation_tree_depth']['max'] == 2
+    assert cite_structure_depth(down_two['resource']['citationTrees'][0]['citeStructure']) == 3
+    levels = {member['level'] for member in down_two['member']}
+    assert set(summary['units_per_level']) == {str(level) for level in levels}
+    assert summary['units_per_level']['1']['max'] == sum(1 for member in down_two['member'] if member['level'] == 1)
+    cite_types = {item['citeType']: item['count'] for item in summary['cite_types']}
+    assert cite_types['Chapter'] >= sum(1 for member in down_two['member'] if member['citeType'] == 'Chapter')
+    assert summary['document_size']['max'] == 1006
+    assert summary['distinct_resources'] >= 1
+    json.dumps(summary)
+    assert '<table>' in statistics.to_html()
@@ -0,0 +1,57 @@
+import json
+import os
+import pytest
+import requests
+from dts_validator.decoding import BACKENDS, JSONDecoder
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+def get_decoder(backend):
+    try:
+        return JSONDecoder(backend)
+    except ImportError:
+        pytest.skip(f'The {backend} backend is not installed')
+
+def make_response(content, content_type='application/ld+json'):
+    response = requests.models.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = content_type
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response._content = content
+    return response
+
+def iter_examples():
+    for directory in sorted(os.listdir(DATA_DIR)):
+        for file_name in sorted(os.listdir(os.path.join(DATA_DIR, directory))):
+            if file_name.endswith('.json'):
+                with open(os.path.join(DATA_DIR, directory, file_name), 'rb') as json_file:
+                    yield pytest.param(json_file.read(), id=f'{directory}/{file_name}')
+
+@pytest.mark.parametrize('backend', list(BACKENDS))
+@pytest.mark.parametrize('content', list(iter_examples()))
+def test_backends_decode_like_response_json(backend, content):
+    decoder = get_decoder(backend)
+    response = make_response(content)
+    assert decoder.decode_response(response) == response.json()
+
+@pytest.mark.parametrize('backend', list(BACKENDS))
+def test_backends_agree_on_edge_cases(backend):
+    decoder = get_decoder(backend)
+    document = {'title': 'Ἰλιάς', 'big': 2 ** 70, 'float': 0.1, 'nan': float('nan')}
+    text = json.dumps(document, ensure_ascii=False)
+    for content, content_type in [
+        (text.encode('utf-8'), 'application/ld+json'),
+        (text.encode('utf-8-sig'), 'application/ld+json'),
+        (text.encode('utf-16'), 'application/ld+json'),
+        (text.encode('utf-8'), 'application/json; charset=utf-8'),
+        (json.dumps({'title': 'Énéide'}, ensure_ascii=False).encode('latin-1'), 'application/json; charset=iso-8859-1'),
+    ]:
+        response = make_response(content, content_type)
+        expected, decoded = response.json(), decoder.decode_response(response)
+        assert json.dumps(decoded, sort_keys=True) == json.dumps(expected, sort_keys=True)
+    with pytest.raises(ValueError):
+        decoder.loads(b'{"member": [')
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        JSONDecoder('simdjson')
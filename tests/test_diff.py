@@ -0,0 +1,126 @@
+import pytest
+from dts_validator.cli import main
+from dts_validator.diff import (
+    ROOT_ID, RecordedSource, Recorder, compare_items, diff_deployments, diff_json, make_item, make_source, normalize_json
+)
+
+class FakeSource(object):
+    """A deployment whose responses are given as a dictionary `{(kind, id): json}`."""
+
+    def __init__(self, name, responses):
+        self.name = name
+        self.responses = responses
+        self.requests = []
+
+    def get(self, kind, id, resource=None):
+        self.requests.append((kind, id))
+        if (kind, id) not in self.responses:
+            return make_item(kind, id, 404, None, '')
+        return make_item(kind, id, 200, self.responses[(kind, id)], 'https://old.example.org')
+
+def resource(id, title):
+    return {'@id': id, '@type': 'Resource', 'title': title, 'navigation': 'https://old.example.org/nav{?resource,down}'}
+
+def deployment(titles, units):
+    responses = {
+        ('entry', ROOT_ID): {'@type': 'EntryPoint'},
+        ('collection', ROOT_ID): {'@id': 'root', '@type': 'Collection', 'member': [{'@id': id, '@type': 'Resource'} for id in titles]},
+    }
+    for id, title in titles.items():
+        responses[('collection', id)] = resource(id, title)
+        responses[('navigation', id)] = {'@type': 'Navigation', 'member': [{'identifier': unit, 'level': 1} for unit in units]}
+    return responses
+
+def test_normalize_json():
+    json_data = {'@id': 'https://staging.example.org/api/dts/collection?id=a', 'member': ['https://other.org/x']}
+    assert normalize_json(json_data, 'https://staging.example.org') == {
+        '@id': '{base}/api/dts/collection?id=a', 'member': ['https://other.org/x']
+    }
+
+def test_diff_json():
+    old = {'title': 'a', 'member': [{'@id': 'x', 'level': 1}, {'@id': 'y'}], 'extent': [1, 2]}
+    new = {'title': 'b', 'member': [{'@id': 'x', 'level': 2}, {'@id': 'z'}], 'dublinCore': {}}
+    assert diff_json(old, new) == [
+        '/extent: removed',
+        "/title: 'a' -> 'b'",
+        "/member: item @id='y' removed",
+        "/member: item @id='z' added",
+        '/member/[@id=x]/level: 1 -> 2',
+        '/dublinCore: added ({})',
+    ]
+    assert diff_json({'member': [{'@id': 'x'}, {'@id': 'y'}]}, {'member': [{'@id': 'y'}, {'@id': 'x'}]}) == ['/member: the order of the items changed']
+    assert diff_json(list(range(10)), list(range(10, 20)), max_differences=3)[-1] == '[...]'
+
+def test_compare_items():
+    old = make_item('collection', 'a', 200, {'title': 'a'}, '')
+    assert compare_items('collection', 'a', old, make_item('collection', 'a', 200, {'title': 'a'}, ''))['change'] == 'unchanged'
+    result = compare_items('collection', 'a', old, make_item('collection', 'a', 404, None, ''))
+    assert (result['outcome'], result['change']) == ('failed', 'removed')
+    assert compare_items('collection', 'a', None, old)['change'] == 'added'
+
+def test_diff_deployments():
+    old = FakeSource('old', deployment({'r1': 'One', 'r2': 'Two'}, ['1', '2']))
+    new = FakeSource('new', deployment({'r1': 'One', 'r3': 'Three'}, ['1', '2', '3']))
+    results = {result['name']: result for result in diff_deployments(old, new, max_workers=2)}
+    assert {name: result['change'] for name, result in results.items()} == {
+        'entry::<root>': 'unchanged',
+        'collection::<root>': 'changed',
+        'collection::r1': 'unchanged',
+        'navigation::r1': 'changed',
+        'collection::r2': 'removed',
+        'navigation::r2': 'removed',
+        'collection::r3': 'added',
+        'navigation::r3': 'added',
+    }
+    assert results['navigation::r1']['message'] == "/member: item identifier='3' added"
+
+def test_recording_round_trip(tmp_path):
+    """Checks that a recording can be compared with the deployment it was recorded from,
+    and that unchanged responses are not read back from the recording."""
+    source = FakeSource('https://old.example.org/api/dts', deployment({'r1': 'One'}, ['1']))
+    path = str(tmp_path / 'recording.jsonl')
+    recorder = Recorder(path, source.name)
+    assert all(result['outcome'] == 'passed' for result in diff_deployments(source, source, recorder=recorder))
+    recorder.close()
+    assert len(source.requests) == 4
+
+    recording = RecordedSource(path)
+    assert recording.name == source.name
+    assert recording.get('collection', 'unknown') is None
+    results = list(diff_deployments(recording, source))
+    assert all(result['outcome'] == 'passed' for result in results)
+    assert recording.get('navigation', 'r1')._json is None
+
+    changed = FakeSource(source.name, deployment({'r1': 'Uno'}, ['1']))
+    results = {result['name']: result for result in diff_deployments(recording, changed)}
+    assert results['collection::r1']['message'] == "/title: 'One' -> 'Uno'"
+    recording.close()
+
+def test_cli_diff_closes_the_recordings(tmp_path, monkeypatch):
+    source = FakeSource('https://old.example.org/api/dts', deployment({'r1': 'One'}, ['1']))
+    path = str(tmp_path / 'recording.jsonl')
+    recorder = Recorder(path, source.name)
+    list(diff_deployments(source, source, recorder=recorder))
+    recorder.close()
+
+    closed = []
+    close = RecordedSource.close
+    monkeypatch.setattr(RecordedSource, 'close', lambda recording: closed.append(recording) or close(recording))
+    with pytest.raises(SystemExit) as exit_info:
+        main(['diff', path, path, '-q'])
+    assert exit_info.value.code == 0
+    assert len(closed) == 2 and all(recording._file.closed for recording in closed)
+
+def test_live_sources_do_not_memoize_responses(monkeypatch):
+    """Checks that the client of a live deployment keeps no response once it is compared."""
+    from dts_validator.client import DTS_API
+    monkeypatch.setattr(DTS_API, '_fetch_entry', lambda client: {
+        'collection': '/api/dts/collection{?id,nav}',
+        'navigation': '/api/dts/navigation{?resource,ref,start,end,down}',
+        'document': '/api/dts/document{?resource,ref,start,end}',
+    })
+    source = make_source('https://example.org/api/dts', max_concurrency=2)
+    try:
+        assert source.dts_client.cache_info().maxsize == 0
+    finally:
+        source.close()
@@ -2,13 +2,12 @@ import logging
 import requests
 from typing import Dict, Tuple, Optional
 from dts_validator.client import DTS_Navigation
+from dts_validator.fragments import FragmentValidationReport
+from dts_validator.fuzzing import ParameterFuzzReport
+from dts_validator.validation import validate_document_fragment
 
 LOGGER = logging.getLogger(__name__)
 
-# TODO: test for invalid combinations of parameters, as per specs
-# For each invalid combination, the correspondent HTTP exception should be raised
-# `with pytest.raises` is your friend
-
 def test_document_resource_response_validity(document_endpoint_response_resource: Tuple[Optional[str], requests.models.Response]):
     document_text, response_object = document_endpoint_response_resource
     response_object.raise_for_status()
@@ -22,7 +21,7 @@ def test_document_ref_response_validity(document_endpoint_response_ref: Tuple[Op
     assert isinstance(document_text, str)
     assert response_object
     LOGGER.info(document_text)
-    # TODO test for <dts:wrapper> not empty
+    validate_document_fragment(document_text)
 
 def test_document_range_response_validity(document_endpoint_response_range: Tuple[Optional[str], requests.models.Response]):
     document_text, response_object = document_endpoint_response_range
@@ -30,4 +29,40 @@ def test_document_range_response_validity(document_endpoint_response_range: Tupl
     assert isinstance(document_text, str)
     assert response_object
     LOGGER.info(document_text)
-    # TODO test for <dts:wrapper> not empty
+    validate_document_fragment(document_text)
+
+def test_document_fragment_validity(document_endpoint_response_fragment: Tuple[Optional[str], requests.models.Response]):
+    """Checks that a Document fragment is well-formed XML, and that its content is
+    wrapped into a non-empty `<dts:wrapper>` element.
+
+    :param document_endpoint_response_fragment: A tuple containing the Document fragment
+        and `requests`' response object.
+    :type document_endpoint_response_fragment: Tuple[Optional[str], requests.models.Response]
+    """
+    document_text, response_object = document_endpoint_response_fragment
+
+    # if the test input data is static (mock data), then `response_object is None`
+    if response_object:
+        response_object.raise_for_status()
+    validate_document_fragment(document_text)
+
+def test_document_bulk_fragments_validity(document_endpoint_responses_bulk: FragmentValidationReport):
+    """Checks that every (sampled) `ref` advertised by the Navigation endpoint resolves
+    into a valid Document fragment.
+
+    :param document_endpoint_responses_bulk: The aggregated results of the bulk Document requests.
+    :type document_endpoint_responses_bulk: FragmentValidationReport
+    """
+    assert document_endpoint_responses_bulk.checked > 0
+    assert document_endpoint_responses_bulk.ok, document_endpoint_responses_bulk.summary()
+
+def test_parameter_combinations(parameter_fuzzing_report: ParameterFuzzReport):
+    """Checks that the Navigation and Document endpoints answer the valid combinations of
+    parameters, and reject the invalid ones (e.g. `ref` together with `start`/`end`, or
+    `start` without `end`) with the HTTP error required by the specifications.
+
+    :param parameter_fuzzing_report: The aggregated results of the requests of one endpoint.
+    :type parameter_fuzzing_report: ParameterFuzzReport
+    """
+    assert parameter_fuzzing_report.checked > 0
+    assert parameter_fuzzing_report.ok, parameter_fuzzing_report.summary()
@@ -0,0 +1,52 @@
+import glob
+import json
+import os
+import threading
+import pytest
+from dts_validator.cli import main
+from dts_validator.client import DTS_API
+from dts_validator.engine import detect_endpoint, validate_file, validate_url
+from .test_client import make_json_response, make_snapshot
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+@pytest.mark.parametrize('path', sorted(glob.glob(os.path.join(DATA_DIR, '*', '*.json'))))
+def test_detect_endpoint(path: str):
+    """Checks that the endpoint of each example response is detected from its `@type`."""
+    with open(path) as json_file:
+        json_data = json.load(json_file)
+    assert detect_endpoint(json_data) == os.path.basename(os.path.dirname(path))
+
+def test_validate_file():
+    """Checks the results of the standalone engine on valid and invalid example responses."""
+    assert validate_file(os.path.join(DATA_DIR, 'entry/entry_docs_response.json'))['outcome'] == 'passed'
+    result = validate_file(os.path.join(DATA_DIR, 'entry/entry_invalid_response.json'))
+    assert result['outcome'] == 'failed' and 'dtsVersion' in result['message']
+
+def test_cli_validate_file(tmp_path, capsys):
+    """Checks the `validate-file` sub-command, and its exit code."""
+    results_path = str(tmp_path / 'results.jsonl')
+    with pytest.raises(SystemExit) as exit_info:
+        main(['validate-file', os.path.join(DATA_DIR, 'entry/entry_docs_response.json'), '--results-jsonl', results_path])
+    assert exit_info.value.code == 0
+    assert '1 checks: 1 passed' in capsys.readouterr().out
+
+    with pytest.raises(SystemExit) as exit_info:
+        main(['validate-file', os.path.join(DATA_DIR, 'entry/entry_invalid_response.json'), '-q'])
+    assert exit_info.value.code == 1
+
+def test_validate_url_does_not_wait_for_the_entry_endpoint(monkeypatch):
+    """Checks that a sweep started from a snapshot walks the collections while the Entry
+    endpoint is fetched, and validates the live Entry endpoint response."""
+    with open(os.path.join(DATA_DIR, 'entry', 'entry_docs_response.json'), 'r') as json_file:
+        entry_json = json.load(json_file)
+    entry_fetched = threading.Event()
+    monkeypatch.setattr(DTS_API, '_fetch_entry', lambda client: entry_fetched.wait(5) and entry_json)
+    client = DTS_API.from_snapshot(make_snapshot(entry_json))
+    client._fetch = lambda uri: make_json_response(uri, 200, {'@id': 'root', '@type': 'Collection', 'member': []})
+
+    results = validate_url(client.entry_endpoint_uri, dts_client=client, max_resources=None)
+    assert next(results)['name'] == 'collection root::collection'
+    entry_fetched.set()
+    assert [result['name'] for result in results] == [f'{client.entry_endpoint_uri}::entry']
+    assert client.wait_for_freshness_check() is True
@@ -1,6 +1,6 @@
 import pytest
 import logging
-from dts_validator.validation import validate_json, validate_uri_template
+from dts_validator.validation import ENTRY_URI_TEMPLATE_PARAMETERS, validate_json, validate_uri_template
 
 LOGGER = logging.getLogger()
 
@@ -24,13 +24,6 @@ def test_json_response_uri_templates(entry_endpoint_response : dict):
     :raises URITemplateMissingParameter: If a mandatory parameter is missing from the URI template
     """
     
-    expected_parameters = {
-        'collection': ['id', 'nav'], # NOTE: see question to tech. comm. about `page` param
-        'navigation': ['resource', 'ref', 'start', 'end'], # if compliancy_level == 1, `start` and `end` must be there 
-        'document': ['resource', 'ref', 'start', 'end'] # if compliancy_level == 1, `start` and `end` must be there
-    }
-    
-    for property in expected_parameters.keys():  
-        params = expected_parameters[property]
+    for property, params in ENTRY_URI_TEMPLATE_PARAMETERS.items():
         uri_template = entry_endpoint_response[property]
-        validate_uri_template(uri_template, template_name=property, required_parameters=params)
\ No newline at end of file
+        validate_uri_template(uri_template, template_name=property, required_parameters=params)
@@ -0,0 +1,86 @@
+import json
+import logging
+from dts_validator.events import EventLog, EventPolicy, JSONLEventSink, LoggingEventSink, parse_event_sample
+
+class Formatted(object):
+    """A field that counts how many times it is formatted."""
+    count = 0
+
+    def __format__(self, spec):
+        Formatted.count += 1
+        return 'formatted'
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+def test_events_are_formatted_only_for_enabled_loggers():
+    logger = logging.getLogger('dts_validator.tests.events')
+    handler = ListHandler()
+    logger.addHandler(handler)
+    events = EventLog()
+    events.add_sink(LoggingEventSink(logger))
+    Formatted.count = 0
+    try:
+        logger.setLevel(logging.WARNING)
+        events.emit('request', message='Request to {uri}', uri=Formatted())
+        assert Formatted.count == 0 and not handler.records
+        logger.setLevel(logging.INFO)
+        events.emit('request', message='Request to {uri}', uri=Formatted())
+        assert Formatted.count == 1
+        assert handler.records[-1].getMessage() == 'Request to formatted'
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(logging.NOTSET)
+
+def test_events_below_the_level_of_the_sinks_are_skipped():
+    events = EventLog()
+    assert not events.enabled_for(logging.CRITICAL)
+    sink = LoggingEventSink(level=logging.WARNING)
+    events.add_sink(sink)
+    Formatted.count = 0
+    events.emit('request', message='Request to {uri}', uri=Formatted())
+    assert Formatted.count == 0
+    assert events.enabled_for(logging.WARNING) and not events.enabled_for(logging.INFO)
+    events.add_sink(LoggingEventSink(level=logging.DEBUG))
+    assert events.enabled_for(logging.DEBUG)
+    events.close()
+    assert not events.enabled_for(logging.CRITICAL)
+
+def test_sampling_and_rate_limiting():
+    policy = EventPolicy(sample_rate=0.1)
+    kept = [policy.allow(0.0) for _ in range(1000)]
+    assert sum(kept) == 100 and kept[9] and not kept[0]
+    policy = EventPolicy(rate_limit=5)
+    assert sum(policy.allow(10.5) for _ in range(20)) == 5
+    assert policy.allow(11.0)
+    assert (policy.kept, policy.dropped) == (6, 15)
+
+def test_jsonl_sink(tmp_path):
+    path = str(tmp_path / 'events.jsonl')
+    events = EventLog()
+    events.add_sink(JSONLEventSink(path, level=logging.INFO))
+    events.configure('request', sample_rate=0.5)
+    events.configure('*', rate_limit=3)
+    for index in range(10):
+        events.emit('request', message='Request to {uri}', uri=f'https://example.org/{index}')
+        events.emit('validation', outcome='valid')
+    events.emit('concurrency', logging.DEBUG, limit=4)
+    assert events.stats() == {'request': (5, 5), 'validation': (3, 7)}
+    events.close()
+
+    with open(path, 'r') as events_file:
+        records = [json.loads(line) for line in events_file]
+    assert [record['event'] for record in records].count('request') == 5
+    assert [record['event'] for record in records].count('validation') == 3
+    requests = [record for record in records if record['event'] == 'request']
+    assert requests[0]['uri'] == 'https://example.org/1' and requests[0]['level'] == 'INFO'
+    assert 'concurrency' not in {record['event'] for record in records}
+
+def test_parse_event_sample():
+    assert parse_event_sample('request=0.01') == ('request', 0.01)
+    assert parse_event_sample('*=0.5') == ('*', 0.5)
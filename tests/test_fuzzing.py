@@ -0,0 +1,90 @@
+import json
+import os
+from urllib.parse import parse_qs, urlsplit
+import requests
+from dts_validator.client import DTS_API, DTS_Resource
+from dts_validator.fuzzing import UNKNOWN_REFERENCE, UNKNOWN_RESOURCE, check_parameter_response, fuzz_parameters, parameter_cases
+from .test_client import DATA_DIR, make_snapshot
+
+UNITS = ['1', '2', '3']
+
+def make_response(uri, status_code, body=None):
+    response = requests.models.Response()
+    response.status_code = status_code
+    response.url = uri
+    response.headers['Content-Type'] = 'application/ld+json'
+    response._content = json.dumps(body).encode('utf-8') if body is not None else b''
+    return response
+
+def serve(uri, compliant=True):
+    """Answers as a DTS API that does (or does not, if not `compliant`) reject invalid parameters."""
+    parameters = {key: values[0] for key, values in parse_qs(urlsplit(uri).query).items()}
+    endpoint = 'navigation' if '/navigation' in uri else 'document'
+    if compliant:
+        if 'resource' not in parameters:
+            return make_response(uri, 400, {'error': 'missing resource'})
+        if 'ref' in parameters and ('start' in parameters or 'end' in parameters):
+            return make_response(uri, 400, {'error': 'ref with start/end'})
+        if ('start' in parameters) != ('end' in parameters):
+            return make_response(uri, 400, {'error': 'start without end'})
+        if endpoint == 'navigation' and not {'ref', 'start', 'end', 'down'} & set(parameters):
+            return make_response(uri, 400, {'error': 'down is required'})
+        if parameters['resource'] == UNKNOWN_RESOURCE or parameters.get('ref') == UNKNOWN_REFERENCE:
+            return make_response(uri, 404)
+    if endpoint == 'document':
+        return make_response(uri, 200, {})
+    members = [{'identifier': unit, '@type': 'CitableUnit', 'level': 1, 'parent': None, 'citeType': 'poem'} for unit in UNITS]
+    return make_response(uri, 200, {
+        '@id': uri, '@type': 'Navigation', 'member': members,
+        'resource': {'@id': parameters.get('resource'), '@type': 'Resource'},
+    })
+
+def make_client(compliant=True):
+    with open(os.path.join(DATA_DIR, 'entry', 'entry_docs_response.json'), 'r') as json_file:
+        entry_json = json.load(json_file)
+    client = DTS_API.from_snapshot(make_snapshot(entry_json), check_freshness=False, max_concurrency=4)
+    client._fetch = lambda uri: serve(uri, compliant)
+    return client
+
+def make_resources(count):
+    return [
+        DTS_Resource({'@id': f'urn:resource:{index}', '@type': 'Resource', 'navigation': '/api/dts/navigation/{?resource,ref,start,end,down}'})
+        for index in range(count)
+    ]
+
+def test_parameter_cases_follow_the_uri_template():
+    cases = parameter_cases('navigation', ['resource', 'ref', 'start', 'end', 'down'], 'r', ['1', '2'])
+    by_name = {case.name: case for case in cases}
+    assert by_name['ref with start and end'].expected_status == 400
+    assert by_name['start and end'].parameters == {'resource': 'r', 'start': '1', 'end': '2'}
+    assert by_name['no ref, start, end or down'].expected_status == 400
+    assert by_name['unknown resource'].expected_status == 404
+
+    # no `start`/`end` in the template, no citable units: no requests with them
+    cases = parameter_cases('document', ['resource', 'ref'], 'r', [])
+    assert {case.name for case in cases} == {'resource only', 'unknown resource', 'missing resource', 'unknown ref'}
+
+def test_error_bodies_are_checked():
+    case = parameter_cases('document', ['resource', 'ref'], 'r', ['1'])[1]
+    assert check_parameter_response(case, make_response('u', 404)) is None
+    assert 'got HTTP 200' in check_parameter_response(case, make_response('u', 200, {}))
+    invalid = make_response('u', 404)
+    invalid._content = b'{"error": '
+    assert 'invalid JSON body' in check_parameter_response(case, invalid)
+    assert 'successful response' in check_parameter_response(case, make_response('u', 404, {'@type': 'Navigation'}))
+
+def test_fuzz_parameters_of_a_compliant_api():
+    for endpoint in ('navigation', 'document'):
+        report = fuzz_parameters(make_client(), make_resources(5), endpoint)
+        assert report.ok, report.summary()
+        # the requests for an unknown (or no) resource are sent once
+        per_resource = len(parameter_cases(endpoint, ['resource', 'ref', 'start', 'end', 'down'], 'r', UNITS)) - 2
+        assert report.checked == 5 * per_resource + 2
+
+def test_fuzz_parameters_stops_at_the_error_budget():
+    report = fuzz_parameters(make_client(compliant=False), make_resources(100), 'navigation', error_budget=10)
+    assert len(report.failures) == 10
+    assert report.budget_exhausted
+    assert report.checked < 100
+    assert 'stopped after 10 failures' in report.summary()
+    assert {failure.reason for failure in report.failures} <= {'expected HTTP 400, got HTTP 200', 'expected HTTP 404, got HTTP 200'}
@@ -0,0 +1,65 @@
+import json
+import os
+from dts_validator.client import DTS_API, make_collection
+from dts_validator.journal import Journal
+from tests.test_client import DATA_DIR, make_snapshot
+
+TREE = {
+    None: ['c1', 'c2'],
+    'c1': ['r1', 'r2'],
+    'c2': ['r3', 'r4'],
+}
+
+def make_client(monkeypatch):
+    """A client whose Collection endpoint serves `TREE`, and which records the collections requested."""
+    with open(os.path.join(DATA_DIR, 'entry', 'entry_docs_response.json'), 'r') as json_file:
+        client = DTS_API.from_snapshot(make_snapshot(json.load(json_file)), check_freshness=False)
+    client.requested = []
+
+    def member(id):
+        return {'@id': id, '@type': 'Resource' if id.startswith('r') else 'Collection'}
+
+    def collections(id=None, **kwargs):
+        client.requested.append(id)
+        if id is None:
+            return [make_collection(member(child)) for child in TREE[None]]
+        return make_collection(dict(member(id), member=[member(child) for child in TREE.get(id, [])]))
+
+    monkeypatch.setattr(client, 'collections', collections)
+    return client
+
+def test_journal_resume(monkeypatch, tmp_path):
+    """Checks that an interrupted sweep is resumed where it stopped, even if the journal
+    ends with a line torn by the crash."""
+    path = str(tmp_path / 'sweep.journal')
+    key = {'entry_endpoint_uri': 'https://example.org/api/dts'}
+    client = make_client(monkeypatch)
+
+    journal = Journal(path, key)
+    resources = client.iter_resources(state=journal)
+    for resource in [next(resources), next(resources)]:
+        journal.record_resource(resource.id, [{'name': f'{resource.id}::collection', 'outcome': 'passed'}])
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as journal_file:
+        journal_file.write('{"event": "resource", "id": "r3", "res')
+
+    client = make_client(monkeypatch)
+    journal = Journal(path, key, resume=True)
+    assert journal.resumed
+    assert journal.done == {'r1', 'r2'}
+    assert [result['name'] for result in journal.completed_results()] == ['r1::collection', 'r2::collection']
+    assert [resource.id for resource in client.iter_resources(state=journal)] == ['r3', 'r4']
+    # the collections already walked are not requested again
+    assert client.requested == ['r3', 'r4']
+    journal.record_resource('r3', [])
+    journal.close()
+    with open(path, 'rb') as journal_file:
+        assert all(line.endswith(b'\n') for line in journal_file)
+
+def test_journal_of_another_sweep(monkeypatch, tmp_path):
+    path = str(tmp_path / 'sweep.journal')
+    Journal(path, {'shard': '1/2'}).close()
+    journal = Journal(path, {'shard': '2/2'}, resume=True)
+    assert not journal.resumed
+    assert not journal.started
+    journal.close()
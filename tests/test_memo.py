@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+import pytest
+from jsonschema.exceptions import ValidationError
+from dts_validator.memo import MISSING, SCHEMAS_DIR, VALIDATION_MEMO, ValidationMemo, content_hash, schemas_fingerprint, serialize_error
+from dts_validator.validation import get_schema_key, get_validation_error, load_schema, validate_json
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+def load_json(path):
+    with open(os.path.join(DATA_DIR, path)) as json_file:
+        return json.load(json_file)
+
+@pytest.fixture()
+def memo(monkeypatch):
+    memo = ValidationMemo()
+    monkeypatch.setattr('dts_validator.validation.VALIDATION_MEMO', memo)
+    # the responses are validated by `jsonschema`, not by the generated validators
+    monkeypatch.setattr('dts_validator.validation.FAST_VALIDATORS', {})
+    yield memo
+    memo.close()
+
+def test_content_hash_is_canonical():
+    assert content_hash({'a': 1, 'b': [1, 2]}) == content_hash(json.loads('{"b": [1,2],   "a": 1}'))
+    assert content_hash({'a': 1}) != content_hash({'a': 2})
+
+def test_identical_responses_are_validated_once(memo):
+    schema = load_schema('collection')
+    for _ in range(3):
+        validate_json(load_json('collection/collection_docs_response_one.json'), schema)
+    info = memo.info()
+    assert (info.hits, info.misses) == (2, 1)
+    assert 'hit rate 66.7%' in memo.summary()
+
+def test_schemas_are_serialized_once():
+    schema = load_schema('collection')
+    schema_key, schema_hash = get_schema_key(schema)
+    # the key computed for the first response is reused (not computed again) for the next ones
+    assert get_schema_key(schema)[0] is schema_key
+    # a copy of the schema is another object, with the same key
+    assert get_schema_key(dict(schema)) == (schema_key, schema_hash)
+
+def test_memoized_errors_are_identical(memo):
+    schema = load_schema('entry')
+    json_data = load_json('entry/entry_invalid_response.json')
+    errors = [get_validation_error(json_data, schema) for _ in range(2)]
+    assert memo.info().hits == 1
+    assert isinstance(errors[1], ValidationError)
+    assert str(errors[1]) == str(errors[0])
+    assert errors[1].message == errors[0].message
+    assert list(errors[1].path) == list(errors[0].path)
+
+def test_outcomes_persist_across_runs(tmp_path):
+    path = str(tmp_path / 'memo' / 'validation.jsonl')
+    schema = load_schema('entry')
+    responses = [load_json('entry/entry_docs_response.json'), load_json('entry/entry_invalid_response.json')]
+
+    first_run = ValidationMemo()
+    first_run.open(path)
+    expected = []
+    for json_data in responses:
+        key = ('schema', content_hash(json_data))
+        first_run.get(key)
+        error = get_validation_error(json_data, schema)
+        first_run.put(key, error and serialize_error(error))
+        expected.append(error and error.message)
+    first_run.close()
+    with open(path, 'a') as memo_file:
+        memo_file.write('{"schema": "torn')
+
+    second_run = ValidationMemo()
+    second_run.open(path)
+    outcomes = [second_run.get(('schema', content_hash(json_data))) for json_data in responses]
+    assert [outcome and outcome['message'] for outcome in outcomes] == expected
+    assert second_run.info().disk_hits == 2
+    second_run.close()
+
+def test_outcomes_persisted_for_other_schemas_are_discarded(tmp_path):
+    schemas_dir = tmp_path / 'schemas'
+    shutil.copytree(SCHEMAS_DIR, schemas_dir)
+    path = str(tmp_path / 'validation.jsonl')
+    first_run = ValidationMemo()
+    first_run.open(path, fingerprint=schemas_fingerprint(schemas_dir))
+    first_run.put(('schema', 'content'), None)
+    first_run.close()
+
+    # a schema only reached through a `$ref` changes (e.g. after an upgrade)
+    citable_unit_path = schemas_dir / 'citable_unit.schema.json'
+    citable_unit = json.loads(citable_unit_path.read_text())
+    citable_unit['required'].append('citeType')
+    citable_unit_path.write_text(json.dumps(citable_unit))
+    second_run = ValidationMemo()
+    second_run.open(path, fingerprint=schemas_fingerprint(schemas_dir))
+    assert second_run.get(('schema', 'content')) is MISSING
+    assert second_run.info().persisted == 0
+    second_run.close()
+    with open(path) as memo_file:
+        assert json.loads(memo_file.readline())['schemas'] == schemas_fingerprint(schemas_dir)
+
+def test_disabled_memo_validates_every_time(memo):
+    memo.maxsize = 0
+    schema = load_schema('collection')
+    for _ in range(2):
+        validate_json(load_json('collection/collection_docs_response_one.json'), schema)
+    assert memo.info().currsize == 0
+    assert memo.summary() is None
+
+def test_default_memo_is_enabled():
+    assert VALIDATION_MEMO.enabled
@@ -0,0 +1,74 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from dts_validator.client import DTS_API
+from dts_validator.monitor import Monitor, detect_regressions
+from dts_validator.reporting import make_result
+
+def test_detect_regressions():
+    previous = {'a': 'passed', 'b': 'failed', 'c': 'passed'}
+    current = {'a': 'failed', 'b': 'failed', 'c': 'passed', 'd': 'error'}
+    assert detect_regressions(previous, current) == ['a']
+
+def test_monitor_cycles(monkeypatch, tmp_path):
+    """Checks that regressions are detected from one cycle to the next, and that metrics are written."""
+    cycles = iter([
+        [make_result('entry', 'passed', group='entry'), make_result('nav', 'passed', group='navigation')],
+        [make_result('entry', 'passed', group='entry'), make_result('nav', 'failed', group='navigation', message='boom')],
+    ])
+    monkeypatch.setattr(Monitor, 'check_endpoint', lambda monitor, state: next(cycles))
+    metrics_path = tmp_path / 'dts.prom'
+    monitor = Monitor(['https://example.org/api/dts'], interval=0, metrics_path=str(metrics_path))
+
+    assert monitor.run_cycle() == []
+    assert monitor.run_cycle() == [('https://example.org/api/dts', ['nav'])]
+    metrics = metrics_path.read_text()
+    assert 'dts_validator_up{endpoint="https://example.org/api/dts"} 1' in metrics
+    assert 'dts_validator_checks{endpoint="https://example.org/api/dts",outcome="failed"} 1' in metrics
+    assert 'dts_validator_regressions_total{endpoint="https://example.org/api/dts"} 1' in metrics
+    assert '# TYPE dts_validator_cycles_total counter' in metrics
+
+@pytest.fixture()
+def etag_server():
+    """A local server answering `304 Not Modified` to requests revalidating its `ETag`."""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.headers.get('If-None-Match'))
+            if self.headers.get('If-None-Match') == '"v1"':
+                self.send_response(304)
+                self.send_header('ETag', '"v1"')
+                self.end_headers()
+                return
+            host = f'http://{self.headers["Host"]}'
+            body = json.dumps({
+                '@id': '/api/dts/', '@type': 'EntryPoint', 'dtsVersion': '1-alpha',
+                'collection': host + '/collection/{?id,page,nav}',
+                'navigation': host + '/navigation/{?resource,ref,start,end,down,tree,page}',
+                'document': host + '/document/{?resource,ref,start,end,tree,mediaType}',
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/ld+json')
+            self.send_header('ETag', '"v1"')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/api/dts/', requests_seen
+    server.shutdown()
+
+def test_client_refresh_revalidates(etag_server):
+    """Checks that, after a refresh, responses with an ETag are revalidated rather than downloaded again."""
+    entry_endpoint_uri, requests_seen = etag_server
+    client = DTS_API(entry_endpoint_uri)
+    client.refresh()
+    assert requests_seen == [None, '"v1"']
+    assert client.revalidated == 1
+    assert client._entry_endpoint_json['@type'] == 'EntryPoint'
@@ -0,0 +1,88 @@
+import json
+import os
+import time
+import pytest
+from dts_validator.client import DTS_API, DTS_Resource
+from dts_validator.pipeline import PipelineStats, ResourceWork, Task, fetch_resource, run_pipeline
+from dts_validator.reporting import make_result
+from .test_client import make_json_response, make_snapshot
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+class FakeClient(object):
+    """Just what the pipeline needs from a client: its threads."""
+    max_concurrency = 4
+    map = DTS_API.map
+
+def load_bytes(path):
+    with open(os.path.join(DATA_DIR, path), 'rb') as json_file:
+        return json_file.read()
+
+def fetch(resource_id):
+    if resource_id == 'broken':
+        raise ConnectionError('connection refused')
+    navigation = load_bytes('navigation/navigation_docs_response_down_one.json')
+    if resource_id == 'invalid':
+        navigation = navigation.replace(b'"dtsVersion"', b'"version"')
+    return ResourceWork(resource_id, [
+        Task(resource_id, 'collection', json.loads(load_bytes('collection/collection_docs_response_one.json'))),
+        Task(resource_id, 'navigation', navigation),
+        make_result(f'{resource_id}::document', 'passed', group='document', source=resource_id),
+    ])
+
+def test_fetch_resource_decodes_observed_responses_once():
+    """Checks that the Navigation response passed to the listeners of the client (e.g. the
+    corpus statistics) is decoded once, and passed decoded to the validation stage."""
+    entry_json = json.loads(load_bytes('entry/entry_docs_response.json'))
+    navigation_json = json.loads(load_bytes('navigation/navigation_docs_response_down_one.json'))
+    client = DTS_API.from_snapshot(make_snapshot(entry_json), check_freshness=False)
+    client._fetch = lambda uri: make_json_response(uri, 200, navigation_json)
+    observed = []
+    client.add_listener(lambda endpoint, response, json_data: observed.append((endpoint, json_data)))
+
+    work = fetch_resource(client, DTS_Resource(json.loads(load_bytes('collection/collection_docs_response_readable.json'))))
+    assert observed[0] == ('navigation', navigation_json)
+    assert work.checks[1].content == navigation_json
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_pipeline_results(processes):
+    resource_ids = [f'r{index}' for index in range(20)] + ['invalid', 'broken']
+    recorded = {}
+    stats = PipelineStats(FakeClient.max_concurrency, processes, 8)
+    results = list(run_pipeline(
+        FakeClient(), resource_ids, fetch, processes=processes, queue_size=8, batch_size=4,
+        on_resource=lambda resource_id, results: recorded.setdefault(resource_id, results), stats=stats
+    ))
+
+    assert len(results) == 20 * 3 + 3 + 1
+    # the results of each resource are grouped, in the order of its checks
+    checks = [[results[0]['name'].split('::')[1]]]
+    for previous, result in zip(results, results[1:]):
+        if result['source'] == previous['source']:
+            checks[-1].append(result['name'].split('::')[1])
+        else:
+            checks.append([result['name'].split('::')[1]])
+    assert len(checks) == 22
+    assert all(resource_checks in (['collection', 'navigation', 'document'], ['resource']) for resource_checks in checks)
+    by_name = {result['name']: result for result in results}
+    assert by_name['invalid::navigation']['outcome'] == 'failed'
+    assert by_name['r3::navigation']['outcome'] == 'passed'
+    assert by_name['broken::resource']['outcome'] == 'error'
+    # resources that could not be fetched are not recorded (so that they are checked again)
+    assert set(recorded) == set(resource_ids) - {'broken'}
+
+    info = stats.info()
+    assert info['fetch']['items'] == 22
+    assert info['validate']['items'] == 42
+    assert info['queue']['max_depth'] <= 8
+
+def test_pipeline_backpressure():
+    """Checks that a slow consumer stops the fetch stage, once the queue is full."""
+    stats = PipelineStats(FakeClient.max_concurrency, 1, 2)
+    results = run_pipeline(FakeClient(), (f'r{index}' for index in range(100)), fetch, processes=1, queue_size=2, batch_size=1, stats=stats)
+    next(results)
+    time.sleep(0.5)
+    # the queue, the resources in flight in the threads of the client, and the one being validated
+    assert stats.fetch.items <= 2 + 2 * FakeClient.max_concurrency + 1
+    assert len(list(results)) == 299
+    assert stats.blocked > 0
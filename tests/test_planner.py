@@ -0,0 +1,52 @@
+import threading
+import time
+import pytest
+from dts_validator.planner import PlannedRequest, RequestPlan, plan_requests
+from .planned_requests import REQUESTS
+
+def test_plan_requests_deduplicates():
+    """Checks that the data needed by several fixtures is planned only once, with its dependencies."""
+    plan = plan_requests(
+        ['navigation_endpoint_response_ref', 'navigation_endpoint_response_range', 'unknown_fixture'],
+        {'navigation_endpoint_response_ref': ['navigation_ref'], 'navigation_endpoint_response_range': ['navigation_range']},
+        REQUESTS
+    )
+    assert list(plan.nodes) == ['resource', 'navigation_down_one', 'navigation_ref', 'navigation_range']
+
+def test_plan_execution_order_and_parallelism():
+    calls = []
+    lock = threading.Lock()
+
+    def fetch(name):
+        def inner(client, *dependencies):
+            time.sleep(0.05)
+            with lock:
+                calls.append(name)
+            return (name, dependencies)
+        return inner
+
+    def fail(client, root):
+        raise ValueError('not found')
+
+    requests = {request.key: request for request in [
+        PlannedRequest('root', fetch('root')),
+        PlannedRequest('a', fetch('a'), ('root',)),
+        PlannedRequest('b', fetch('b'), ('root',)),
+        PlannedRequest('c', fetch('c'), ('a', 'b')),
+        PlannedRequest('broken', fail, ('root',)),
+        PlannedRequest('after_broken', fetch('after_broken'), ('broken',)),
+    ]}
+    plan = RequestPlan(['c', 'after_broken'], requests=requests)
+    stats = plan.execute(None)
+
+    assert calls[0] == 'root' and calls[-1] == 'c'
+    assert 'after_broken' not in calls
+    assert stats.max_parallelism == 3 and stats.failed == 2
+    assert plan.result('c') == ('c', (('a', (('root', ()),)), ('b', (('root', ()),))))
+    with pytest.raises(ValueError):
+        plan.result('after_broken')
+
+    # nodes added later are executed without sending the others again
+    plan.add('b')
+    plan.execute(None)
+    assert calls.count('root') == 1
@@ -0,0 +1,36 @@
+import json
+import time
+from dts_validator.profiling import NO_TEST, Profiler
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    with profiler.phase('network'):
+        pass
+    assert profiler.phase_totals() == {}
+
+def test_phases_are_attributed_to_tests(tmp_path):
+    profiler = Profiler()
+    profiler.enable(profile_calls=True, trace_memory=True, sample_interval=0.001)
+    profiler.start_test('test_a')
+    with profiler.phase('network'):
+        time.sleep(0.01)
+    with profiler.phase('json_decode'):
+        json.loads('[' + ','.join(['{"a": 1}'] * 1000) + ']')
+    profiler.end_test()
+    with profiler.phase('network'):
+        pass
+    profiler.disable()
+
+    totals = profiler.phase_totals()
+    assert totals['network'].count == 2
+    assert totals['network'].wall >= 0.01
+    assert totals['json_decode'].memory > 0
+
+    report = profiler.report()
+    assert set(report['tests']) == {'test_a', NO_TEST}
+    assert report['tests']['test_a']['json_decode']['count'] == 1
+
+    written = profiler.write_report(str(tmp_path / 'report.html'))
+    assert str(tmp_path / 'report.profile.json') in written
+    assert str(tmp_path / 'report.pstats') in written
+    assert 'network' in (tmp_path / 'report.profile.txt').read_text()
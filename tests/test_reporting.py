@@ -0,0 +1,44 @@
+import os
+import xml.etree.ElementTree as ET
+from dts_validator.reporting import ResultSink, iter_results, make_result, render_html_report, write_junit_xml
+
+def write_results(path, count):
+    with ResultSink(path) as sink:
+        for i in range(count):
+            outcome = 'failed' if i % 10 == 0 else 'passed'
+            sink.write(make_result(f'tests/test_mock.py::test_{i}', outcome, duration=0.01, message='boom' if outcome == 'failed' else None))
+
+def test_results_stream_survives_truncation(tmp_path):
+    """Checks that results are read back from the stream, ignoring a truncated last line."""
+    results_path = str(tmp_path / 'results.jsonl')
+    write_results(results_path, 5)
+    with open(results_path, 'a') as results_file:
+        results_file.write('{"name": "tests/test_mock.py::test_5", "outc')
+    assert [result['name'] for result in iter_results(results_path)][-1] == 'tests/test_mock.py::test_4'
+
+def test_results_stream_is_overwritten_unless_appended(tmp_path):
+    """Checks that a new run does not mix its results with those of an earlier one."""
+    results_path = str(tmp_path / 'results.jsonl')
+    write_results(results_path, 5)
+    write_results(results_path, 3)
+    assert len(list(iter_results(results_path))) == 3
+    with ResultSink(results_path, append=True) as sink:
+        sink.write(make_result('tests/test_mock.py::test_3', 'passed'))
+    assert len(list(iter_results(results_path))) == 4
+
+def test_junit_export(tmp_path):
+    """Checks the counts of the JUnit XML export of a results stream."""
+    results_path = str(tmp_path / 'results.jsonl')
+    write_results(results_path, 25)
+    write_junit_xml(results_path, str(tmp_path / 'junit.xml'))
+    testsuite = ET.parse(str(tmp_path / 'junit.xml')).getroot()[0]
+    assert testsuite.attrib['tests'] == '25' and testsuite.attrib['failures'] == '3'
+    assert len(testsuite.findall('testcase/failure')) == 3
+
+def test_paginated_html_report(tmp_path):
+    """Checks that the HTML report is split into pages of results."""
+    results_path = str(tmp_path / 'results.jsonl')
+    write_results(results_path, 25)
+    summary = render_html_report(results_path, str(tmp_path / 'report.html'), page_size=10)
+    assert summary.count == 25 and summary.failures == 3
+    assert os.path.exists(tmp_path / 'report-page-3.html') and not os.path.exists(tmp_path / 'report-page-4.html')
@@ -0,0 +1,76 @@
+import glob
+import json
+import os
+from urllib.parse import quote
+import pytest
+
+pytest.importorskip('pyshacl')
+
+from dts_validator.semantic import ContextCache, SemanticValidator
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+CONTEXT_URL = 'https://distributed-text-services.github.io/specifications/context/1-alpha1.json'
+
+# a minimal context mapping the terms of the examples to the DTS vocabulary, for tests that
+# run offline (it is not the published DTS context, which is fetched by real runs)
+TEST_CONTEXT = {
+    '@context': {
+        '@vocab': 'https://w3id.org/dts/api#',
+        'dts': 'https://w3id.org/dts/api#',
+        'dc': 'http://purl.org/dc/terms/',
+        'member': {'@id': 'dts:member', '@container': '@set'},
+        'citationTrees': {'@id': 'dts:citationTrees', '@container': '@list'},
+        'citeStructure': {'@id': 'dts:citeStructure', '@container': '@list'},
+        'dublinCore': {'@id': 'dts:dublinCore'},
+        'extensions': {'@id': 'dts:extensions'},
+    }
+}
+
+@pytest.fixture(scope='module')
+def semantic_validator(tmp_path_factory):
+    cache_dir = tmp_path_factory.mktemp('contexts')
+    with open(cache_dir / (quote(CONTEXT_URL, safe='') + '.json'), 'w') as context_file:
+        json.dump(TEST_CONTEXT, context_file)
+    return SemanticValidator(context_cache=ContextCache(cache_dir=str(cache_dir), offline=True), batch_size=5)
+
+@pytest.fixture(scope='module')
+def example_responses():
+    paths = sorted(glob.glob(os.path.join(DATA_DIR, '*', '*.json')))
+    responses = []
+    for path in paths:
+        with open(path, 'r') as json_file:
+            responses.append((path, json.load(json_file)))
+    return responses
+
+def test_semantic_validation_of_examples(semantic_validator, example_responses):
+    """Checks that the valid examples conform to the SHACL shapes (the invalid Entry
+    examples use a context that cannot be resolved)."""
+    results = list(semantic_validator.validate_many(example_responses))
+    assert len(results) == len(example_responses)
+    not_passed = sorted(os.path.basename(result['source']) for result in results if result['outcome'] != 'passed')
+    assert not_passed == ['entry_invalid_response.json', 'entry_old_response.json']
+
+def test_semantic_violations_are_attributed(semantic_validator, example_responses):
+    """Checks that a violation is reported for the response it comes from, when
+    responses are validated in the same batch."""
+    responses = dict(example_responses)
+    collection_path = os.path.join(DATA_DIR, 'collection', 'collection_docs_response_one.json')
+    navigation_path = os.path.join(DATA_DIR, 'navigation', 'navigation_docs_response_down_one.json')
+    invalid_collection = dict(responses[collection_path])
+    del invalid_collection['title']
+
+    results = semantic_validator.validate_batch([
+        ('invalid_collection.json', invalid_collection),
+        (navigation_path, responses[navigation_path]),
+    ])
+    assert [result['outcome'] for result in results] == ['failed', 'passed']
+    assert 'title' in results[0]['message']
+
+def test_unresolved_contexts_are_errors(tmp_path):
+    """Checks that offline, a context that is not cached is reported (not guessed)."""
+    validator = SemanticValidator(context_cache=ContextCache(cache_dir=str(tmp_path), offline=True))
+    with open(os.path.join(DATA_DIR, 'navigation', 'navigation_docs_response_down_one.json'), 'r') as json_file:
+        results = validator.validate_batch([('navigation.json', json.load(json_file))])
+    assert results[0]['outcome'] == 'error'
+    assert CONTEXT_URL in results[0]['message'] and 'offline' in results[0]['message']
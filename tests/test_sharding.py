@@ -0,0 +1,52 @@
+import json
+import pytest
+from dts_validator.cli import main
+from dts_validator.reporting import make_result
+from dts_validator.sharding import Shard, merge_results, parse_shard, shard_of
+
+def test_parse_shard():
+    assert parse_shard('2/4') == Shard(2, 4)
+    assert str(Shard(2, 4)) == '2/4'
+    for text in ('0/4', '5/4', '2', 'a/b'):
+        with pytest.raises(ValueError):
+            parse_shard(text)
+
+def test_cli_reports_invalid_shards(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(['validate-url', 'https://example.org/api/dts', '--shard', '5/4'])
+    assert exit_info.value.code == 2
+    assert "Invalid shard '5/4': i must be between 1 and N" in capsys.readouterr().err
+
+def test_shards_partition_resources():
+    """Checks that each resource belongs to exactly one shard, and that shards are balanced."""
+    resource_ids = [f'urn:cts:greekLit:tlg{i:04}.tlg001' for i in range(4000)]
+    shards = [Shard(index, 4) for index in range(1, 5)]
+    slices = [[resource_id for resource_id in resource_ids if shard.contains(resource_id)] for shard in shards]
+    assert sorted(sum(slices, [])) == sorted(resource_ids)
+    assert all(800 < len(resource_slice) < 1200 for resource_slice in slices)
+    # the partition is stable (it does not depend on e.g. the hash seed of the process)
+    assert shard_of('urn:cts:greekLit:tlg0012.tlg001', 4) == 2
+
+def write_results(path, results):
+    with open(path, 'w', encoding='utf-8') as results_file:
+        for result in results:
+            results_file.write(json.dumps(result) + '\n')
+    return str(path)
+
+def test_merge_results(tmp_path):
+    shard_1 = write_results(tmp_path / '1.jsonl', [
+        make_result('entry::entry', 'passed', shard='1/2'),
+        make_result('r1::navigation', 'failed', message='bad level', shard='1/2'),
+    ])
+    shard_2 = write_results(tmp_path / '2.jsonl', [
+        make_result('entry::entry', 'failed', message='timeout', shard='2/2'),
+        make_result('r2::navigation', 'passed', shard='2/2'),
+    ])
+    merged = {result['name']: result for result in merge_results([shard_1, shard_2])}
+    assert sorted(merged) == ['entry::entry', 'r1::navigation', 'r2::navigation']
+    assert merged['entry::entry']['outcome'] == 'failed'
+    assert merged['r1::navigation']['message'] == 'bad level'
+
+    merged = list(merge_results([shard_1]))
+    assert merged[-1]['name'] == 'merge::shards'
+    assert merged[-1]['message'] == 'Missing the results of shards 2/2'
@@ -0,0 +1,130 @@
+import gzip
+import importlib.util
+import json
+import sys
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from dts_validator.transport import HTTP2Session, TransferStats, get_accept_encoding, make_session
+
+BODY = json.dumps({'member': [{'identifier': str(i), 'level': 1} for i in range(1000)]}).encode()
+
+@pytest.fixture()
+def gzip_server():
+    """A local server compressing its response if the client accepts gzip."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            compress = 'gzip' in self.headers.get('Accept-Encoding', '')
+            data = gzip.compress(BODY) if compress else BODY
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(data)))
+            if compress:
+                self.send_header('Content-Encoding', 'gzip')
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+
+def test_accept_encoding():
+    accept_encoding = get_accept_encoding()
+    assert accept_encoding.startswith('gzip, deflate')
+    assert ('br' in accept_encoding) == any(importlib.util.find_spec(module) is not None for module in ('brotli', 'brotlicffi'))
+
+def test_transfer_stats(gzip_server):
+    """Checks that the sizes of the responses on the wire and once decompressed are recorded."""
+    stats = TransferStats()
+    for accept_encoding in ('identity', None):
+        session = make_session()
+        if accept_encoding:
+            session.headers['Accept-Encoding'] = accept_encoding
+        response = session.get(gzip_server, timeout=10)
+        assert response.json() == json.loads(BODY)
+        stats.record(response)
+    info = stats.info()
+    assert info.requests == 2
+    assert info.body_bytes == 2 * len(BODY)
+    assert info.wire_bytes == len(BODY) + len(gzip.compress(BODY))
+    assert info.encodings == {'identity': 1, 'gzip': 1}
+    assert info.http_versions == {'HTTP/1.1': 2}
+
+@pytest.mark.skipif(importlib.util.find_spec('httpx') is not None, reason='httpx is installed')
+def test_http2_requires_httpx():
+    with pytest.raises(ImportError, match='httpx'):
+        HTTP2Session()
+
+def make_httpx_stub(monkeypatch):
+    """Installs a stub of the `httpx` module, whose client answers every request with its
+    `outcome` (a response, or an exception to raise)."""
+    httpx = types.ModuleType('httpx')
+    httpx.outcome = None
+
+    class TransportError(Exception):
+        pass
+
+    class TimeoutException(TransportError):
+        pass
+
+    class Client(object):
+        def __init__(self, http2=False, follow_redirects=False):
+            self.requests = []
+
+        def get(self, uri, timeout=None, headers=None):
+            self.requests.append((uri, timeout, headers))
+            if isinstance(httpx.outcome, Exception):
+                raise httpx.outcome
+            return httpx.outcome
+
+        def close(self):
+            pass
+
+    httpx.TransportError = TransportError
+    httpx.TimeoutException = TimeoutException
+    httpx.Client = Client
+    monkeypatch.setitem(sys.modules, 'httpx', httpx)
+    monkeypatch.setitem(sys.modules, 'h2', types.ModuleType('h2'))
+    return httpx
+
+def test_http2_session_converts_responses(monkeypatch):
+    """Checks that the responses of `httpx` are converted to `requests` responses."""
+    httpx = make_httpx_stub(monkeypatch)
+    httpx.outcome = types.SimpleNamespace(
+        status_code=404, headers={'Content-Type': 'application/ld+json', 'Content-Encoding': 'br'},
+        url='https://example.org/api/dts/collection?id=x', reason_phrase='Not Found',
+        content=BODY, num_bytes_downloaded=123, http_version='HTTP/2'
+    )
+    session = make_session(http2=True)
+    assert isinstance(session, HTTP2Session)
+    response = session.get('https://example.org/api/dts/collection?id=x', timeout=5, headers={'If-None-Match': '"1"'})
+    uri, timeout, headers = session._client.requests[0]
+    assert timeout == 5 and headers['If-None-Match'] == '"1"' and headers['Accept-Encoding'].startswith('gzip')
+    assert response.status_code == 404 and response.reason == 'Not Found'
+    assert response.headers['content-type'] == 'application/ld+json'
+    assert response.url == 'https://example.org/api/dts/collection?id=x'
+    assert response._content == BODY and response.json() == json.loads(BODY)
+    assert response.wire_bytes == 123 and response.http_version == 'HTTP/2'
+    stats = TransferStats()
+    stats.record(response)
+    assert stats.info().wire_bytes == 123 and stats.info().http_versions == {'HTTP/2': 1}
+
+@pytest.mark.parametrize('error_name, expected', [
+    ('TimeoutException', requests.exceptions.Timeout),
+    ('TransportError', requests.exceptions.ConnectionError),
+])
+def test_http2_session_converts_errors(monkeypatch, error_name, expected):
+    """Checks that the errors of `httpx` are converted to `requests` exceptions."""
+    httpx = make_httpx_stub(monkeypatch)
+    error = httpx.outcome = getattr(httpx, error_name)('connection lost')
+    with pytest.raises(expected, match='connection lost') as error_info:
+        HTTP2Session().get('https://example.org/api/dts')
+    assert error_info.value.__cause__ is error